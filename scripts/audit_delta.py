@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Diff two image crawls or two heading audits (see bob_delta).
+
+  python3 scripts/audit_delta.py images                 # two newest warehouse runs (else by-page CSVs)
+  python3 scripts/audit_delta.py images 3 4
+  python3 scripts/audit_delta.py images audits/brushonblock-images-by-page-2025-10-22.csv 4
+  python3 scripts/audit_delta.py headings               # two newest heading-order JSONs
+  python3 scripts/audit_delta.py headings OLD.json NEW.json
+
+Writes audits/brushonblock-images-delta-OLD-to-NEW.csv or
+audits/brushonblock-heading-order-delta-OLD-to-NEW.csv with only the rows
+that changed. Apply just the image changes with
+  python3 scripts/shopify_apply_alt_and_rename.py --apply-alts --delta
+"""
+import argparse
+import sys
+from collections import Counter
+from typing import List
+
+from bob_delta import (
+    HEADING_DELTA_COLUMNS,
+    IMAGE_DELTA_COLUMNS,
+    diff_headings,
+    diff_images,
+    image_source,
+    latest_heading_reports,
+    latest_image_specs,
+    load_heading_results,
+    source_label,
+    write_delta_csv,
+)
+from bob_warehouse import DEFAULT_WAREHOUSE
+
+
+def print_counts(changes: List[dict]) -> None:
+    counts = Counter(c["change"] for c in changes)
+    for change, n in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])):
+        print(f"  {change}: {n}")
+    if not counts:
+        print("  no changes")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Write the added, removed and changed rows between two audit runs.")
+    ap.add_argument("--db", default=DEFAULT_WAREHOUSE, help="Warehouse path (for run ids)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    img = sub.add_parser("images", help="Diff two image crawls (warehouse run ids or by-page CSVs)")
+    img.add_argument("old", nargs="?")
+    img.add_argument("new", nargs="?")
+    hd = sub.add_parser("headings", help="Diff two heading-order audit JSONs")
+    hd.add_argument("old", nargs="?")
+    hd.add_argument("new", nargs="?")
+    args = ap.parse_args()
+
+    if (args.old is None) != (args.new is None):
+        print("Pass both OLD and NEW, or neither for the two newest.")
+        sys.exit(2)
+    if args.cmd == "images":
+        sources = (args.old, args.new) if args.old else latest_image_specs(args.db)
+        if not sources:
+            print("Need two image crawls: two finished warehouse runs or two by-page CSVs.")
+            sys.exit(2)
+        old_label, old_rows = image_source(sources[0], args.db)
+        new_label, new_rows = image_source(sources[1], args.db)
+        changes = diff_images(old_rows, new_rows)
+        out = f"audits/brushonblock-images-delta-{old_label}-to-{new_label}.csv"
+        write_delta_csv(out, IMAGE_DELTA_COLUMNS, changes)
+    else:
+        sources = (args.old, args.new) if args.old else latest_heading_reports()
+        if not sources:
+            print("Need two heading-order audit JSONs.")
+            sys.exit(2)
+        changes = diff_headings(load_heading_results(sources[0]), load_heading_results(sources[1]))
+        out = f"audits/brushonblock-heading-order-delta-{source_label(sources[0])}-to-{source_label(sources[1])}.csv"
+        write_delta_csv(out, HEADING_DELTA_COLUMNS, changes)
+    print(f"{sources[0]} -> {sources[1]}")
+    print_counts(changes)
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
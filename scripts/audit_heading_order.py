@@ -2,21 +2,27 @@
 import argparse
 import json
 import os
-import re
 import sys
 import time
-import xml.etree.ElementTree as ET
 from collections import Counter, defaultdict
-from dataclasses import dataclass, asdict
-from html.parser import HTMLParser
-from io import StringIO
-from typing import Dict, List, Optional, Tuple
-
-try:
-    import requests  # type: ignore
-except Exception:
-    print("This script requires the 'requests' package.")
-    sys.exit(1)
+from dataclasses import asdict
+from typing import Dict, List, Sequence, Tuple
+
+from bob_html import Heading, PageDoc, parse_page
+from bob_crawl import (
+    Analyzer,
+    Crawler,
+    Page,
+    add_crawl_args,
+    crawler_options,
+    frontier_entries,
+    gather_urls_from_sitemaps,
+    http_cache_summary,
+    open_frontier,
+    run_frontier_worker,
+)
+from bob_fetch import HostLimiter
+import bob_crawl
 
 
 BASE_DOMAIN = "brushonblock.com"
@@ -25,61 +31,15 @@ USER_AGENT = "HeadingAuditBot/1.0 (+https://example.com)"
 RATE_LIMIT_SEC = 0.5
 TIMEOUT = 20
 
+# Paces one-off audit_page() calls; full runs go through Crawler's async fetcher
+_LIMITER = HostLimiter(1 / RATE_LIMIT_SEC)
+
 
 def http_get(url: str):
-    try:
-        r = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=TIMEOUT)
-        if r.status_code == 200 and "text/html" in r.headers.get("content-type", "").lower():
-            return r
-        return None
-    except Exception:
-        return None
-
-
-def is_same_host(url: str) -> bool:
-    return BASE_DOMAIN in url.split("/")[2] if url.startswith("http") else True
-
-
-def gather_urls_from_sitemaps(sitemap_url: str) -> List[str]:
-    urls: List[str] = []
-    seen_sitemaps = set()
-
-    def fetch_sitemap(url: str):
-        if url in seen_sitemaps:
-            return
-        seen_sitemaps.add(url)
-        time.sleep(RATE_LIMIT_SEC)
-        try:
-            r = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=TIMEOUT)
-        except Exception:
-            return
-        if not r or r.status_code != 200:
-            return
-        try:
-            root = ET.fromstring(r.text)
-        except Exception:
-            return
-        ns = {"sm": "http://www.sitemaps.org/schemas/sitemap/0.9"}
-        # recurse into sitemap index
-        for loc in root.findall(".//sm:sitemap/sm:loc", ns):
-            loc_url = (loc.text or "").strip()
-            if loc_url and is_same_host(loc_url):
-                fetch_sitemap(loc_url)
-        # collect urlset urls
-        for loc in root.findall(".//sm:url/sm:loc", ns):
-            loc_url = (loc.text or "").strip()
-            if loc_url and is_same_host(loc_url):
-                urls.append(loc_url)
-
-    fetch_sitemap(sitemap_url)
-    # de-dupe while preserving order
-    seen = set()
-    out: List[str] = []
-    for u in urls:
-        if u not in seen:
-            seen.add(u)
-            out.append(u)
-    return out
+    r = bob_crawl.http_get(url, USER_AGENT)
+    if r and "text/html" in r.headers.get("content-type", "").lower():
+        return r
+    return None
 
 
 def categorize(url: str) -> str:
@@ -103,57 +63,6 @@ def categorize(url: str) -> str:
     return "other"
 
 
-HEADING_TAGS = {f"h{i}": i for i in range(1, 7)}
-
-
-@dataclass
-class Heading:
-    level: int
-    text: str
-    path: str
-    attrs: Dict[str, str]
-
-
-class HeadingParser(HTMLParser):
-    def __init__(self):
-        super().__init__()
-        self.stack: List[str] = []
-        self.headings: List[Heading] = []
-        self._in_heading: Optional[Tuple[str, int, Dict[str, str], StringIO]] = None
-
-    def handle_starttag(self, tag, attrs):
-        t = tag.lower()
-        self.stack.append(t)
-        if t in HEADING_TAGS and self._in_heading is None:
-            attrs_dict = {k.lower(): v for k, v in attrs}
-            buf = StringIO()
-            level = HEADING_TAGS[t]
-            self._in_heading = (t, level, attrs_dict, buf)
-
-    def handle_endtag(self, tag):
-        t = tag.lower()
-        if self._in_heading and t == self._in_heading[0]:
-            tag_name, level, attrs_dict, buf = self._in_heading
-            # build a simple path snapshot (last few ancestors)
-            ancestry = [x for x in self.stack if x != tag_name]
-            path = ">".join(ancestry[-6:] + [tag_name])
-            text = re.sub(r"\s+", " ", buf.getvalue()).strip()
-            self.headings.append(Heading(level=level, text=text, path=path, attrs=attrs_dict))
-            self._in_heading = None
-        if self.stack:
-            # pop until matching tag (be defensive)
-            try:
-                idx = len(self.stack) - 1 - self.stack[::-1].index(t)
-                self.stack = self.stack[:idx]
-            except ValueError:
-                # tag not found; reset stack when malformed
-                self.stack = []
-
-    def handle_data(self, data):
-        if self._in_heading is not None:
-            self._in_heading[3].write(data)
-
-
 def analyze_headings(headings: List[Heading]) -> Dict:
     issues: List[Dict] = []
     levels = [h.level for h in headings]
@@ -193,24 +102,29 @@ def analyze_headings(headings: List[Heading]) -> Dict:
     return {"sequence": levels, "issues": issues}
 
 
-def audit_page(url: str) -> Dict:
-    time.sleep(RATE_LIMIT_SEC)
-    r = http_get(url)
-    if not r:
-        return {"url": url, "error": "fetch_failed"}
-    parser = HeadingParser()
-    try:
-        parser.feed(r.text)
-    except Exception:
+def audit_doc(url: str, doc: PageDoc) -> Dict:
+    if doc.parse_error:
         return {"url": url, "error": "parse_failed"}
-    analysis = analyze_headings(parser.headings)
+    analysis = analyze_headings(doc.headings)
     return {
         "url": url,
-        "headings": [asdict(h) for h in parser.headings],
+        "headings": [asdict(h) for h in doc.headings],
         **analysis,
     }
 
 
+def audit_html(url: str, html: str) -> Dict:
+    return audit_doc(url, parse_page(html, only=("headings",)))
+
+
+def audit_page(url: str) -> Dict:
+    _LIMITER.bucket(url).wait()
+    r = http_get(url)
+    if not r:
+        return {"url": url, "error": "fetch_failed"}
+    return audit_html(url, r.text)
+
+
 def pick_sample(urls: List[str], max_pages: int) -> List[str]:
     buckets: Dict[str, List[str]] = defaultdict(list)
     for u in urls:
@@ -283,15 +197,69 @@ def render_markdown(audits: List[Dict], scanned_count: int) -> str:
     return "\n".join(lines)
 
 
+def write_heading_report(audits: List[Dict], scanned_count: int, out_prefix: str) -> Tuple[str, str]:
+    os.makedirs("audits", exist_ok=True)
+    os.makedirs("docs", exist_ok=True)
+    date = time.strftime("%Y-%m-%d")
+    json_path = os.path.join("audits", f"{out_prefix}-{date}.json")
+    md_path = os.path.join("docs", f"{out_prefix}-{date}.md")
+
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"scanned": scanned_count, "results": audits}, f, ensure_ascii=False, indent=2)
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(render_markdown(audits, scanned_count=scanned_count))
+    return json_path, md_path
+
+
+class HeadingAnalyzer(Analyzer):
+    name = "headings"
+
+    def __init__(self, sample: Sequence[str], out_prefix: str = "brushonblock-heading-order"):
+        self.sample = list(sample)
+        self._wanted = set(self.sample)
+        self.out_prefix = out_prefix
+        self.results: Dict[str, Dict] = {}
+
+    def wants(self, url: str) -> bool:
+        return url in self._wanted
+
+    @staticmethod
+    def extract(page: Page) -> Dict:
+        if not page.is_html:
+            return {"url": page.url, "error": "fetch_failed"}
+        return audit_doc(page.url, page.doc)
+
+    def absorb(self, url: str, data: Dict) -> None:
+        self.results[url] = data
+
+    def on_error(self, url: str) -> None:
+        self.results[url] = {"url": url, "error": "fetch_failed"}
+
+    def finish(self) -> List[str]:
+        audits = [self.results.get(u, {"url": u, "error": "fetch_failed"}) for u in self.sample]
+        return list(write_heading_report(audits, len(self.sample), self.out_prefix))
+
+
 def main():
     ap = argparse.ArgumentParser(description="Audit heading order (H1–H6) across pages.")
     ap.add_argument("--sitemap", default=f"{BASE_URL}/sitemap.xml")
     ap.add_argument("--max-pages", type=int, default=200)
     ap.add_argument("--out-prefix", default="brushonblock-heading-order")
+    add_crawl_args(ap, RATE_LIMIT_SEC, name="headings")
     args = ap.parse_args()
-
-    print("Discovering pages from sitemap…", flush=True)
-    urls = gather_urls_from_sitemaps(args.sitemap)
+    options = crawler_options(args)
+    if args.worker:
+        run_frontier_worker(args, {HeadingAnalyzer.name: HeadingAnalyzer.extract}, USER_AGENT, options)
+        return
+
+    frontier = open_frontier(args)
+    entries = frontier_entries(frontier)
+    if entries is not None:
+        # Resuming: the frontier holds the sample chosen by the interrupted run
+        urls = [e.loc for e in entries]
+    else:
+        print("Discovering pages from sitemap…", flush=True)
+        urls = gather_urls_from_sitemaps(args.sitemap, USER_AGENT)
     if not urls:
         print("No URLs discovered.")
         sys.exit(2)
@@ -299,28 +267,14 @@ def main():
     sample = pick_sample(urls, args.max_pages)
     print(f"Scanning {len(sample)} pages (from {len(urls)} discovered)…", flush=True)
 
-    audits: List[Dict] = []
-    for idx, url in enumerate(sample, 1):
-        audits.append(audit_page(url))
-        if idx % 25 == 0:
-            print(f"\tProcessed {idx}/{len(sample)}…", flush=True)
-
-    os.makedirs("audits", exist_ok=True)
-    os.makedirs("docs", exist_ok=True)
-    date = time.strftime("%Y-%m-%d")
-    json_path = os.path.join("audits", f"{args.out_prefix}-{date}.json")
-    md_path = os.path.join("docs", f"{args.out_prefix}-{date}.md")
-
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump({"scanned": len(sample), "results": audits}, f, ensure_ascii=False, indent=2)
-    with open(md_path, "w", encoding="utf-8") as f:
-        f.write(render_markdown(audits, scanned_count=len(sample)))
+    outputs = Crawler([HeadingAnalyzer(sample, args.out_prefix)], user_agent=USER_AGENT, **options).run(sample, frontier=frontier)
+    if http_cache_summary():
+        print(http_cache_summary())
 
     print("\nSaved:")
-    print(json_path)
-    print(md_path)
+    for path in outputs:
+        print(path)
 
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Manage the audit warehouse (audits/brushonblock-audit.sqlite, see bob_warehouse).
+
+  python3 scripts/audit_warehouse.py runs
+  python3 scripts/audit_warehouse.py import audits/brushonblock-images-by-page-2025-10-22.csv \\
+      audits/brushonblock-images-unique-2025-10-22.csv --started 2025-10-22
+  python3 scripts/audit_warehouse.py export 3 --by-page by-page.csv --unique unique.csv
+  python3 scripts/audit_warehouse.py delete 2
+"""
+import argparse
+import json
+import sys
+
+from bob_warehouse import DEFAULT_WAREHOUSE, Warehouse
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Import, list and export audit warehouse runs.")
+    ap.add_argument("--db", default=DEFAULT_WAREHOUSE, help="Warehouse path")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("runs", help="List runs")
+    imp = sub.add_parser("import", help="Load an image crawl's by-page and unique CSVs as a run")
+    imp.add_argument("by_page_csv")
+    imp.add_argument("unique_csv")
+    imp.add_argument("--started", help="When the crawl ran (default: now)")
+    exp = sub.add_parser("export", help="Write a run back out as CSV")
+    exp.add_argument("run", type=int)
+    exp.add_argument("--by-page", help="by-page CSV path")
+    exp.add_argument("--unique", help="unique images CSV path")
+    rm = sub.add_parser("delete", help="Drop a run and everything derived from it")
+    rm.add_argument("run", type=int)
+    args = ap.parse_args()
+
+    wh = Warehouse(args.db)
+    if args.cmd == "runs":
+        for r in wh.runs():
+            source = json.loads(r["source"] or "{}")
+            state = "finished" if r["finished"] else "incomplete"
+            print(f"{r['run_id']:>4}  {r['kind']:<7} {r['started']}  {state:<10} pages={r['pages']} images={r['images']} page_images={r['page_images']}  {source.get('by_page_csv', '')}")
+    elif args.cmd == "import":
+        run_id = wh.import_csvs(args.by_page_csv, args.unique_csv, started=args.started)
+        print(f"Imported run {run_id}")
+    elif args.cmd == "export":
+        if not (args.by_page or args.unique):
+            print("Pass --by-page and/or --unique.")
+            sys.exit(2)
+        if args.by_page:
+            wh.export_by_page_csv(args.run, args.by_page)
+            print(args.by_page)
+        if args.unique:
+            wh.export_unique_csv(args.run, args.unique)
+            print(args.unique)
+    elif args.cmd == "delete":
+        wh.delete_run(args.run)
+        print(f"Deleted run {args.run}")
+    wh.close()
+
+
+if __name__ == "__main__":
+    main()
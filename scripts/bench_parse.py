@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Benchmark: legacy per-script parsing vs the single-pass PageParser.
+
+Legacy = ImgParser + derive_page_title (images), LinkParser + derive_page_title
+(links) and HeadingParser, i.e. three tokenizations and four regex scans per
+page, as the crawl scripts did before bob_html; they live on here only as the
+baseline. Single pass = bob_html.parse_page() with every extractor.
+
+Usage:
+  python3 scripts/bench_parse.py                 # synthetic collection-style pages
+  python3 scripts/bench_parse.py saved/*.html    # real pages saved from the storefront
+"""
+import argparse
+import html as htmllib
+import re
+import sys
+import time
+from html.parser import HTMLParser
+from io import StringIO
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bob_html import HEADING_TAGS, Heading, parse_page
+
+
+# --- legacy parsers (the baseline) ---
+
+def derive_image_page_title(html: str) -> str:
+    # crawl_bob_images: prefer og:title -> <title>, unescaped
+    m = re.search(r'<meta[^>]+property=["\']og:title["\'][^>]+content=["\']([^"\']+)["\']', html, re.I)
+    if m:
+        return htmllib.unescape(m.group(1).strip())
+    m = re.search(r"<title>(.*?)</title>", html, re.I | re.S)
+    if m:
+        return htmllib.unescape(re.sub(r"\s+", " ", m.group(1)).strip())
+    return ""
+
+
+def derive_link_page_title(html: str) -> str:
+    # crawl_bob_links: prefer og:title then <title>
+    m = re.search(r'<meta[^>]+property=["\']og:title["\'][^>]+content=["\']([^"\']+)["\']', html, re.I)
+    if m:
+        return m.group(1).strip()
+    m = re.search(r"<title>(.*?)</title>", html, re.I | re.S)
+    if m:
+        return re.sub(r"\s+", " ", m.group(1)).strip()
+    return ""
+
+
+class ImgParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.images: List[Tuple[str, str]] = []  # (src, alt)
+        self._in_title = False
+        self._title_buf = StringIO()
+
+    def handle_starttag(self, tag, attrs):
+        if tag.lower() == "img":
+            d = {k.lower(): v for k, v in attrs}
+            src = d.get("src") or d.get("data-src") or d.get("data-srcset") or ""
+            # If srcset provided and src empty, take first URL
+            if (not src) and "srcset" in d:
+                srcset = d.get("srcset", "")
+                if srcset:
+                    src = srcset.split(",")[0].strip().split(" ")[0]
+            alt = d.get("alt", "") or ""
+            if src:
+                self.images.append((src, alt))
+        elif tag.lower() == "title":
+            self._in_title = True
+
+    def handle_endtag(self, tag):
+        if tag.lower() == "title":
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title_buf.write(data)
+
+    def title(self) -> str:
+        return self._title_buf.getvalue().strip()
+
+
+class LinkParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.links: List[str] = []
+        self._title_buf = StringIO()
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag.lower() == "a":
+            d = {k.lower(): v for k, v in attrs}
+            href = d.get("href")
+            if href:
+                self.links.append(href)
+        elif tag.lower() == "title":
+            self._in_title = True
+
+    def handle_endtag(self, tag):
+        if tag.lower() == "title":
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title_buf.write(data)
+
+    def title(self) -> str:
+        return self._title_buf.getvalue().strip()
+
+
+class HeadingParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.stack: List[str] = []
+        self.headings: List[Heading] = []
+        self._in_heading: Optional[Tuple[str, int, Dict[str, str], StringIO]] = None
+
+    def handle_starttag(self, tag, attrs):
+        t = tag.lower()
+        self.stack.append(t)
+        if t in HEADING_TAGS and self._in_heading is None:
+            attrs_dict = {k.lower(): v for k, v in attrs}
+            buf = StringIO()
+            level = HEADING_TAGS[t]
+            self._in_heading = (t, level, attrs_dict, buf)
+
+    def handle_endtag(self, tag):
+        t = tag.lower()
+        if self._in_heading and t == self._in_heading[0]:
+            tag_name, level, attrs_dict, buf = self._in_heading
+            # build a simple path snapshot (last few ancestors)
+            ancestry = [x for x in self.stack if x != tag_name]
+            path = ">".join(ancestry[-6:] + [tag_name])
+            text = re.sub(r"\s+", " ", buf.getvalue()).strip()
+            self.headings.append(Heading(level=level, text=text, path=path, attrs=attrs_dict))
+            self._in_heading = None
+        if self.stack:
+            # pop until matching tag (be defensive)
+            try:
+                idx = len(self.stack) - 1 - self.stack[::-1].index(t)
+                self.stack = self.stack[:idx]
+            except ValueError:
+                # tag not found; reset stack when malformed
+                self.stack = []
+
+    def handle_data(self, data):
+        if self._in_heading is not None:
+            self._in_heading[3].write(data)
+
+
+# --- benchmark ---
+
+def synthetic_page(n_images: int = 300, depth: int = 14, og_title: bool = True) -> str:
+    parts = ["<!doctype html><html><head><title>Sheer Genius SPF 50 | Brush On Block</title>"]
+    if og_title:
+        parts.append('<meta property="og:title" content="Sheer Genius Collection">')
+    parts.append('<script type="application/ld+json">{"@type": "CollectionPage"}</script></head><body>')
+    # inline SVG icons carry their own <title>; only the document's counts as the page title
+    parts.append('<button class="close"><svg viewBox="0 0 24 24"><title>Close</title><path d="M0 0L24 24"/></svg></button>')
+    parts.append("<div class='wrap'>" * depth)
+    parts.append("<h1>Collection</h1>")
+    for i in range(n_images):
+        if i % 20 == 0:
+            parts.append(f"<h2>Section {i}</h2><p>Lorem ipsum dolor sit amet, &amp; more text.</p>")
+        parts.append(
+            f'<div class="card"><a href="/products/item-{i}"><img src="//cdn.shopify.com/s/files/1/0/item_{i}.jpg?v=1&width=400" '
+            f'alt="Item {i}" loading="lazy" width="400" height="400"></a><h3>Item {i}</h3><span>$24.00</span></div>'
+        )
+    parts.append("</div>" * depth)
+    parts.append('<a href="/blogs/news/spf-guide">Guide</a></body></html>')
+    return "".join(parts)
+
+
+def legacy(html: str) -> None:
+    p = ImgParser()
+    p.feed(html)
+    derive_image_page_title(html) or p.title()
+    lp = LinkParser()
+    lp.feed(html)
+    derive_link_page_title(html) or lp.title()
+    hp = HeadingParser()
+    hp.feed(html)
+
+
+def single_pass(html: str) -> None:
+    parse_page(html)
+
+
+def check_parity(html: str) -> None:
+    """Both paths extract the same title, images, links and headings from `html`."""
+    doc = parse_page(html)
+    ip = ImgParser()
+    ip.feed(html)
+    hp = HeadingParser()
+    hp.feed(html)
+    lp = LinkParser()
+    lp.feed(html)
+    assert doc.page_title == (derive_image_page_title(html) or ip.title()), "title mismatch"
+    assert doc.images == ip.images and doc.links == lp.links and doc.headings == hp.headings, "extractor mismatch"
+
+
+def best_of(fn: Callable[[str], None], pages: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages:
+            fn(html)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare legacy multi-pass parsing with the single-pass extractor parser.")
+    ap.add_argument("files", nargs="*", help="Saved HTML pages (default: synthetic pages)")
+    ap.add_argument("--pages", type=int, default=20, help="Synthetic pages to generate")
+    ap.add_argument("--images", type=int, default=300, help="<img> tags per synthetic page")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    if args.files:
+        pages = []
+        for path in args.files:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                pages.append(f.read())
+    else:
+        # every other page without og:title, so the <title> fallback is exercised too
+        pages = [synthetic_page(args.images, og_title=i % 2 == 0) for i in range(args.pages)]
+    if not pages:
+        print("No pages to benchmark.")
+        sys.exit(2)
+
+    # Sanity: both paths extract the same data
+    for html in pages[:2]:
+        check_parity(html)
+
+    t_legacy = best_of(legacy, pages, args.repeat)
+    t_single = best_of(single_pass, pages, args.repeat)
+    n = len(pages)
+    avg_kb = sum(len(p) for p in pages) / n / 1024
+    print(f"Pages: {n} (avg {avg_kb:.0f} KB), best of {args.repeat}")
+    print(f"Legacy (3 parsers + title regexes): {t_legacy / n * 1000:.2f} ms/page")
+    print(f"Single pass (all extractors):       {t_single / n * 1000:.2f} ms/page")
+    print(f"Saved: {(t_legacy - t_single) / n * 1000:.2f} ms/page ({(1 - t_single / t_legacy) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
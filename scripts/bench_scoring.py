@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark: row-by-row priority scoring vs the NumPy batch engine (bob_scoring).
+
+Row loop = classify_scope / priority_score / decide_action / rename_reason per
+image, as prepare_bob_fixes always did. Batch = score_batch(), which classifies
+each distinct page and filename once and scores with array columns. The two
+must return identical rows in identical order; the benchmark checks that first.
+
+Usage:
+  python3 scripts/bench_scoring.py                      # 200k synthetic images
+  python3 scripts/bench_scoring.py --images 2000000
+  python3 scripts/bench_scoring.py --csv audits/brushonblock-images-unique-2025-10-22.csv
+  python3 scripts/bench_scoring.py --run 3               # audit warehouse run
+"""
+import argparse
+import csv
+import random
+import sys
+import time
+from typing import Callable, List
+
+import bob_scoring
+from bob_warehouse import open_run
+
+
+def synthetic_images(n_images: int, n_pages: int, seed: int = 7) -> List[dict]:
+    rng = random.Random(seed)
+    kinds = ["products", "collections", "blogs/news", "pages"]
+    pages = ["https://brushonblock.com/", "https://brushonblock.com"]
+    pages += [f"https://brushonblock.com/{rng.choice(kinds)}/item-{i}" for i in range(n_pages)]
+    names = ["sheer-genius-spf-{i}.jpg", "Sheer_Genius_{i}.JPG", "IMG_{i}.png", "image{i}.webp", "brush-on-block-{i}.jpg"]
+    alts = ["", "  ", "Brush On Block mineral sunscreen"]
+    images = []
+    for i in range(n_images):
+        r = rng.random()
+        if r < 0.002:
+            found = rng.sample(pages, 40)  # header/footer assets
+        elif r < 0.02:
+            found = rng.sample(pages, rng.randint(4, 25))
+        else:
+            found = rng.sample(pages, rng.randint(0, 3))
+        name = rng.choice(names).format(i=i)
+        images.append({
+            "image_url": f"https://brushonblock.com/cdn/shop/files/{name}",
+            "current_filename": name,
+            "pages": sorted(found),
+            "best_current_alt": rng.choice(alts),
+            "suggested_filename": f"brush-on-block-{i}.jpg",
+            "suggested_alt": rng.choice(alts),
+        })
+    return images
+
+
+def load_csv(path: str) -> List[dict]:
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        row["pages"] = [p.strip() for p in row["pages_found_on"].split(";") if p.strip()]
+    return rows
+
+
+def best_of(fn: Callable[[List[dict]], List[dict]], images: List[dict], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(images)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare row-by-row and batch (NumPy) priority scoring.")
+    ap.add_argument("--images", type=int, default=200_000, help="Synthetic images to generate")
+    ap.add_argument("--pages", type=int, default=5_000, help="Distinct pages in the synthetic site")
+    ap.add_argument("--csv", help="Score this unique images CSV instead of synthetic data")
+    ap.add_argument("--run", type=int, help="Score this audit warehouse run instead of synthetic data")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    if bob_scoring.np is None:
+        print("NumPy is not installed; the batch engine is unavailable.")
+        sys.exit(2)
+    if args.csv:
+        images = load_csv(args.csv)
+    elif args.run is not None:
+        wh, run_id = open_run(args.run)
+        images = wh.image_rows(run_id)
+        wh.close()
+    else:
+        images = synthetic_images(args.images, args.pages)
+    if not images:
+        print("No images to benchmark.")
+        sys.exit(2)
+
+    # Sanity: both engines produce the same ranked rows
+    rows, batch = bob_scoring.score_rows(images), bob_scoring.score_batch(images)
+    assert rows == batch, "engine mismatch"
+
+    t_rows = best_of(bob_scoring.score_rows, images, args.repeat)
+    t_batch = best_of(bob_scoring.score_batch, images, args.repeat)
+    n = len(images)
+    edges = sum(len(r["pages"]) for r in images)
+    print(f"Images: {n} ({edges} image/page edges), best of {args.repeat}")
+    print(f"Row loop: {t_rows:.3f}s ({t_rows / n * 1e6:.2f} us/image)")
+    print(f"Batch:    {t_batch:.3f}s ({t_batch / n * 1e6:.2f} us/image)")
+    print(f"Speedup:  {t_rows / t_batch:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
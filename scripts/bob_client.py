@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for the storefront crawlers and the Admin API scripts.
+
+One requests.Session per process: keep-alive connection pools per host,
+gzip/deflate (and br when the brotli package is installed) negotiated on every
+request, a default (connect, read) timeout for calls that do not pass one, and
+per-request timing. Set BOB_HTTP_TIMINGS=1 to print a per-host summary at exit.
+
+    from bob_client import client
+    r = client.get(url, headers={"X-Shopify-Access-Token": token}, params=...)
+"""
+import atexit
+import os
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import brotli  # noqa: F401  (urllib3 decodes br when this is importable)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+
+DEFAULT_TIMEOUT: Tuple[float, float] = (10, 60)  # connect, read
+POOL_CONNECTIONS = 8  # hosts kept warm (storefront, CDN, admin API, ...)
+POOL_MAXSIZE = 32  # sockets per host; >= crawler concurrency
+
+
+@dataclass
+class Timing:
+    method: str
+    url: str
+    status: Optional[int]  # None when the request raised
+    elapsed_ms: float
+    body_bytes: int  # decoded
+    wire_bytes: int  # as received (compressed)
+
+
+TimingHook = Callable[[Timing], None]
+
+
+class HttpClient:
+    def __init__(self, timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self.hooks: List[TimingHook] = []
+        self._lock = threading.Lock()
+        self._per_host: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0, 0, 0])  # count, ms, body, wire
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+
+    def add_hook(self, hook: TimingHook) -> None:
+        """hook(Timing) is called after every request, from the calling thread."""
+        self.hooks.append(hook)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.monotonic()
+        r = None
+        try:
+            r = self.session.request(method, url, **kwargs)
+            return r
+        finally:
+            elapsed_ms = (time.monotonic() - start) * 1000
+            body = wire = 0
+            if r is not None and not kwargs.get("stream"):
+                body = len(r.content)
+                try:
+                    wire = r.raw.tell() or body
+                except Exception:
+                    wire = body
+            self._record(Timing(method.upper(), url, r.status_code if r is not None else None, elapsed_ms, body, wire))
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def _record(self, t: Timing) -> None:
+        with self._lock:
+            agg = self._per_host[urlsplit(t.url).netloc]
+            agg[0] += 1
+            agg[1] += t.elapsed_ms
+            agg[2] += t.body_bytes
+            agg[3] += t.wire_bytes
+        for hook in self.hooks:
+            hook(t)
+
+    def timing_summary(self) -> str:
+        lines = []
+        with self._lock:
+            for host, (n, ms, body, wire) in sorted(self._per_host.items()):
+                ratio = f", {wire / body:.0%} on the wire" if body else ""
+                lines.append(f"{host}: {n} requests, avg {ms / n:.0f} ms, {body / 1_000_000:.1f} MB{ratio}")
+        return "\n".join(lines)
+
+
+client = HttpClient()
+
+if os.environ.get("BOB_HTTP_TIMINGS"):
+    atexit.register(lambda: print("HTTP timings:\n" + (client.timing_summary() or "(no requests)")))
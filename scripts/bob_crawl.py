@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Shared storefront crawl engine.
+
+Walks the sitemap, fetches every page exactly once and hands it to each
+registered analyzer (images, internal links, heading order, ...). Analyzers
+keep their own state and write their own outputs in finish().
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    from bob_client import client
+except Exception:
+    print("This script requires the 'requests' package.")
+    sys.exit(1)
+
+from bob_extract_cache import DEFAULT_EXTRACT_CACHE_PATH, ExtractCache, body_digest
+from bob_html import PageDoc, parse_page
+from bob_fetch import DEFAULT_CONCURRENCY, AsyncFetcher, HostLimiter
+from bob_frontier import PARSED, Frontier
+from bob_http_cache import DEFAULT_CACHE_PATH, HttpCache
+from bob_sitemap import DEFAULT_SITEMAP_CONCURRENCY, SitemapEntry, iter_sitemap_entries
+
+
+BASE_DOMAIN = "brushonblock.com"
+BASE_URL = f"https://{BASE_DOMAIN}"
+USER_AGENT = "SiteAuditBot/1.0 (+https://example.com)"
+RATE_LIMIT_SEC = 0.5  # 2 req/sec
+TIMEOUT = 20
+
+# Set via enable_http_cache(); when present every http_get revalidates against it
+_http_cache: Optional[HttpCache] = None
+
+
+@dataclass
+class Page:
+    url: str
+    html: str
+    content_type: str = ""
+
+    @property
+    def is_html(self) -> bool:
+        return "text/html" in self.content_type.lower()
+
+    @cached_property
+    def doc(self) -> PageDoc:
+        # Parsed once on first access, then shared by every analyzer
+        return parse_page(self.html)
+
+
+class Analyzer:
+    """Base class for crawl analyzers; override the hooks you need."""
+
+    name = "analyzer"
+
+    def wants(self, url: str) -> bool:
+        return True
+
+    @staticmethod
+    def extract(page: Page) -> Any:
+        # Per-page, JSON-serializable result. Must not depend on analyzer state:
+        # it may run in a parse pool or frontier worker process, and absorb()
+        # runs in the coordinator, in sitemap order.
+        return None
+
+    def absorb(self, url: str, data: Any) -> None:
+        pass
+
+    def on_error(self, url: str) -> None:
+        pass
+
+    def followups(self) -> Iterable[str]:
+        # Extra URLs to fetch after the main pass (e.g. link targets not in the sitemap)
+        return []
+
+    def on_followup(self, page: Page) -> None:
+        pass
+
+    def finish(self) -> List[str]:
+        # Write outputs; return the paths written
+        return []
+
+
+Extractors = Dict[str, Callable[[Page], Any]]
+
+
+def run_extractors(page: Page, extractors: Extractors) -> Dict[str, Any]:
+    return {name: fn(page) for name, fn in extractors.items()}
+
+
+def _extract_in_worker(url: str, html: str, content_type: str, extractors: Extractors) -> Dict[str, Any]:
+    # ProcessPoolExecutor entry point; the extractors pickle by reference (Analyzer staticmethods)
+    return run_extractors(Page(url=url, html=html, content_type=content_type), extractors)
+
+
+def enable_http_cache(path: str = DEFAULT_CACHE_PATH, max_age: float = 0) -> HttpCache:
+    global _http_cache
+    _http_cache = HttpCache(path, max_age=max_age)
+    return _http_cache
+
+
+def http_cache_summary() -> Optional[str]:
+    return _http_cache.stats.summary() if _http_cache is not None else None
+
+
+def http_get(url: str, user_agent: str = USER_AGENT):
+    try:
+        if _http_cache is not None:
+            r = _http_cache.get(url, headers={"User-Agent": user_agent}, timeout=TIMEOUT)
+        else:
+            r = client.get(url, headers={"User-Agent": user_agent}, timeout=TIMEOUT)
+        if r.status_code == 200:
+            return r
+        return None
+    except Exception:
+        return None
+
+
+def is_same_host(url: str) -> bool:
+    return BASE_DOMAIN in url.split("/")[2] if url.startswith("http") else True
+
+
+def gather_sitemap_entries(
+    sitemap_url: str = f"{BASE_URL}/sitemap.xml",
+    user_agent: str = USER_AGENT,
+    concurrency: int = DEFAULT_SITEMAP_CONCURRENCY,
+) -> List[SitemapEntry]:
+    limiter = HostLimiter(1 / RATE_LIMIT_SEC)
+    return list(iter_sitemap_entries(sitemap_url, user_agent, keep=is_same_host, concurrency=concurrency, limiter=limiter))
+
+
+def gather_urls_from_sitemaps(
+    sitemap_url: str = f"{BASE_URL}/sitemap.xml",
+    user_agent: str = USER_AGENT,
+) -> List[str]:
+    return [e.loc for e in gather_sitemap_entries(sitemap_url, user_agent)]
+
+
+def check_robots(user_agent: str = USER_AGENT) -> bool:
+    r = http_get(f"{BASE_URL}/robots.txt", user_agent)
+    if not r:
+        return True
+    # crude: if Disallow: / for user-agent *
+    blocks_all = False
+    current = None
+    for line in r.text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.lower().startswith("user-agent:"):
+            current = line.split(":", 1)[1].strip()
+        if line.lower().startswith("disallow:") and (current == "*"):
+            path = line.split(":", 1)[1].strip()
+            if path == "/":
+                blocks_all = True
+    return not blocks_all
+
+
+def add_crawl_args(ap: argparse.ArgumentParser, rate_limit_sec: float = RATE_LIMIT_SEC, name: str = "crawl") -> None:
+    ap.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Requests in flight")
+    ap.add_argument("--rate", type=float, default=1 / rate_limit_sec, help="Max requests/sec per host (shared across --workers)")
+    ap.add_argument("--no-cache", action="store_true", help="Bypass the on-disk HTTP cache")
+    ap.add_argument("--cache-path", default=DEFAULT_CACHE_PATH)
+    ap.add_argument("--cache-max-age", type=float, default=0, help="Serve cached pages younger than this many seconds without revalidating")
+    ap.add_argument("--reparse", action="store_true", help="Parse every page, even ones whose body is unchanged since the last run")
+    ap.add_argument("--extract-cache-path", default=DEFAULT_EXTRACT_CACHE_PATH)
+    ap.add_argument(
+        "--frontier", nargs="?", const=os.path.join(".cache", f"frontier-{name}.sqlite"), default=None,
+        help="Durable SQLite frontier; a rerun resumes, skipping parsed pages and retrying failures",
+    )
+    ap.add_argument("--workers", type=int, default=1, help="Worker processes pulling from the --frontier queue")
+    ap.add_argument(
+        "--parse-workers", type=int, nargs="?", const=os.cpu_count() or 1, default=0,
+        help="Parse pages in a pool of N processes while fetching continues (no value: all cores; default: parse inline)",
+    )
+    ap.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+
+
+def crawler_options(args: argparse.Namespace) -> dict:
+    """Apply cache flags from add_crawl_args() and return Crawler keyword arguments."""
+    if not args.no_cache:
+        enable_http_cache(args.cache_path, max_age=args.cache_max_age)
+    # The per-host ceiling is split across worker processes
+    rate = args.rate / max(1, args.workers) if args.frontier else args.rate
+    return {
+        "rate_limit_sec": 1 / rate if rate > 0 else 0,
+        "concurrency": args.concurrency,
+        "parse_workers": args.parse_workers,
+        "extract_cache": None if args.reparse else ExtractCache(args.extract_cache_path),
+    }
+
+
+def open_frontier(args: argparse.Namespace) -> Optional[Frontier]:
+    if not args.frontier:
+        return None
+    frontier = Frontier(args.frontier)
+    if frontier.is_seeded():
+        retried = frontier.recover()
+        print(f"Resuming frontier {frontier.path}: {frontier.counts()} ({retried} failures to retry)")
+    if args.workers > 1 and not args.worker:
+        # Same command line plus --worker; workers wait for the coordinator to seed the queue
+        cmd = [sys.executable, sys.argv[0], *sys.argv[1:], "--worker"]
+        for _ in range(args.workers - 1):
+            subprocess.Popen(cmd)
+        print(f"Started {args.workers - 1} frontier worker processes.")
+    return frontier
+
+
+def frontier_entries(frontier: Optional[Frontier]) -> Optional[List[SitemapEntry]]:
+    """Entries of an unfinished frontier run, so a resume skips sitemap enumeration."""
+    if frontier is None or not frontier.is_seeded():
+        return None
+    return [SitemapEntry(url, lastmod) for url, lastmod in frontier.entries()]
+
+
+def run_frontier_worker(args: argparse.Namespace, extractors: Extractors, user_agent: str, options: dict, wait_sec: float = 600) -> None:
+    frontier = Frontier(args.frontier)
+    deadline = time.time() + wait_sec
+    while not frontier.is_seeded():
+        if time.time() > deadline:
+            print("Frontier was never seeded; exiting.")
+            return
+        time.sleep(2)
+    crawler = Crawler([], user_agent=user_agent, **options)
+    try:
+        asyncio.run(crawler.work_frontier(frontier, extractors, wait=False))
+    finally:
+        crawler.close()
+        frontier.close()
+    print(f"Worker {frontier.worker_id} done: {crawler.fetched} pages fetched.")
+
+
+class Crawler:
+    def __init__(
+        self,
+        analyzers: Sequence[Analyzer],
+        user_agent: str = USER_AGENT,
+        rate_limit_sec: float = RATE_LIMIT_SEC,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        parse_workers: int = 0,
+        extract_cache: Optional[ExtractCache] = None,
+    ):
+        self.analyzers = list(analyzers)
+        self.user_agent = user_agent
+        self.fetcher = AsyncFetcher(self._get, concurrency=concurrency, limiter=HostLimiter(1 / rate_limit_sec if rate_limit_sec > 0 else 0))
+        self.fetched = 0
+        self.parse_pool = ProcessPoolExecutor(parse_workers) if parse_workers > 0 else None
+        # Pages fetched but not yet parsed and absorbed; when full, fetching waits
+        self.parse_backlog = max(2, parse_workers * 2)
+        # Results of unchanged page bodies are reused instead of parsing again
+        self.extract_cache = extract_cache
+
+    def close(self) -> None:
+        self.fetcher.close()
+        if self.parse_pool is not None:
+            self.parse_pool.shutdown()
+        if self.extract_cache is not None:
+            print(self.extract_cache.stats.summary())
+            self.extract_cache.close()
+            self.extract_cache = None
+
+    def _get(self, url: str) -> Optional[Page]:
+        r = http_get(url, self.user_agent)
+        self.fetched += 1
+        if not r:
+            return None
+        return Page(url=url, html=r.text, content_type=r.headers.get("content-type", ""))
+
+    def fetch(self, url: str) -> Optional[Page]:
+        self.fetcher.limiter.bucket(url).wait()
+        return self._get(url)
+
+    async def extract_ordered(
+        self, urls: Sequence[str], extractors_for: Callable[[str], Extractors]
+    ) -> AsyncIterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """
+        Fetch `urls` and yield (url, {name: extract result}) in input order, or
+        (url, None) when the fetch failed. With a parse pool, pages are parsed in
+        other processes while fetching continues; once parse_backlog pages are
+        waiting the consumer stops pulling from map_ordered, which stops fetching.
+        """
+        backlog: Deque[Tuple[str, Any]] = deque()
+        async for url, page in self.fetcher.map_ordered(urls):
+            if page is None:
+                backlog.append((url, None))
+                continue
+            extractors = extractors_for(url)
+            cached: Dict[str, Any] = {}
+            digest = b""
+            if self.extract_cache is not None:
+                digest = body_digest(page.html, page.content_type)
+                cached = self.extract_cache.lookup(url, digest, extractors)
+            todo = {name: fn for name, fn in extractors.items() if name not in cached}
+            if not todo:
+                backlog.append((url, cached))
+            elif self.parse_pool is None:
+                results = run_extractors(page, todo)
+                self._remember(url, digest, todo, results)
+                backlog.append((url, {**cached, **results}))
+            else:
+                future = self.parse_pool.submit(_extract_in_worker, page.url, page.html, page.content_type, todo)
+                backlog.append((url, asyncio.ensure_future(self._pooled(url, digest, todo, cached, asyncio.wrap_future(future)))))
+            while backlog and (len(backlog) >= self.parse_backlog or not asyncio.isfuture(backlog[0][1]) or backlog[0][1].done()):
+                head_url, result = backlog.popleft()
+                yield head_url, (await result) if asyncio.isfuture(result) else result
+        while backlog:
+            head_url, result = backlog.popleft()
+            yield head_url, (await result) if asyncio.isfuture(result) else result
+
+    def _remember(self, url: str, digest: bytes, extractors: Extractors, results: Dict[str, Any]) -> None:
+        if self.extract_cache is not None:
+            self.extract_cache.store(url, digest, extractors, results)
+
+    async def _pooled(self, url: str, digest: bytes, extractors: Extractors, cached: Dict[str, Any], future: "asyncio.Future") -> Dict[str, Any]:
+        results = await future
+        self._remember(url, digest, extractors, results)
+        return {**cached, **results}
+
+    def _extractors_for(self, url: str) -> Extractors:
+        return {a.name: a.extract for a in self.analyzers if a.wants(url)}
+
+    async def _run(self, urls: Sequence[str], progress_every: int) -> None:
+        pending = [u for u in urls if any(a.wants(u) for a in self.analyzers)]
+        # Pages come back in sitemap order so analyzer outputs stay deterministic
+        i = 0
+        async for url, results in self.extract_ordered(pending, self._extractors_for):
+            i += 1
+            for a in self.analyzers:
+                if not a.wants(url):
+                    continue
+                if results is None:
+                    a.on_error(url)
+                else:
+                    a.absorb(url, results[a.name])
+            if i % progress_every == 0:
+                print(f"Processed {i}/{len(pending)} pages…", flush=True)
+
+    async def work_frontier(self, frontier: Frontier, extractors: Extractors, wait: bool = True, progress_every: int = 25) -> None:
+        """Claim, fetch and extract until the queue is empty; with wait=True also outlast other workers' leases."""
+        done = 0
+        while True:
+            batch = dict(frontier.claim(self.fetcher.concurrency * 2))
+            if not batch:
+                if not wait or frontier.outstanding() == 0:
+                    return
+                await asyncio.sleep(2)
+                continue
+            wanted = lambda url: {n: extractors[n] for n in batch[url] if n in extractors}
+            async for url, results in self.extract_ordered(list(batch), wanted):
+                if results is None:
+                    frontier.mark_failed(url)
+                    continue
+                frontier.mark_fetched(url)
+                frontier.mark_parsed(url, results)
+                done += 1
+                if done % progress_every == 0:
+                    print(f"Processed {done} pages ({frontier.outstanding()} left)…", flush=True)
+
+    def _absorb_frontier(self, frontier: Frontier) -> None:
+        for url, state, names, data in frontier.iter_results():
+            for a in self.analyzers:
+                if a.name not in names or not a.wants(url):
+                    continue
+                if state == PARSED and a.name in data:
+                    a.absorb(url, data[a.name])
+                else:
+                    a.on_error(url)
+
+    async def _followups(self) -> None:
+        for a in self.analyzers:
+            async for _, page in self.fetcher.map_ordered(list(a.followups())):
+                if page is not None:
+                    a.on_followup(page)
+
+    def run(
+        self,
+        urls: Sequence[str],
+        progress_every: int = 25,
+        frontier: Optional[Frontier] = None,
+        lastmods: Optional[Dict[str, Optional[str]]] = None,
+    ) -> List[str]:
+        try:
+            if frontier is None:
+                asyncio.run(self._run(urls, progress_every))
+            else:
+                if not frontier.is_seeded():
+                    lastmods = lastmods or {}
+                    frontier.seed([(u, lastmods.get(u), [a.name for a in self.analyzers if a.wants(u)]) for u in urls])
+                asyncio.run(self.work_frontier(frontier, {a.name: a.extract for a in self.analyzers}, wait=True, progress_every=progress_every))
+                self._absorb_frontier(frontier)
+            asyncio.run(self._followups())
+        finally:
+            self.close()
+        outputs: List[str] = []
+        for a in self.analyzers:
+            outputs.extend(a.finish())
+        if frontier is not None:
+            frontier.mark_complete()
+        return outputs
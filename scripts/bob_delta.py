@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Cross-run deltas of the image and heading audits.
+
+Each audit row is reduced to a key and a digest of its content:
+
+- images: key (page_url, canonical image URL, n-th occurrence on the page),
+  digest of image URL, filename, alt and suggestions (one by-page row)
+- headings: key page_url, digest of the page's (level, text) sequence; its
+  issues are compared as a multiset
+
+The old run is indexed once (key -> digest) and the new run streamed past it,
+so a diff is linear in the two inputs. Only differences come out:
+
+- images: added, removed, alt_changed, image_swapped (a new image at the
+  position on the page a removed one held), changed (same image, new
+  filename / version / suggestion)
+- headings: page_added, page_removed, fetch_failed, headings_changed,
+  issue_added (e.g. a new skipped level), issue_resolved
+
+scripts/audit_delta.py writes them to audits/*-delta-OLD-to-NEW.csv, and the
+apply scripts take --delta to act on the images a delta touches instead of
+the whole audit.
+
+    changes = diff_images(read_by_page_csv(old_csv), wh.iter_page_images(run_id))
+"""
+import csv
+import glob
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from bob_warehouse import DEFAULT_WAREHOUSE, Warehouse, canonical_image_url, open_run
+
+
+IMAGE_DELTA_COLUMNS = [
+    "change", "page_url", "image_url", "previous_image_url", "current_filename",
+    "current_alt", "previous_alt", "suggested_filename", "suggested_alt",
+]
+HEADING_DELTA_COLUMNS = ["change", "page_url", "issue_type", "message", "previous_sequence", "sequence"]
+
+ADDED, REMOVED, ALT_CHANGED, SWAPPED, CHANGED = "added", "removed", "alt_changed", "image_swapped", "changed"
+# image changes the apply scripts act on (there is nothing to apply for a removed image)
+ACTIONABLE = (ADDED, ALT_CHANGED, SWAPPED, CHANGED)
+
+IMAGES_DELTA_GLOB = "audits/brushonblock-images-delta-*.csv"
+
+
+def digest(*fields: str) -> bytes:
+    return hashlib.blake2b("\x1f".join(fields).encode("utf-8"), digest_size=16).digest()
+
+
+# --- images ---
+
+def keyed_image_rows(rows: Iterable[Sequence[str]]) -> Iterator[Tuple[tuple, int, bytes, Sequence[str]]]:
+    """(key, position on its page, digest, row) per by-page row (BY_PAGE_COLUMNS order)."""
+    seen: Counter = Counter()
+    positions: Counter = Counter()
+    for row in rows:
+        page_url, image_url, fname, s_name, alt, s_alt = row
+        slot = (page_url, canonical_image_url(image_url))
+        seen[slot] += 1
+        positions[page_url] += 1
+        yield (*slot, seen[slot]), positions[page_url], digest(image_url, fname, alt, s_name, s_alt), row
+
+
+def _image_change(change: str, new: Optional[Sequence[str]], old: Optional[Sequence[str]]) -> dict:
+    """image_url and the current/suggested fields come from the new run, previous_* from the old one."""
+    _, image_url, fname, s_name, alt, s_alt = new or ("",) * 6
+    return {
+        "change": change,
+        "page_url": (new or old)[0],
+        "image_url": image_url,
+        "previous_image_url": old[1] if old else "",
+        "current_filename": fname,
+        "current_alt": alt,
+        "previous_alt": old[4] if old else "",
+        "suggested_filename": s_name,
+        "suggested_alt": s_alt,
+    }
+
+
+def diff_images(old_rows: Iterable[Sequence[str]], new_rows: Iterable[Sequence[str]]) -> List[dict]:
+    """
+    Changes between two runs' by-page rows (IMAGE_DELTA_COLUMNS keys): the new
+    run's changes in its page order, then removals in the old run's order.
+    """
+    old: Dict[tuple, Tuple[int, bytes, Sequence[str]]] = {key: (pos, d, row) for key, pos, d, row in keyed_image_rows(old_rows)}
+    out: List[dict] = []
+    added: Dict[Tuple[str, int], dict] = {}  # (page_url, position) -> change
+    for key, pos, d, row in keyed_image_rows(new_rows):
+        prev = old.pop(key, None)
+        if prev is None:
+            change = _image_change(ADDED, row, None)
+            added[(key[0], pos)] = change
+            out.append(change)
+        elif prev[1] != d:
+            out.append(_image_change(ALT_CHANGED if prev[2][4] != row[4] else CHANGED, row, prev[2]))
+
+    # what is left of the old run was removed, unless the same position on the page now holds a new image
+    for pos, _, old_row in old.values():
+        swap = added.pop((old_row[0], pos), None)
+        if swap is not None:
+            swap.update(change=SWAPPED, previous_image_url=old_row[1], previous_alt=old_row[4])
+        else:
+            out.append(_image_change(REMOVED, None, old_row))
+    return out
+
+
+def read_by_page_csv(path: str) -> Iterator[List[str]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        yield from reader
+
+
+def image_source(spec: str, warehouse: str = DEFAULT_WAREHOUSE) -> Tuple[str, Iterable[Sequence[str]]]:
+    """(label, by-page rows) for a warehouse run id or a by-page CSV path."""
+    if spec.isdigit():
+        wh, run_id = open_run(int(spec), warehouse)
+        try:
+            return f"run{run_id}", list(wh.iter_page_images(run_id))
+        finally:
+            wh.close()
+    return source_label(spec), read_by_page_csv(spec)
+
+
+def latest_image_specs(warehouse: str = DEFAULT_WAREHOUSE) -> Optional[Tuple[str, str]]:
+    """The two newest finished warehouse runs, else the two newest by-page CSVs."""
+    if os.path.exists(warehouse):
+        wh = Warehouse(warehouse)
+        finished = [str(r["run_id"]) for r in wh.runs("images") if r["finished"]]
+        wh.close()
+        if len(finished) >= 2:
+            return finished[-2], finished[-1]
+    paths = sorted(glob.glob("audits/brushonblock-images-by-page-*.csv"))
+    return (paths[-2], paths[-1]) if len(paths) >= 2 else None
+
+
+def delta_image_urls(path: Optional[str] = None, changes: Sequence[str] = ACTIONABLE) -> Set[str]:
+    """Canonical URLs of the images an images delta CSV (default: the newest) added or changed."""
+    if not path:
+        paths = glob.glob(IMAGES_DELTA_GLOB)
+        if not paths:
+            raise SystemExit("No images delta CSV found. Run scripts/audit_delta.py images first.")
+        path = max(paths, key=os.path.getmtime)
+    with open(path, newline="", encoding="utf-8") as f:
+        return {canonical_image_url(r["image_url"]) for r in csv.DictReader(f) if r["change"] in changes}
+
+
+# --- headings ---
+
+def heading_digest(headings: List[dict]) -> bytes:
+    return digest(*(f"{h['level']}\x1e{h['text']}" for h in headings))
+
+
+def issue_key(issue: dict) -> tuple:
+    # the DOM path is left out: a template refactor moves it without changing the issue
+    return tuple(issue.get(k) for k in ("type", "prev_level", "curr_level", "prev_text", "curr_text", "count"))
+
+
+def _sequence(result: Optional[dict]) -> str:
+    return " ".join(f"H{level}" for level in result.get("sequence", [])) if result else ""
+
+
+def diff_headings(old_results: List[dict], new_results: List[dict]) -> List[dict]:
+    """Changes between two heading audits' results (HEADING_DELTA_COLUMNS keys), in the new audit's order."""
+    old = {r["url"]: (heading_digest(r["headings"]), r) for r in old_results if "error" not in r}
+    out: List[dict] = []
+
+    def emit(change: str, url: str, prev: Optional[dict], cur: Optional[dict], issue: Optional[dict] = None) -> None:
+        out.append({
+            "change": change,
+            "page_url": url,
+            "issue_type": issue["type"] if issue else "",
+            "message": issue["message"] if issue else "",
+            "previous_sequence": _sequence(prev),
+            "sequence": _sequence(cur),
+        })
+
+    seen = set()
+    for r in new_results:
+        url = r["url"]
+        seen.add(url)
+        prev = old.get(url)
+        if "error" in r:
+            if prev is not None:
+                emit("fetch_failed", url, prev[1], None)
+            continue
+        if prev is None:
+            emit("page_added", url, None, r)
+            for issue in r.get("issues", []):
+                emit("issue_added", url, None, r, issue)
+            continue
+        if prev[0] == heading_digest(r["headings"]):
+            continue  # same headings, same issues
+        emit("headings_changed", url, prev[1], r)
+        before = Counter(issue_key(i) for i in prev[1].get("issues", []))
+        after = Counter(issue_key(i) for i in r.get("issues", []))
+        for issue in r.get("issues", []):
+            k = issue_key(issue)
+            if before[k]:
+                before[k] -= 1
+            else:
+                emit("issue_added", url, prev[1], r, issue)
+        for issue in prev[1].get("issues", []):
+            k = issue_key(issue)
+            if after[k]:
+                after[k] -= 1
+            else:
+                emit("issue_resolved", url, prev[1], r, issue)
+    for url, (_, r) in old.items():
+        if url not in seen:
+            emit("page_removed", url, r, None)
+    return out
+
+
+def load_heading_results(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def latest_heading_reports() -> Optional[Tuple[str, str]]:
+    paths = sorted(p for p in glob.glob("audits/brushonblock-heading-order-*.json") if "-delta-" not in p)
+    return (paths[-2], paths[-1]) if len(paths) >= 2 else None
+
+
+# --- output ---
+
+def source_label(path: str) -> str:
+    """2025-10-22 for a dated audit file, else the file's stem."""
+    m = re.search(r"\d{4}-\d{2}-\d{2}", os.path.basename(path))
+    return m.group(0) if m else os.path.splitext(os.path.basename(path))[0]
+
+
+def write_delta_csv(path: str, columns: List[str], rows: List[dict]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=columns)
+        w.writeheader()
+        w.writerows(rows)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of per-page extraction results, keyed by body digest.
+
+For every (URL, analyzer) the crawler stores the digest of the page body it
+extracted from and the analyzer's JSON result. When the same URL comes back
+with a byte-identical body (a 304 from the HTTP cache, or an unchanged 200),
+the stored result is handed to the analyzer and the page is never parsed;
+only pages whose body changed cost CPU.
+
+Each result also records the version of the code that produced it: a hash of
+the source of the extractor's module and of bob_html (the parser). Editing
+either invalidates that analyzer's entries on the next run, so there is no
+version number to remember to bump.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+
+
+DEFAULT_EXTRACT_CACHE_PATH = os.path.join(".cache", "extract-cache.sqlite")
+COMMIT_EVERY = 50  # stores per transaction; a crash loses at most this many cached results
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS extracts (
+    url TEXT NOT NULL,
+    name TEXT NOT NULL,
+    body_digest BLOB NOT NULL,
+    version TEXT NOT NULL,
+    data TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (url, name)
+) WITHOUT ROWID
+"""
+
+_versions: Dict[Callable, str] = {}
+
+
+def body_digest(html: str, content_type: str = "") -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(content_type.encode("utf-8"))
+    h.update(b"\0")
+    h.update(html.encode("utf-8", errors="surrogatepass"))
+    return h.digest()
+
+
+def _module_source(module_name: str) -> bytes:
+    path = getattr(sys.modules.get(module_name), "__file__", None)
+    if not path:
+        return b""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def extractor_version(fn: Callable) -> str:
+    """Hash of the code behind `fn`: its module's source, bob_html's source and its name."""
+    version = _versions.get(fn)
+    if version is None:
+        h = hashlib.blake2b(digest_size=8)
+        for module_name in (getattr(fn, "__module__", ""), "bob_html"):
+            h.update(_module_source(module_name))
+        h.update(getattr(fn, "__qualname__", repr(fn)).encode("utf-8"))
+        version = _versions[fn] = h.hexdigest()
+    return version
+
+
+@dataclass
+class ExtractCacheStats:
+    pages: int = 0
+    pages_reused: int = 0  # every wanted result came from the cache: not parsed at all
+    hits: int = 0
+    misses: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"Extract cache: {self.pages_reused} of {self.pages} pages unchanged and not parsed; "
+            f"{self.hits} analyzer results reused, {self.misses} extracted"
+        )
+
+
+class ExtractCache:
+    def __init__(self, path: str = DEFAULT_EXTRACT_CACHE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.stats = ExtractCacheStats()
+        self._lock = threading.Lock()
+        self._pending = 0
+        # frontier worker processes share the file; wait for each other's writes
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(SCHEMA)
+        self._db.commit()
+
+    def lookup(self, url: str, digest: bytes, extractors: Dict[str, Callable]) -> Dict[str, Any]:
+        """Cached results for the extractors whose entry matches this body and code version."""
+        with self._lock:
+            rows = self._db.execute("SELECT name, body_digest, version, data FROM extracts WHERE url = ?", (url,)).fetchall()
+        found = {}
+        for name, stored_digest, version, data in rows:
+            fn = extractors.get(name)
+            if fn is not None and stored_digest == digest and version == extractor_version(fn):
+                found[name] = json.loads(data)
+        with self._lock:
+            self.stats.pages += 1
+            self.stats.hits += len(found)
+            self.stats.misses += len(extractors) - len(found)
+            if len(found) == len(extractors):
+                self.stats.pages_reused += 1
+        return found
+
+    def store(self, url: str, digest: bytes, extractors: Dict[str, Callable], results: Dict[str, Any]) -> None:
+        rows = []
+        for name, data in results.items():
+            try:
+                encoded = json.dumps(data, ensure_ascii=False)
+            except (TypeError, ValueError):
+                continue  # not JSON-shaped; extracted again next time
+            rows.append((url, name, digest, extractor_version(extractors[name]), encoded, time.time()))
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO extracts VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._pending += 1
+            if self._pending >= COMMIT_EVERY:
+                self._db.commit()
+                self._pending = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.commit()
+            self._db.close()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Durable crawl frontier (SQLite).
+
+Each URL moves pending -> fetched -> parsed, or -> failed. Per-analyzer page
+results are stored next to it, so a restarted run skips parsed pages, retries
+only failures, and rebuilds the analyzers' state from disk. Claims are leased
+inside an IMMEDIATE transaction, so several worker processes can pull from the
+same file; a lease left behind by a dead worker expires and is reclaimed.
+"""
+import json
+import os
+import socket
+import sqlite3
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+PENDING = "pending"
+FETCHED = "fetched"
+FAILED = "failed"
+PARSED = "parsed"
+SKIPPED = "skipped"  # in the sitemap but no analyzer wants it
+
+DEFAULT_LEASE_SEC = 300
+DEFAULT_MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    lastmod TEXT,
+    analyzers TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    leased_at REAL,
+    error TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS urls_state_seq ON urls (state, seq);
+CREATE TABLE IF NOT EXISTS results (
+    url TEXT NOT NULL,
+    analyzer TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (url, analyzer)
+) WITHOUT ROWID;
+"""
+
+
+class Frontier:
+    def __init__(self, path: str, lease_sec: float = DEFAULT_LEASE_SEC, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lease_sec = lease_sec
+        self.max_attempts = max_attempts
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA busy_timeout=30000")
+        self.db.executescript(SCHEMA)
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def is_seeded(self) -> bool:
+        return self._meta("seeded") == "1" and self._meta("complete") != "1"
+
+    def seed(self, entries: Sequence[Tuple[str, Optional[str], Sequence[str]]]) -> None:
+        """entries: (url, lastmod, analyzer names that want it), in crawl order. Starts a fresh run."""
+        now = time.time()
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.execute("DELETE FROM urls")
+            self.db.execute("DELETE FROM results")
+            self.db.execute("DELETE FROM meta")
+            self.db.executemany(
+                "INSERT OR IGNORE INTO urls (url, seq, lastmod, analyzers, state, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (url, seq, lastmod, ",".join(names), PENDING if names else SKIPPED, now)
+                    for seq, (url, lastmod, names) in enumerate(entries)
+                ),
+            )
+            self._set_meta("seeded", "1")
+            self._set_meta("seeded_at", str(now))
+            self.db.execute("COMMIT")
+        except Exception:
+            self.db.execute("ROLLBACK")
+            raise
+
+    def recover(self) -> int:
+        """
+        On restart, before any worker starts: drop leases held by the dead run and
+        give failed URLs a fresh set of attempts. Returns the number of failures reset.
+        """
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.execute("UPDATE urls SET worker = NULL, leased_at = NULL WHERE state != ?", (PARSED,))
+            cur = self.db.execute("UPDATE urls SET state = ?, attempts = 0 WHERE state = ?", (PENDING, FAILED))
+            self.db.execute("COMMIT")
+        except Exception:
+            self.db.execute("ROLLBACK")
+            raise
+        return cur.rowcount
+
+    def entries(self) -> List[Tuple[str, Optional[str]]]:
+        return list(self.db.execute("SELECT url, lastmod FROM urls ORDER BY seq"))
+
+    def claim(self, n: int) -> List[Tuple[str, List[str]]]:
+        """Lease up to n URLs that still need fetching; returns (url, analyzer names)."""
+        now = time.time()
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.db.execute(
+                """
+                SELECT url, analyzers FROM urls
+                WHERE (state IN (?, ?) OR (state = ? AND attempts < ?))
+                  AND (leased_at IS NULL OR leased_at < ?)
+                ORDER BY seq LIMIT ?
+                """,
+                (PENDING, FETCHED, FAILED, self.max_attempts, now - self.lease_sec, n),
+            ).fetchall()
+            self.db.executemany(
+                "UPDATE urls SET worker = ?, leased_at = ? WHERE url = ?",
+                ((self.worker_id, now, url) for url, _ in rows),
+            )
+            self.db.execute("COMMIT")
+        except Exception:
+            self.db.execute("ROLLBACK")
+            raise
+        return [(url, names.split(",") if names else []) for url, names in rows]
+
+    def mark_fetched(self, url: str) -> None:
+        self.db.execute("UPDATE urls SET state = ?, updated_at = ? WHERE url = ?", (FETCHED, time.time(), url))
+
+    def mark_parsed(self, url: str, results: Dict[str, Any]) -> None:
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                ((url, name, json.dumps(data, ensure_ascii=False)) for name, data in results.items()),
+            )
+            self.db.execute(
+                "UPDATE urls SET state = ?, worker = NULL, leased_at = NULL, error = NULL, updated_at = ? WHERE url = ?",
+                (PARSED, time.time(), url),
+            )
+            self.db.execute("COMMIT")
+        except Exception:
+            self.db.execute("ROLLBACK")
+            raise
+
+    def mark_failed(self, url: str, error: str = "fetch_failed") -> None:
+        self.db.execute(
+            "UPDATE urls SET state = ?, attempts = attempts + 1, worker = NULL, leased_at = NULL, error = ?, updated_at = ? WHERE url = ?",
+            (FAILED, error, time.time(), url),
+        )
+
+    def outstanding(self) -> int:
+        """URLs not yet parsed and not permanently failed (includes ones leased by other workers)."""
+        return self.db.execute(
+            "SELECT COUNT(*) FROM urls WHERE state IN (?, ?) OR (state = ? AND attempts < ?)",
+            (PENDING, FETCHED, FAILED, self.max_attempts),
+        ).fetchone()[0]
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self.db.execute("SELECT state, COUNT(*) FROM urls GROUP BY state"))
+
+    def iter_results(self) -> Iterator[Tuple[str, str, List[str], Dict[str, Any]]]:
+        """(url, state, analyzer names, {analyzer: data}) in crawl order."""
+        for url, state, names in self.db.execute("SELECT url, state, analyzers FROM urls WHERE state != ? ORDER BY seq", (SKIPPED,)).fetchall():
+            data = {a: json.loads(d) for a, d in self.db.execute("SELECT analyzer, data FROM results WHERE url = ?", (url,))}
+            yield url, state, names.split(",") if names else [], data
+
+    def mark_complete(self) -> None:
+        self._set_meta("complete", "1")
+
+    def close(self) -> None:
+        self.db.close()
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Single-pass HTML extraction for the storefront audits.
+
+One HTMLParser tokenizes a page and dispatches start/end/data events to the
+registered extractors (images, links, headings, title/og:title, JSON-LD),
+which fill a single PageDoc. Analyzers read the PageDoc instead of re-parsing.
+
+rewrite_img_alts() uses the same tokenizer to edit <img> alt attributes in
+body_html in one pass, leaving every other byte untouched.
+"""
+import html
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from io import StringIO
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+
+HEADING_TAGS = {f"h{i}": i for i in range(1, 7)}
+
+
+@dataclass
+class Heading:
+    level: int
+    text: str
+    path: str
+    attrs: Dict[str, str]
+
+
+@dataclass(slots=True)
+class PageDoc:
+    images: List[Tuple[str, str]] = field(default_factory=list)  # (src, alt)
+    links: List[str] = field(default_factory=list)
+    headings: List[Heading] = field(default_factory=list)
+    title: str = ""
+    og_title: str = ""
+    json_ld: List[str] = field(default_factory=list)
+    parse_error: bool = False
+
+    @property
+    def page_title(self) -> str:
+        # Prefer og:title -> <title>
+        return self.og_title or self.title
+
+
+class Extractor:
+    """
+    Receives parser events for `tags` (None = every tag). Set `capturing` to
+    True to also receive text data until you set it back to False.
+    """
+
+    tags: Optional[FrozenSet[str]] = None
+    capturing = False
+
+    def start(self, tag: str, attrs: List[Tuple[str, Optional[str]]], doc: PageDoc) -> None:
+        pass
+
+    def end(self, tag: str, doc: PageDoc) -> None:
+        pass
+
+    def data(self, text: str, doc: PageDoc) -> None:
+        pass
+
+    def done(self, doc: PageDoc) -> None:
+        pass
+
+
+class ImageExtractor(Extractor):
+    tags = frozenset({"img"})
+
+    def start(self, tag, attrs, doc):
+        d = dict(attrs)
+        src = d.get("src") or d.get("data-src") or d.get("data-srcset") or ""
+        # If srcset provided and src empty, take first URL
+        if (not src) and "srcset" in d:
+            srcset = d.get("srcset", "")
+            if srcset:
+                src = srcset.split(",")[0].strip().split(" ")[0]
+        alt = d.get("alt", "") or ""
+        if src:
+            doc.images.append((src, alt))
+
+
+class LinkExtractor(Extractor):
+    tags = frozenset({"a"})
+
+    def start(self, tag, attrs, doc):
+        for k, v in attrs:
+            if k == "href":
+                if v:
+                    doc.links.append(v)
+                return
+
+
+class TitleExtractor(Extractor):
+    tags = frozenset({"title", "meta"})
+
+    def __init__(self):
+        self._buf = StringIO()
+        self._closed = False  # only the first <title>: inline SVG icons carry their own
+
+    def start(self, tag, attrs, doc):
+        if tag == "title":
+            self.capturing = not self._closed
+        elif not doc.og_title:
+            d = dict(attrs)
+            if (d.get("property") or "").lower() == "og:title" and d.get("content"):
+                doc.og_title = d["content"].strip()
+
+    def end(self, tag, doc):
+        if tag == "title" and self.capturing:
+            self.capturing = False
+            self._closed = True
+
+    def data(self, text, doc):
+        self._buf.write(text)
+
+    def done(self, doc):
+        doc.title = re.sub(r"\s+", " ", self._buf.getvalue()).strip()
+
+
+class HeadingExtractor(Extractor):
+    """Same stack/path bookkeeping the heading audit has always used."""
+
+    tags = None
+
+    def __init__(self):
+        self.stack: List[str] = []
+        self._in_heading: Optional[Tuple[str, int, Dict[str, str], StringIO]] = None
+
+    def start(self, tag, attrs, doc):
+        self.stack.append(tag)
+        if tag in HEADING_TAGS and self._in_heading is None:
+            self._in_heading = (tag, HEADING_TAGS[tag], {k.lower(): v for k, v in attrs}, StringIO())
+            self.capturing = True
+
+    def end(self, tag, doc):
+        if self._in_heading and tag == self._in_heading[0]:
+            tag_name, level, attrs_dict, buf = self._in_heading
+            # build a simple path snapshot (last few ancestors)
+            ancestry = [x for x in self.stack if x != tag_name]
+            path = ">".join(ancestry[-6:] + [tag_name])
+            text = re.sub(r"\s+", " ", buf.getvalue()).strip()
+            doc.headings.append(Heading(level=level, text=text, path=path, attrs=attrs_dict))
+            self._in_heading = None
+            self.capturing = False
+        if self.stack:
+            # pop until matching tag (be defensive)
+            try:
+                idx = len(self.stack) - 1 - self.stack[::-1].index(tag)
+                del self.stack[idx:]
+            except ValueError:
+                # tag not found; reset stack when malformed
+                self.stack = []
+
+    def data(self, text, doc):
+        self._in_heading[3].write(text)
+
+
+class JsonLdExtractor(Extractor):
+    tags = frozenset({"script"})
+
+    def __init__(self):
+        self._buf: Optional[StringIO] = None
+
+    def start(self, tag, attrs, doc):
+        if (dict(attrs).get("type") or "").lower() == "application/ld+json":
+            self._buf = StringIO()
+            self.capturing = True
+
+    def end(self, tag, doc):
+        if self._buf is not None:
+            doc.json_ld.append(self._buf.getvalue().strip())
+            self._buf = None
+            self.capturing = False
+
+    def data(self, text, doc):
+        self._buf.write(text)
+
+
+EXTRACTORS = {
+    "images": ImageExtractor,
+    "links": LinkExtractor,
+    "title": TitleExtractor,
+    "headings": HeadingExtractor,
+    "json_ld": JsonLdExtractor,
+}
+
+
+class PageParser(HTMLParser):
+    def __init__(self, extractors: Sequence[Extractor]):
+        super().__init__()
+        self.doc = PageDoc()
+        self.extractors = list(extractors)
+        self._all = [e for e in self.extractors if e.tags is None]
+        self._by_tag: Dict[str, List[Extractor]] = {}
+        for e in self.extractors:
+            for t in e.tags or ():
+                self._by_tag.setdefault(t, []).append(e)
+
+    def _targets(self, tag: str) -> List[Extractor]:
+        specific = self._by_tag.get(tag)
+        if specific is None:
+            return self._all
+        return self._all + specific if self._all else specific
+
+    def handle_starttag(self, tag, attrs):
+        for e in self._targets(tag):
+            e.start(tag, attrs, self.doc)
+
+    def handle_endtag(self, tag):
+        for e in self._targets(tag):
+            e.end(tag, self.doc)
+
+    def handle_data(self, data):
+        for e in self.extractors:
+            if e.capturing:
+                e.data(data, self.doc)
+
+
+def parse_page(html: str, only: Optional[Sequence[str]] = None) -> PageDoc:
+    """Tokenize `html` once and run the named extractors (default: all of EXTRACTORS)."""
+    names = only if only is not None else list(EXTRACTORS)
+    parser = PageParser([EXTRACTORS[n]() for n in names])
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        parser.doc.parse_error = True
+    for e in parser.extractors:
+        e.done(parser.doc)
+    return parser.doc
+
+
+# --- img alt rewriting ---
+
+# html.parser's own tag-name and attribute scanners, used to find the byte spans of attributes
+_TAG_NAME = re.compile(r"<[a-zA-Z][^\t\n\r\f />\x00]*(?:\s|/(?!>))*")
+_ATTR = re.compile(
+    r"((?<=['\"\s/])[^\s/>][^\s/=>]*)(\s*=+\s*"
+    r"('[^']*'|\"[^\"]*\"|(?!['\"])[^>\s]*))?(?:\s|/(?!>))*"
+)
+
+
+def _attr_spans(tag_text: str) -> Dict[str, Tuple[int, int, str]]:
+    """{attribute name: (start, end, quote char or "") of its value, quotes excluded} within a raw start tag; first one wins."""
+    spans: Dict[str, Tuple[int, int, str]] = {}
+    m = _TAG_NAME.match(tag_text)
+    k = m.end() if m else len(tag_text)
+    while k < len(tag_text):
+        a = _ATTR.match(tag_text, k)
+        if not a:
+            break
+        name = a.group(1).lower()
+        if name not in spans:
+            if a.group(3) is None:
+                spans[name] = (a.end(1), a.end(1), "")
+            else:
+                start, end = a.span(3)
+                quote = tag_text[start] if tag_text[start:start + 1] in ("'", '"') else ""
+                spans[name] = (start + 1, end - 1, quote) if quote else (start, end, "")
+        k = a.end()
+    return spans
+
+
+class _ImgTagFinder(HTMLParser):
+    """Collects (offset, raw start tag) for every <img>, outside comments/script/style, as HTMLParser sees them."""
+
+    def __init__(self, text: str):
+        super().__init__(convert_charrefs=False)
+        self.line_starts = [0] + [m.end() for m in re.finditer("\n", text)]
+        self.tags: List[Tuple[int, str]] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "img":
+            line, col = self.getpos()
+            self.tags.append((self.line_starts[line - 1] + col, self.get_starttag_text() or ""))
+
+
+def rewrite_img_alts(
+    text: str,
+    alts: Dict[str, str],
+    add_only: bool = False,
+    key: Callable[[str], str] = lambda src: src.split("?", 1)[0],
+) -> str:
+    """
+    Set alt on every <img> whose key(src) is in `alts`, in one pass over `text`.
+    add_only keeps an existing alt attribute (even an empty one); a missing alt
+    is inserted right after src. Only the alt value (or the inserted attribute)
+    changes; the rest of the markup is returned byte for byte.
+    """
+    if not alts or "<img" not in text.lower():
+        return text
+    finder = _ImgTagFinder(text)
+    try:
+        finder.feed(text)
+        finder.close()
+    except Exception:
+        return text
+    edits: List[Tuple[int, int, str]] = []
+    for offset, tag_text in finder.tags:
+        if not tag_text or text[offset:offset + len(tag_text)] != tag_text:
+            continue  # position did not line up with the source; leave the tag alone
+        spans = _attr_spans(tag_text)
+        if "src" not in spans:
+            continue
+        src_start, src_end, src_quote = spans["src"]
+        src = html.unescape(tag_text[src_start:src_end]).strip()
+        if src.startswith("//"):
+            src = "https:" + src
+        alt = alts.get(key(src))
+        if alt is None:
+            continue
+        value = html.escape(alt, quote=True)
+        if "alt" in spans:
+            if add_only:
+                continue
+            start, end, quote = spans["alt"]
+            if not quote:
+                # a bare `alt` or alt=unquoted: write a quoted value in its place
+                value = f'="{value}"' if start == end and tag_text[start - 1:start] != "=" else f'"{value}"'
+            edits.append((offset + start, offset + end, value))
+        else:
+            end = src_end + len(src_quote)
+            edits.append((offset + end, offset + end, f' alt="{value}"'))
+    if not edits:
+        return text
+    out: List[str] = []
+    pos = 0
+    for start, end, replacement in edits:
+        out.append(text[pos:start])
+        out.append(replacement)
+        pos = end
+    out.append(text[pos:])
+    return "".join(out)
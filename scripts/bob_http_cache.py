@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Persistent HTTP cache for storefront crawls.
+
+Bodies are stored zlib-compressed in SQLite, keyed by URL, together with their
+ETag / Last-Modified validators. Every lookup revalidates with
+If-None-Match / If-Modified-Since so unchanged pages come back as 304s; with
+max_age > 0 entries younger than that are served without touching the network.
+"""
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from bob_client import client
+
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "http-cache.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    content_type TEXT,
+    encoding TEXT,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    fetch_ms INTEGER NOT NULL,
+    stored_at REAL NOT NULL
+)
+"""
+
+
+class CachedResponse:
+    """Just enough of requests.Response for the crawlers (status_code, headers, text, content)."""
+
+    def __init__(self, url: str, status_code: int, headers: Dict[str, str], content: bytes, encoding: Optional[str]):
+        self.url = url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.encoding = encoding or "utf-8"
+        self.from_cache = True
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+    bytes_saved: int = 0
+    ms_saved: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"HTTP cache: {self.hits} hits, {self.revalidated} revalidated (304), {self.misses} misses; "
+            f"{self.bytes_saved / 1_000_000:.1f} MB and ~{self.ms_saved / 1000:.1f} s saved"
+        )
+
+
+class HttpCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_age: float = 0):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_age = max_age
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(SCHEMA)
+        self._db.commit()
+
+    def _count(self, **deltas: int) -> None:
+        # get() runs on the fetcher's pool threads
+        with self._lock:
+            for field, n in deltas.items():
+                setattr(self.stats, field, getattr(self.stats, field) + n)
+
+    def _load(self, url: str):
+        with self._lock:
+            return self._db.execute(
+                "SELECT status, etag, last_modified, content_type, encoding, body, size, fetch_ms, stored_at FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+
+    def _store(self, url: str, r: requests.Response, fetch_ms: int) -> None:
+        body = zlib.compress(r.content, 6)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    r.status_code,
+                    r.headers.get("ETag"),
+                    r.headers.get("Last-Modified"),
+                    r.headers.get("Content-Type", ""),
+                    r.encoding,
+                    body,
+                    len(r.content),
+                    fetch_ms,
+                    time.time(),
+                ),
+            )
+            self._db.commit()
+
+    def _touch(self, url: str) -> None:
+        with self._lock:
+            self._db.execute("UPDATE responses SET stored_at = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+
+    def _from_row(self, url: str, row) -> CachedResponse:
+        status, _etag, _lm, content_type, encoding, body, _size, _ms, _at = row
+        return CachedResponse(url, status, {"Content-Type": content_type or ""}, zlib.decompress(body), encoding)
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 20, session=None):
+        """GET with revalidation. Returns a requests.Response, a CachedResponse, or raises like client.get."""
+        row = self._load(url)
+        if row is not None and self.max_age > 0 and time.time() - row[8] < self.max_age:
+            self._count(hits=1, bytes_saved=row[6], ms_saved=row[7])
+            return self._from_row(url, row)
+
+        req_headers = dict(headers or {})
+        if row is not None:
+            if row[1]:
+                req_headers["If-None-Match"] = row[1]
+            if row[2]:
+                req_headers["If-Modified-Since"] = row[2]
+
+        getter = session.get if session is not None else client.get
+        start = time.monotonic()
+        r = getter(url, headers=req_headers, timeout=timeout)
+        elapsed_ms = int((time.monotonic() - start) * 1000)
+
+        if r.status_code == 304 and row is not None:
+            self._count(revalidated=1, bytes_saved=row[6], ms_saved=max(0, row[7] - elapsed_ms))
+            self._touch(url)
+            return self._from_row(url, row)
+
+        if r.status_code == 200 and (r.headers.get("ETag") or r.headers.get("Last-Modified") or self.max_age > 0):
+            self._store(url, r, elapsed_ms)
+        self._count(misses=1)
+        return r
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Image metadata without downloading images.
+
+A HEAD gives the byte size, content type, validators and cache headers; a
+small Range read of the first bytes is enough for the pixel dimensions:
+
+- JPEG: the SOF segment (after any EXIF/ICC segments; read on in steps when
+  they are large)
+- PNG: IHDR, GIF: the logical screen descriptor
+- WebP: the VP8 / VP8L / VP8X chunk header
+- AVIF/HEIF: the ispe property in meta/iprp/ipco
+- SVG: width/height attributes, else the viewBox
+
+Results go to a persistent index keyed by (URL, ETag). A rerun sends a
+conditional HEAD per image; a 304, or an ETag already in the index, reuses
+the entry, so an unchanged image is never Range-read twice. Servers that send
+no ETag are keyed by Last-Modified and Content-Length instead ("lm:...").
+
+    index = ImageIndex()
+    entry = probe_image(url, index)
+    print(entry.format, entry.width, entry.height, entry.bytes)
+"""
+import os
+import re
+import sqlite3
+import struct
+import threading
+import time
+from dataclasses import dataclass, fields
+from typing import Dict, Optional, Tuple
+
+from bob_client import client
+
+
+DEFAULT_IMAGE_INDEX_PATH = os.path.join(".cache", "image-index.sqlite")
+TIMEOUT = 20
+# what a current browser sends; Shopify's CDN picks WebP/AVIF from it, so the probe sees what visitors get
+ACCEPT = "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8"
+HEADER_BYTES = 4096  # first Range read; enough for everything but JPEGs with big EXIF/ICC segments
+MAX_HEADER_BYTES = 256 * 1024  # give up on dimensions past this
+COMMIT_EVERY = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    url TEXT NOT NULL,
+    etag TEXT NOT NULL,
+    bytes INTEGER,
+    format TEXT,
+    width INTEGER,
+    height INTEGER,
+    content_type TEXT,
+    cache_control TEXT,
+    expires TEXT,
+    last_modified TEXT,
+    header_bytes INTEGER NOT NULL,
+    probed_at REAL NOT NULL,
+    checked_at REAL NOT NULL,
+    PRIMARY KEY (url, etag)
+) WITHOUT ROWID
+"""
+
+
+class NeedMore(Exception):
+    """The header continues past the bytes read so far; read up to `offset`."""
+
+    def __init__(self, offset: int):
+        super().__init__(offset)
+        self.offset = offset
+
+
+# --- header parsers: bytes -> (format, width, height) ---
+
+def _jpeg(data: bytes) -> Tuple[str, Optional[int], Optional[int]]:
+    i = 2
+    while True:
+        if i + 4 > len(data):
+            raise NeedMore(i + 4)
+        if data[i] != 0xFF:
+            return "jpeg", None, None  # lost sync: corrupt or not a JPEG after all
+        marker = data[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:  # no length field
+            i += 2
+            continue
+        if marker in (0xD9, 0xDA):  # end of image / start of scan before any frame header
+            return "jpeg", None, None
+        (length,) = struct.unpack(">H", data[i + 2:i + 4])
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            if i + 9 > len(data):
+                raise NeedMore(i + 9)
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return "jpeg", width, height
+        i += 2 + length
+
+
+def _png(data: bytes) -> Tuple[str, Optional[int], Optional[int]]:
+    if len(data) < 24:
+        raise NeedMore(24)
+    width, height = struct.unpack(">II", data[16:24])
+    return "png", width, height
+
+
+def _gif(data: bytes) -> Tuple[str, Optional[int], Optional[int]]:
+    if len(data) < 10:
+        raise NeedMore(10)
+    width, height = struct.unpack("<HH", data[6:10])
+    return "gif", width, height
+
+
+def _webp(data: bytes) -> Tuple[str, Optional[int], Optional[int]]:
+    if len(data) < 30:
+        raise NeedMore(30)
+    chunk = data[12:16]
+    if chunk == b"VP8 ":  # lossy: frame tag, start code, 14-bit sizes
+        width, height = struct.unpack("<HH", data[26:30])
+        return "webp", width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":  # lossless: 14-bit (size - 1) fields after the 0x2f signature
+        bits = int.from_bytes(data[21:25], "little")
+        return "webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":  # extended: 24-bit (canvas size - 1) fields
+        return "webp", int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+    return "webp", None, None
+
+
+_BMFF_CONTAINERS = {b"meta": 4, b"iprp": 0, b"ipco": 0}  # box type -> bytes to skip (meta is a full box)
+
+
+def _bmff_sizes(data: bytes, start: int, end: int, sizes: list) -> bool:
+    """Collect every ispe (width, height) under meta/iprp/ipco between start and end; True once at mdat."""
+    i = start
+    while i + 8 <= end:
+        size, kind = struct.unpack(">I4s", data[i:i + 8])
+        header = 8
+        if size == 1:
+            if i + 16 > len(data):
+                raise NeedMore(i + 16)
+            size, header = struct.unpack(">Q", data[i + 8:i + 16])[0], 16
+        elif size == 0:
+            size = end - i
+        if size < header:
+            return True  # corrupt; stop looking
+        if kind in _BMFF_CONTAINERS:
+            if i + size > len(data):
+                raise NeedMore(i + size)
+            _bmff_sizes(data, i + header + _BMFF_CONTAINERS[kind], i + size, sizes)
+        elif kind == b"ispe":
+            if i + 20 > len(data):
+                raise NeedMore(i + 20)
+            sizes.append(struct.unpack(">II", data[i + 12:i + 20]))
+        elif kind == b"mdat":
+            return True  # image data; the metadata comes before it
+        i += size
+    return False
+
+
+def _heif(data: bytes) -> Tuple[str, Optional[int], Optional[int]]:
+    fmt = "avif" if data[8:12] in (b"avif", b"avis") else "heif"
+    sizes: list = []
+    if not _bmff_sizes(data, 0, len(data), sizes) and not sizes:
+        raise NeedMore(len(data) + 8)
+    if not sizes:
+        return fmt, None, None
+    # thumbnails and alpha planes have their own ispe; the primary image is the largest
+    width, height = max(sizes, key=lambda wh: wh[0] * wh[1])
+    return fmt, width, height
+
+
+_SVG_TAG = re.compile(rb"<svg\b[^>]*>", re.I | re.S)
+_SVG_ATTR = re.compile(rb"""(?<![\w:-])(width|height|viewBox)\s*=\s*["']([^"']*)["']""", re.I)
+_SVG_LENGTH = re.compile(rb"^\s*([0-9]*\.?[0-9]+)\s*(px)?\s*$")
+
+
+def _svg(data: bytes) -> Tuple[str, Optional[int], Optional[int]]:
+    m = _SVG_TAG.search(data)
+    if m is None:
+        raise NeedMore(len(data) * 2)
+    attrs = {k.lower(): v for k, v in _SVG_ATTR.findall(m.group(0))}
+    size = []
+    for name in (b"width", b"height"):
+        length = _SVG_LENGTH.match(attrs.get(name, b""))
+        size.append(round(float(length.group(1))) if length else None)
+    if None in size and b"viewbox" in attrs:
+        box = attrs[b"viewbox"].replace(b",", b" ").split()
+        if len(box) == 4:
+            try:
+                size = [round(float(box[2])), round(float(box[3]))]
+            except ValueError:
+                pass
+    return "svg", size[0], size[1]
+
+
+def sniff(data: bytes) -> Tuple[Optional[str], Optional[int], Optional[int]]:
+    """(format, width, height) from the first bytes of an image; raises NeedMore if they are not enough."""
+    if data[:3] == b"\xff\xd8\xff":
+        return _jpeg(data)
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return _png(data)
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return _gif(data)
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return _webp(data)
+    if data[4:8] == b"ftyp":
+        return _heif(data)
+    head = data[:1024].lstrip()
+    if head.startswith(b"<?xml") or head.startswith(b"<svg") or head.startswith(b"<!--") or b"<svg" in head:
+        return _svg(data)
+    if len(data) < 12:
+        raise NeedMore(12)
+    return None, None, None
+
+
+# --- index ---
+
+@dataclass
+class ImageEntry:
+    url: str
+    etag: str
+    bytes: Optional[int]
+    format: Optional[str]
+    width: Optional[int]
+    height: Optional[int]
+    content_type: str
+    cache_control: str
+    expires: str
+    last_modified: str
+    header_bytes: int  # how much of the file the Range reads took
+    probed_at: float
+    checked_at: float
+
+
+COLUMNS = [f.name for f in fields(ImageEntry)]
+
+
+@dataclass
+class ProbeStats:
+    unchanged: int = 0  # conditional HEAD came back 304, or with an ETag already indexed
+    probed: int = 0
+    failed: int = 0
+    header_bytes: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"Image index: {self.unchanged} unchanged, {self.probed} probed "
+            f"({self.header_bytes / 1000:.0f} KB of headers read), {self.failed} failed"
+        )
+
+
+class ImageIndex:
+    def __init__(self, path: str = DEFAULT_IMAGE_INDEX_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.stats = ProbeStats()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(SCHEMA)
+        self._db.commit()
+
+    def latest(self, url: str) -> Optional[ImageEntry]:
+        """The most recently seen version of `url`."""
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM images WHERE url = ? ORDER BY checked_at DESC LIMIT 1", (url,)
+            ).fetchone()
+        return ImageEntry(*row) if row else None
+
+    def get(self, url: str, etag: str) -> Optional[ImageEntry]:
+        with self._lock:
+            row = self._db.execute(f"SELECT {', '.join(COLUMNS)} FROM images WHERE url = ? AND etag = ?", (url, etag)).fetchone()
+        return ImageEntry(*row) if row else None
+
+    def touch(self, entry: ImageEntry) -> None:
+        entry.checked_at = time.time()
+        with self._lock:
+            self._db.execute("UPDATE images SET checked_at = ? WHERE url = ? AND etag = ?", (entry.checked_at, entry.url, entry.etag))
+            self._commit_later()
+
+    def put(self, entry: ImageEntry) -> None:
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO images VALUES ({', '.join('?' * len(COLUMNS))})",
+                tuple(getattr(entry, c) for c in COLUMNS),
+            )
+            self._commit_later()
+
+    def count(self, **deltas: int) -> None:
+        """Add to self.stats; probes run on the fetcher's pool threads."""
+        with self._lock:
+            for field, n in deltas.items():
+                setattr(self.stats, field, getattr(self.stats, field) + n)
+
+    def _commit_later(self) -> None:
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY:
+            self._db.commit()
+            self._pending = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+
+# --- probing ---
+
+def validator(headers) -> str:
+    """The index key for a response: its ETag, else Last-Modified + Content-Length, else ''."""
+    etag = headers.get("ETag")
+    if etag:
+        return etag
+    if headers.get("Last-Modified"):
+        return f"lm:{headers['Last-Modified']}:{headers.get('Content-Length', '')}"
+    return ""
+
+
+def read_range(url: str, start: int, end: int, headers: Dict[str, str]) -> Tuple[bytes, Optional[int]]:
+    """Bytes start..end (inclusive) of `url`, and the total size when the server says so."""
+    h = dict(headers, Range=f"bytes={start}-{end}")
+    with client.get(url, headers=h, timeout=TIMEOUT, stream=True) as r:
+        if r.status_code == 206:
+            m = re.search(r"/(\d+)\s*$", r.headers.get("Content-Range", ""))
+            return r.raw.read(end - start + 1, decode_content=True), int(m.group(1)) if m else None
+        if r.status_code == 200:
+            # Range ignored: read only what was asked for and drop the connection
+            data = bytearray()
+            for chunk in r.iter_content(16 * 1024):
+                data += chunk
+                if len(data) > end:
+                    break
+            total = r.headers.get("Content-Length")
+            return bytes(data[start:end + 1]), int(total) if total and total.isdigit() else None
+        r.raise_for_status()
+        raise OSError(f"HTTP {r.status_code} for a Range read of {url}")
+
+
+def read_header(url: str, headers: Dict[str, str]) -> Tuple[bytes, Tuple[Optional[str], Optional[int], Optional[int]], Optional[int]]:
+    """(bytes read, sniff() result, total size): HEADER_BYTES first, then more while the header needs it."""
+    data, total = read_range(url, 0, HEADER_BYTES - 1, headers)
+    while True:
+        try:
+            return data, sniff(data), total
+        except NeedMore as more:
+            want = min(max(more.offset, len(data) * 2), MAX_HEADER_BYTES, total or MAX_HEADER_BYTES)
+            if want <= len(data) or (total is not None and len(data) >= total):
+                return data, (sniff_format(data), None, None), total
+            chunk, total = read_range(url, len(data), want - 1, headers)
+            if not chunk:
+                return data, (sniff_format(data), None, None), total
+            data += chunk
+
+
+def sniff_format(data: bytes) -> Optional[str]:
+    """The format alone, for a header that was cut off before the dimensions."""
+    try:
+        return sniff(data)[0]
+    except NeedMore:
+        for magic, fmt in ((b"\xff\xd8\xff", "jpeg"), (b"\x89PNG", "png"), (b"GIF8", "gif"), (b"RIFF", "webp")):
+            if data.startswith(magic):
+                return fmt
+        if data[4:8] == b"ftyp":
+            return "avif" if data[8:12] in (b"avif", b"avis") else "heif"
+        return None
+
+
+def probe_image(url: str, index: ImageIndex, user_agent: str = "") -> ImageEntry:
+    """
+    The index entry for `url`: reused when a conditional HEAD shows the image
+    unchanged, else probed with Range reads and stored. Raises on HTTP errors.
+    """
+    headers = {"Accept": ACCEPT}
+    if user_agent:
+        headers["User-Agent"] = user_agent
+    known = index.latest(url)
+    head_headers = dict(headers)
+    if known is not None and known.etag and not known.etag.startswith("lm:"):
+        head_headers["If-None-Match"] = known.etag
+    elif known is not None and known.last_modified:
+        head_headers["If-Modified-Since"] = known.last_modified
+
+    r = client.request("HEAD", url, headers=head_headers, timeout=TIMEOUT, allow_redirects=True)
+    if r.status_code == 304 and known is not None:
+        index.touch(known)
+        index.count(unchanged=1)
+        return known
+    r.raise_for_status()
+    key = validator(r.headers)
+    if key:
+        seen = index.get(url, key)
+        if seen is not None:
+            index.touch(seen)
+            index.count(unchanged=1)
+            return seen
+
+    data, (fmt, width, height), total = read_header(url, headers)
+    length = r.headers.get("Content-Length")
+    now = time.time()
+    entry = ImageEntry(
+        url=url,
+        etag=key,
+        bytes=int(length) if length and length.isdigit() else total,
+        format=fmt,
+        width=width,
+        height=height,
+        content_type=r.headers.get("Content-Type", ""),
+        cache_control=r.headers.get("Cache-Control", ""),
+        expires=r.headers.get("Expires", ""),
+        last_modified=r.headers.get("Last-Modified", ""),
+        header_bytes=len(data),
+        probed_at=now,
+        checked_at=now,
+    )
+    index.put(entry)
+    index.count(probed=1, header_bytes=len(data))
+    return entry
+
+
+def max_age(cache_control: str) -> Optional[int]:
+    """s-maxage or max-age from a Cache-Control header, in seconds."""
+    m = re.search(r"\bs-maxage\s*=\s*(\d+)", cache_control) or re.search(r"\bmax-age\s*=\s*(\d+)", cache_control)
+    return int(m.group(1)) if m else None
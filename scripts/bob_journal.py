@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Write-ahead journal for Admin API mutations.
+
+The apply scripts plan every mutation before making any: each planned change
+is appended to a JSON-lines journal under .cache/journal/ with its target, the
+value it replaces ("before") and the value it writes ("after"), and the plan is
+sealed. Only then do the writes start, and each one's outcome (done / failed,
+plus any result such as a new file's gid) is appended and fsynced as it lands.
+
+If a run dies halfway, --resume reads the journal and runs the entries that are
+not done, without listing the store again. --rollback writes the "before"
+values of done entries back, newest first. The journal is append-only: replaying
+its lines in order gives each entry's latest state.
+
+    journal = Journal.create("apply-alts", store, {"limit": 25})
+    journal.add("page_body", {"id": 1}, before=old, after=new, key="page:1")
+    journal.seal()
+    run_entries(journal, journal.pending(), {"page_body": put_page_bodies})
+"""
+import datetime
+import glob
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bob_writer import DEFAULT_WRITE_WORKERS, WritePool
+
+
+JOURNAL_DIR = os.path.join(".cache", "journal")
+
+PLANNED, DONE, FAILED = "planned", "done", "failed"
+ROLLED_BACK, ROLLBACK_FAILED = "rolled_back", "rollback_failed"
+
+
+class JournalError(Exception):
+    pass
+
+
+@dataclass
+class Entry:
+    seq: int
+    kind: str
+    target: dict
+    before: object
+    after: object
+    key: str  # resource written; entries with the same key are applied in seq order
+    batch: str = ""  # entries sharing a batch are written in one call
+    label: str = ""
+    state: str = PLANNED
+    result: object = None
+    error: str = ""
+
+
+# A handler applies (revert=False) or reverts (revert=True) a group of entries of
+# one kind and returns (result, error) per entry; error "" means it landed.
+Outcome = Tuple[object, str]
+Handler = Callable[[List[Entry], bool], List[Outcome]]
+
+
+class Journal:
+    def __init__(self, path: Optional[str] = None):
+        """Load the journal at `path`; path=None keeps it in memory only (dry runs)."""
+        self.path = path
+        self.meta: dict = {}
+        self.entries: List[Entry] = []
+        self.sealed: List[str] = []
+        self._lock = threading.Lock()
+        self._f = None
+        if path and os.path.exists(path):
+            self._replay(path)
+
+    def _replay(self, path: str) -> None:
+        with open(path, encoding="utf-8") as f:
+            for n, line in enumerate(f, 1):
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    if line.endswith("\n"):
+                        raise JournalError(f"{path}:{n}: unreadable journal line")
+                    break  # torn final line from a crash mid-write
+                op = rec.pop("op")
+                if op == "run":
+                    self.meta = rec
+                elif op == "plan":
+                    self.entries.append(Entry(**rec))
+                elif op == "state":
+                    e = self.entries[rec["seq"] - 1]
+                    e.state, e.result, e.error = rec["state"], rec.get("result"), rec.get("error", "")
+                elif op == "sealed":
+                    self.sealed.append(rec["stage"])
+
+    @classmethod
+    def create(cls, script: str, store: str, meta: Optional[dict] = None, directory: str = JOURNAL_DIR) -> "Journal":
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        journal = cls(os.path.join(directory, f"{script}-{store}-{stamp}.jsonl"))
+        journal.meta = {"script": script, "store": store, "started": stamp, **(meta or {})}
+        journal._append({"op": "run", **journal.meta}, sync=True)
+        return journal
+
+    @classmethod
+    def latest(cls, script: str, store: str, directory: str = JOURNAL_DIR) -> Optional["Journal"]:
+        paths = sorted(glob.glob(os.path.join(directory, f"{script}-{store}-*.jsonl")))
+        return cls(paths[-1]) if paths else None
+
+    def _append(self, rec: dict, sync: bool = False) -> None:
+        if self.path is None:
+            return
+        with self._lock:
+            if self._f is None:
+                self._f = open(self.path, "a", encoding="utf-8")
+            self._f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            self._f.flush()
+            if sync:
+                os.fsync(self._f.fileno())
+
+    def add(self, kind: str, target: dict, before: object, after: object, key: str, batch: str = "", label: str = "") -> Entry:
+        """Plan a mutation; nothing is written to the store until the plan is sealed and run."""
+        e = Entry(len(self.entries) + 1, kind, target, before, after, key, batch, label or key)
+        self.entries.append(e)
+        rec = asdict(e)
+        for name in ("state", "result", "error"):
+            rec.pop(name)
+        self._append({"op": "plan", **rec})
+        return e
+
+    def seal(self, stage: str = "plan") -> None:
+        """Mark planning (of `stage`) finished; the plan is on disk before any write starts."""
+        self.sealed.append(stage)
+        self._append({"op": "sealed", "stage": stage}, sync=True)
+
+    def mark(self, entry: Entry, state: str, result: object = None, error: str = "") -> None:
+        entry.state, entry.result, entry.error = state, result, error
+        rec = {"op": "state", "seq": entry.seq, "state": state}
+        if result is not None:
+            rec["result"] = result
+        if error:
+            rec["error"] = error
+        self._append(rec, sync=True)
+
+    def pending(self, kinds: Optional[List[str]] = None) -> List[Entry]:
+        """Entries not yet applied (planned, or failed last time), in plan order."""
+        return [e for e in self.entries if e.state in (PLANNED, FAILED) and (kinds is None or e.kind in kinds)]
+
+    def done(self) -> List[Entry]:
+        """Entries whose "after" value is in the store (including ones a rollback failed to revert)."""
+        return [e for e in self.entries if e.state in (DONE, ROLLBACK_FAILED)]
+
+    def summary(self) -> str:
+        counts: Dict[str, int] = {}
+        for e in self.entries:
+            counts[e.state] = counts.get(e.state, 0) + 1
+        states = ", ".join(f"{n} {state}" for state, n in sorted(counts.items())) or "empty"
+        return f"{os.path.basename(self.path) if self.path else 'journal'}: {len(self.entries)} entries ({states})"
+
+    def close(self) -> None:
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+
+
+def open_journal(script: str, store: str, path: Optional[str] = None) -> Journal:
+    """The journal at `path`, or the latest one this script wrote for the store."""
+    journal = Journal(path) if path else Journal.latest(script, store)
+    if journal is None or not journal.meta:
+        raise JournalError(f"No journal found for {script} on {store}" + (f" at {path}" if path else ""))
+    if journal.meta.get("store") != store:
+        raise JournalError(f"{journal.path} was written for store {journal.meta.get('store')}, not {store}")
+    return journal
+
+
+def run_entries(journal: Journal, entries: List[Entry], handlers: Dict[str, Handler], workers: int = DEFAULT_WRITE_WORKERS, revert: bool = False) -> WritePool:
+    """
+    Apply (or revert) entries through a WritePool and record each outcome in the
+    journal. Entries of one batch go to their handler together; same-key entries
+    run in the order given. Failed groups are retried once, skipping entries that
+    already landed. Returns the closed pool (summary, remaining failures).
+    """
+    landed, failed = (ROLLED_BACK, ROLLBACK_FAILED) if revert else (DONE, FAILED)
+    groups: Dict[Tuple[str, str], List[Entry]] = {}
+    for e in entries:
+        groups.setdefault((e.kind, e.batch or f"#{e.seq}"), []).append(e)
+    pool = WritePool(workers=workers)
+
+    def write(kind: str, group: List[Entry]) -> None:
+        todo = [e for e in group if e.state != landed]
+        if not todo:
+            return
+        errors = []
+        for e, (result, error) in zip(todo, handlers[kind](todo, revert)):
+            if error:
+                journal.mark(e, failed, error=error)
+                errors.append(f"{e.label}: {error}")
+            else:
+                journal.mark(e, landed, result=result)
+        if errors:
+            raise JournalError("; ".join(errors))
+
+    for (kind, _), group in groups.items():
+        if kind not in handlers:
+            raise JournalError(f"No handler for journal entries of kind {kind!r}")
+        label = group[0].label if len(group) == 1 else f"{kind} x{len(group)}"
+        pool.submit(group[0].batch or group[0].key, label, lambda kind=kind, group=group: write(kind, group))
+    pool.join()
+    if pool.failures:
+        pool.retry_failures()
+    pool.close()
+    return pool
+
+
+def rollback(journal: Journal, handlers: Dict[str, Handler], workers: int = DEFAULT_WRITE_WORKERS) -> WritePool:
+    """Write back the "before" value of every done entry, newest first."""
+    return run_entries(journal, list(reversed(journal.done())), handlers, workers=workers, revert=True)
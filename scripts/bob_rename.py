@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Single-pass multi-rename engine for theme code.
+
+A rename plan of N files used to be applied as N rounds of str.replace/re.sub
+over every asset. RenameEngine compiles all the plan's needles (old CDN URLs
+and bare filenames) into one trie-shaped regex, so the C regex engine walks
+each asset once, Aho-Corasick style: shared prefixes are matched once, the
+first-character set skips non-candidates quickly, and at each position the
+longest needle wins (a full URL beats the filename inside it). Each match
+maps to its replacement:
+
+- old URL        -> new URL
+- old filename   -> new filename
+- 'old' | file_url -> 'new' | asset_url, when the new file went to theme
+  assets instead of Files (the only form rewritten for those renames)
+
+All renames apply simultaneously, so a plan with a -> b and b -> c turns a
+into b, not c.
+"""
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class Rename:
+    old_url: str  # canonical (no query string)
+    old_name: str
+    new_name: str
+    new_url: str  # Files URL, or a Liquid "{{ 'new' | asset_url }}" expression
+
+    @property
+    def to_theme_asset(self) -> bool:
+        return "asset_url" in self.new_url
+
+
+# `'old.svg' | file_url` after the filename: closing quote, filter
+_FILE_URL_TAIL = re.compile(r"\s*(['\"])\s*\|\s*file_url")
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """A regex matching any of `words`, factored by common prefix; longer words are tried first."""
+    trie: dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: dict) -> str:
+        end = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if end:
+            # a shorter needle ends here: try the longer ones first
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+def _open_quote_before(text: str, lo: int, i: int) -> Optional[int]:
+    """Index of the quote opening the string literal that `i` is in (only whitespace between), if any."""
+    while i > lo and text[i - 1].isspace():
+        i -= 1
+    return i - 1 if i > lo and text[i - 1] in "'\"" else None
+
+
+class RenameEngine:
+    def __init__(self, renames: List[Rename]):
+        self.renames = renames
+        # needle -> (rename, kind); a URL needle wins over a filename needle with the same text
+        self._needles: Dict[str, Tuple[Rename, str]] = {}
+        for r in renames:
+            if r.old_name and not r.to_theme_asset:
+                self._needles.setdefault(r.old_name, (r, "name"))
+            elif r.old_name:
+                self._needles.setdefault(r.old_name, (r, "file_url"))
+        for r in renames:
+            if r.old_url:
+                self._needles[r.old_url] = (r, "url")
+        needles = sorted(self._needles)
+        self._rx: Optional["re.Pattern"] = re.compile(_trie_pattern(needles)) if needles else None
+
+    def rewrite(self, text: str) -> Tuple[str, Counter]:
+        """(new text, replacements per old filename) after one scan of `text`."""
+        counts: Counter = Counter()
+        if self._rx is None:
+            return text, counts
+        out: List[str] = []
+        pos = 0
+        for m in self._rx.finditer(text):
+            start, end = m.span()
+            if start < pos:
+                continue  # inside a span already rewritten (file_url form)
+            rename, kind = self._needles[m.group(0)]
+            if kind == "url":
+                out.append(text[pos:start])
+                out.append(rename.new_url)
+            elif kind == "name":
+                out.append(text[pos:start])
+                out.append(rename.new_name)
+            else:
+                head = _open_quote_before(text, pos, start)
+                tail = _FILE_URL_TAIL.match(text, end)
+                if head is None or tail is None:
+                    continue
+                out.append(text[pos:head])
+                out.append(f"'{rename.new_name}' | asset_url")
+                end = tail.end()
+            counts[rename.old_name] += 1
+            pos = end
+        if not counts:
+            return text, counts
+        out.append(text[pos:])
+        return "".join(out), counts
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Priority scoring of audited images (prepare_bob_fixes).
+
+The rules are the per-image functions below (classify_scope, priority_score,
+decide_action, rename_reason). score_images() applies them to a whole
+unique-images table and returns the scored rows, highest priority first.
+
+With NumPy installed it uses the batch engine: each distinct page URL is
+classified once into a bitmask, the masks are OR-reduced per image over the
+image/page edges, filename hygiene is checked once per distinct filename, and
+score, scope, reasons and action are computed as array columns. Without NumPy
+(or with engine="rows") it runs the rules row by row. Both give identical
+rows; scripts/bench_scoring.py compares them.
+
+    rows = score_images(images)  # images: dicts with `pages` lists (bob_warehouse.image_rows)
+"""
+import gc
+import os
+import re
+from itertools import chain
+from operator import itemgetter
+from typing import Dict, List
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+HOMEPAGE = 'https://brushonblock.com'
+SCOPES = ('homepage', 'product', 'collection', 'blog', 'page', 'theme/global')  # by precedence
+SCOPE_WEIGHTS = {
+    'product': 30,
+    'blog': 20,
+    'collection': 18,
+    'page': 12,
+    'homepage': 50,
+    'theme/global': 25,
+}
+CONTENT_SCOPES = ('product', 'collection', 'blog', 'page', 'homepage')
+
+ACTIONS = (
+    "Ensure alt=\"\" (decorative). No rename needed.",
+    "Add descriptive ALT on all uses.",
+    "Optional: re-upload with GEO filename; update content references.",
+    "Optional: rename theme asset and update theme references.",
+)
+RENAME_STEPS_CONTENT = 'Re-upload media with suggested filename; update content references (product media or rich text).'
+RENAME_STEPS_THEME = 'Rename theme asset and update references in theme code (sections/snippets/assets).'
+
+_GENERIC_PREFIX = re.compile(r'^(img|image|picture|photo)[-_]?\d+')
+_GENERIC_ANY = re.compile(r'image[-_]?\d+')
+
+
+# --- per-image rules ---
+
+def classify_scope(pages: list[str]) -> str:
+    # Choose the most specific scope by precedence
+    has_home = any(p.rstrip('/') == HOMEPAGE for p in pages)
+    has_prod = any('/products/' in p for p in pages)
+    has_coll = any('/collections/' in p for p in pages)
+    has_blog = any('/blogs/' in p for p in pages)
+    has_page = any('/pages/' in p for p in pages)
+    if has_home:
+        return 'homepage'
+    if has_prod:
+        return 'product'
+    if has_coll:
+        return 'collection'
+    if has_blog:
+        return 'blog'
+    if has_page:
+        return 'page'
+    return 'theme/global'
+
+
+def has_uppercase(name: str) -> bool:
+    return any(c.isupper() for c in name)
+
+
+def has_underscores(name: str) -> bool:
+    return '_' in name
+
+
+def is_generic_name(name: str) -> bool:
+    base = os.path.splitext(os.path.basename(name))[0].lower()
+    return bool(_GENERIC_PREFIX.search(base) or _GENERIC_ANY.search(base))
+
+
+def priority_score(pages: list[str], scope: str, best_alt: str, suggested_alt: str, filename: str) -> tuple[int, list[str]]:
+    score = 0
+    reasons = []
+    pages_count = len(pages)
+    if any(p.rstrip('/') == HOMEPAGE for p in pages):
+        score += 100; reasons.append('homepage')
+    if pages_count > 25:
+        score += 60; reasons.append('sitewide component')
+    elif pages_count > 10:
+        score += 40; reasons.append('reused many pages')
+    elif pages_count > 3:
+        score += 15; reasons.append('reused multiple pages')
+
+    if scope in SCOPE_WEIGHTS:
+        score += SCOPE_WEIGHTS[scope]
+
+    if not best_alt.strip() and suggested_alt.strip():
+        score += 60; reasons.append('missing ALT')
+    if best_alt.strip() and not suggested_alt.strip():
+        # Likely decorative but currently has alt -> fix to empty
+        score += 35; reasons.append('decorative should be empty')
+
+    if has_uppercase(filename):
+        score += 8; reasons.append('uppercase in name')
+    if has_underscores(filename):
+        score += 8; reasons.append('underscores in name')
+    if is_generic_name(filename):
+        score += 10; reasons.append('generic filename')
+
+    return score, reasons
+
+
+def decide_action(scope: str, best_alt: str, suggested_alt: str, decorative: bool) -> str:
+    # ALT guidance first
+    if decorative:
+        return ACTIONS[0]
+    if not best_alt.strip() and suggested_alt.strip():
+        return ACTIONS[1]
+    # Filename guidance by scope
+    if scope in CONTENT_SCOPES:
+        return ACTIONS[2]
+    return ACTIONS[3]
+
+
+def rename_reason(filename: str) -> str:
+    reason = []
+    if has_uppercase(filename): reason.append('uppercase')
+    if has_underscores(filename): reason.append('underscores')
+    if is_generic_name(filename): reason.append('generic')
+    return ", ".join(reason)
+
+
+def rename_steps(scope: str) -> str:
+    if scope in CONTENT_SCOPES:
+        return RENAME_STEPS_CONTENT
+    return RENAME_STEPS_THEME
+
+
+def _scored_row(row: dict, pages: list, scope: str, decorative: bool, score: int, reasons: str, action: str, rename: str) -> dict:
+    return {
+        'image_url': row['image_url'],
+        'current_filename': row['current_filename'],
+        'suggested_filename': row['suggested_filename'],
+        'pages': pages,
+        'pages_count': len(pages),
+        'best_current_alt': row['best_current_alt'],
+        'suggested_alt': row['suggested_alt'],
+        'scope': scope,
+        'decorative': decorative,
+        'score': score,
+        'reasons': reasons,
+        'action': action,
+        'rename_reason': rename,
+        'rename_steps': rename_steps(scope) if rename else '',
+    }
+
+
+def score_rows(images: List[dict]) -> List[dict]:
+    """Row-by-row engine: apply the rules to each image, then sort by (score, pages_count) descending."""
+    rows = []
+    for row in images:
+        pages = row['pages']
+        scope = classify_scope(pages)
+        decorative = (row['suggested_alt'].strip() == '')
+        score, reasons = priority_score(pages, scope, row['best_current_alt'], row['suggested_alt'], row['current_filename'])
+        action = decide_action(scope, row['best_current_alt'], row['suggested_alt'], decorative)
+        rows.append(_scored_row(row, pages, scope, decorative, score, ", ".join(reasons), action, rename_reason(row['current_filename'])))
+    # Sort descending by score, then by pages_count
+    rows.sort(key=lambda x: (x['score'], x['pages_count']), reverse=True)
+    return rows
+
+
+# --- batch engine ---
+
+# page URL flags; an image's scope is its lowest set bit (SCOPES order), none -> theme/global
+P_HOME, P_PROD, P_COLL, P_BLOG, P_PAGE = 1, 2, 4, 8, 16
+# filename flags
+F_UPPER, F_UNDERSCORE, F_GENERIC = 1, 2, 4
+# reason bits: homepage, 2-bit reuse level, ALT state, then the filename flags
+R_HOME, R_REUSE_SHIFT, R_MISSING, R_EMPTY, R_NAME_SHIFT = 1, 1, 8, 16, 5
+
+REUSE_REASONS = ('', 'reused multiple pages', 'reused many pages', 'sitewide component')
+REUSE_POINTS = (0, 15, 40, 60)
+NAME_REASONS = ((F_UPPER, 'uppercase in name', 'uppercase'), (F_UNDERSCORE, 'underscores in name', 'underscores'), (F_GENERIC, 'generic filename', 'generic'))
+
+
+def page_flags(url: str) -> int:
+    flags = P_HOME if url.rstrip('/') == HOMEPAGE else 0
+    if '/products/' in url:
+        flags |= P_PROD
+    if '/collections/' in url:
+        flags |= P_COLL
+    if '/blogs/' in url:
+        flags |= P_BLOG
+    if '/pages/' in url:
+        flags |= P_PAGE
+    return flags
+
+
+_GENERIC = re.compile(r'^(?:img|picture|photo)[-_]?\d|image[-_]?\d')  # _GENERIC_PREFIX or _GENERIC_ANY
+
+
+def filename_flags(name: str) -> int:
+    """has_uppercase / has_underscores / is_generic_name as bits, with exact shortcuts for ASCII names."""
+    if not name.isascii():
+        return (F_UPPER if has_uppercase(name) else 0) | (F_UNDERSCORE if has_underscores(name) else 0) | (F_GENERIC if is_generic_name(name) else 0)
+    lower = name.lower()
+    flags = F_UPPER if lower != name else 0  # lower() changes exactly A-Z
+    if '_' in name:
+        flags |= F_UNDERSCORE
+    # is_generic_name without os.path: basename, then drop the extension unless the dot is leading
+    base = lower[lower.rfind('/') + 1:]
+    dot = base.rfind('.')
+    if dot > 0 and base[:dot].lstrip('.'):
+        base = base[:dot]
+    if _GENERIC.search(base):
+        flags |= F_GENERIC
+    return flags
+
+
+def _reasons(code: int) -> str:
+    reasons = ['homepage'] if code & R_HOME else []
+    level = (code >> R_REUSE_SHIFT) & 3
+    if level:
+        reasons.append(REUSE_REASONS[level])
+    if code & R_MISSING:
+        reasons.append('missing ALT')
+    if code & R_EMPTY:
+        reasons.append('decorative should be empty')
+    for flag, reason, _ in NAME_REASONS:
+        if (code >> R_NAME_SHIFT) & flag:
+            reasons.append(reason)
+    return ", ".join(reasons)
+
+
+def _rename_reason(flags: int) -> str:
+    return ", ".join(short for flag, _, short in NAME_REASONS if flags & flag)
+
+
+def _scope_tables():
+    scope_of_mask = np.full(32, len(SCOPES) - 1, dtype=np.int8)
+    for mask in range(1, 32):
+        scope_of_mask[mask] = (mask & -mask).bit_length() - 1
+    scope_points = np.array([SCOPE_WEIGHTS[s] for s in SCOPES], dtype=np.int64)
+    is_content = np.array([s in CONTENT_SCOPES for s in SCOPES])
+    return scope_of_mask, scope_points, is_content
+
+
+def _factorize(values: list, flags_of) -> "tuple[np.ndarray, np.ndarray]":
+    """(codes, flags per distinct value): each distinct value is classified once."""
+    index: Dict[str, int] = {v: i for i, v in enumerate(dict.fromkeys(values))}
+    codes = np.fromiter(map(index.__getitem__, values), dtype=np.int64, count=len(values))
+    flags = np.fromiter(map(flags_of, index), dtype=np.int64, count=len(index))
+    return codes, flags
+
+
+def score_batch(images: List[dict]) -> List[dict]:
+    """Batch engine (NumPy): same rows and order as score_rows()."""
+    n = len(images)
+    if not n:
+        return []
+    pages = list(map(itemgetter('pages'), images))
+    counts = np.fromiter(map(len, pages), dtype=np.int64, count=n)
+
+    # scope flags: one classification per distinct page, OR-ed over each image's pages
+    edge_pages, flags_by_page = _factorize(list(chain.from_iterable(pages)), page_flags)
+    mask = np.zeros(n, dtype=np.int64)
+    if edge_pages.size:
+        has_pages = counts > 0
+        starts = np.cumsum(counts) - counts
+        mask[has_pages] = np.bitwise_or.reduceat(flags_by_page[edge_pages], starts[has_pages])
+
+    # filenames are nearly all distinct in the unique-images table: no point factorizing them
+    name_flags = np.fromiter(map(filename_flags, map(itemgetter('current_filename'), images)), dtype=np.int64, count=n)
+    has_alt = np.fromiter(map(str.strip, map(itemgetter('best_current_alt'), images)), dtype=bool, count=n)
+    has_suggestion = np.fromiter(map(str.strip, map(itemgetter('suggested_alt'), images)), dtype=bool, count=n)
+
+    scope_of_mask, scope_points, is_content = _scope_tables()
+    scope = scope_of_mask[mask & 31]
+    home = (mask & P_HOME) != 0
+    reuse = np.select([counts > 25, counts > 10, counts > 3], [3, 2, 1], 0)
+    missing = ~has_alt & has_suggestion
+    empty = has_alt & ~has_suggestion
+    decorative = ~has_suggestion
+
+    score = (
+        100 * home
+        + np.asarray(REUSE_POINTS)[reuse]
+        + scope_points[scope]
+        + 60 * missing
+        + 35 * empty
+        + 8 * ((name_flags & F_UPPER) != 0)
+        + 8 * ((name_flags & F_UNDERSCORE) != 0)
+        + 10 * ((name_flags & F_GENERIC) != 0)
+    )
+    reason_code = home * R_HOME | reuse << R_REUSE_SHIFT | missing * R_MISSING | empty * R_EMPTY | name_flags << R_NAME_SHIFT
+    action = np.where(decorative, 0, np.where(missing, 1, np.where(is_content[scope], 2, 3)))
+
+    # stable sort on (-score, -pages_count): ties keep input order, as list.sort(reverse=True) does
+    order = np.lexsort((-counts, -score))
+    reason_text = {int(c): _reasons(int(c)) for c in np.unique(reason_code)}
+    rename_text = [_rename_reason(f) for f in range(8)]
+    steps_text = [rename_steps(s) for s in SCOPES]
+    cols = zip(order.tolist(), scope[order].tolist(), decorative[order].tolist(), score[order].tolist(),
+               reason_code[order].tolist(), action[order].tolist(), name_flags[order].tolist(), counts[order].tolist())
+    # the result dicts hold no cycles; with the cyclic GC running, building a
+    # million of them spends much of the time in collections
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return [
+            {
+                'image_url': (row := images[i])['image_url'],
+                'current_filename': row['current_filename'],
+                'suggested_filename': row['suggested_filename'],
+                'pages': row['pages'],
+                'pages_count': count,
+                'best_current_alt': row['best_current_alt'],
+                'suggested_alt': row['suggested_alt'],
+                'scope': SCOPES[s],
+                'decorative': dec,
+                'score': sc,
+                'reasons': reason_text[rc],
+                'action': ACTIONS[a],
+                'rename_reason': rename_text[nf],
+                'rename_steps': steps_text[s] if nf else '',
+            }
+            for i, s, dec, sc, rc, a, nf, count in cols
+        ]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def score_images(images: List[dict], engine: str = "auto") -> List[dict]:
+    """Score and rank images; engine "auto" uses the batch engine when NumPy is installed."""
+    if engine == "batch" or (engine == "auto" and np is not None):
+        if np is None:
+            raise RuntimeError("The batch scoring engine needs NumPy (pip install numpy).")
+        return score_batch(images)
+    return score_rows(images)
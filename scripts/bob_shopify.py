@@ -0,0 +1,633 @@
+#!/usr/bin/env python3
+"""
+Shopify Admin API helpers shared by the shopify_* scripts.
+
+Catalog listings use GraphQL Bulk Operations: one bulkOperationRunQuery per
+resource, polled until Shopify has written the JSONL export, which is then
+streamed line by line into the same dicts the REST listings return (numeric
+ids, body_html, images with src/alt). A large store is enumerated by a few
+server-side jobs instead of hundreds of serial since_id pages.
+
+Every Admin call goes through admin_request(), which paces itself from the
+quota Shopify reports: X-Shopify-Shop-Api-Call-Limit on REST (leaky bucket,
+leaking at a twentieth of its size per second) and extensions.cost.throttleStatus
+on GraphQL (available points and restore rate). Requests wait just long enough
+to stay under the limit; 429s, THROTTLED errors and 5xx are retried with
+jittered exponential backoff (honouring Retry-After). throttle_summary()
+reports the time spent waiting.
+
+Alt text on product media and Files-library images is written in batches:
+one productUpdateMedia per product and one fileUpdate per MEDIA_BATCH_SIZE
+files, with a MediaAltResult per media id.
+
+Files are created without passing their bytes through this process where
+possible: file_create() hands Shopify a public URL (originalSource) to fetch
+server-side, and upload_file_from_disk() streams a local file to a
+stagedUploadsCreate target before creating the File from it.
+
+SHOPIFY_ADMIN_URL overrides https://{store}.myshopify.com, e.g. to point the
+scripts at scripts/shopify_standin_server.py.
+"""
+import csv
+import json
+import mimetypes
+import os
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from bob_client import client
+
+
+API_VERSION = os.getenv("SHOPIFY_API_VERSION", "2024-10")
+BULK_POLL_SEC = 1.0
+BULK_MAX_POLL_SEC = 15.0
+BULK_TIMEOUT_SEC = 3600
+
+REST_HEADROOM = 2  # calls kept free in the REST bucket for other apps/scripts
+GRAPHQL_DEFAULT_COST = 50  # assumed cost of a query we have not seen yet
+MAX_RETRIES = 6
+BACKOFF_BASE_SEC = 1.0
+BACKOFF_MAX_SEC = 30.0
+
+
+class ShopifyError(Exception):
+    pass
+
+
+def admin_base(store: str) -> str:
+    root = os.getenv("SHOPIFY_ADMIN_URL") or f"https://{store}.myshopify.com"
+    return f"{root.rstrip('/')}/admin/api/{API_VERSION}"
+
+
+@dataclass
+class ThrottleStats:
+    requests: int = 0
+    paced_sec: float = 0.0  # waited before sending to stay under the quota
+    backoff_sec: float = 0.0  # waited after a 429 / THROTTLED / 5xx
+    throttled: int = 0  # 429 + GraphQL THROTTLED responses
+    server_errors: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"Admin API: {self.requests} requests, {self.paced_sec:.1f}s paced, "
+            f"{self.backoff_sec:.1f}s backing off ({self.throttled} throttled, {self.server_errors} server errors)"
+        )
+
+
+class AdminThrottle:
+    """Tracks one shop's REST bucket and GraphQL points; thread-safe so concurrent writers share it."""
+
+    def __init__(self):
+        self.stats = ThrottleStats()
+        self._lock = threading.Lock()
+        # REST leaky bucket, as of the last response
+        self._rest_used = 0.0
+        self._rest_size = 40.0
+        self._rest_at = 0.0
+        # GraphQL cost bucket, as of the last response
+        self._gql_available: Optional[float] = None
+        self._gql_max = 1000.0
+        self._gql_restore = 50.0
+        self._gql_at = 0.0
+        self._gql_costs: Dict[str, float] = {}
+
+    def _reserve(self, cost_key: Optional[str]) -> float:
+        """Book capacity for the next call and return how long to wait first."""
+        with self._lock:
+            now = time.monotonic()
+            if cost_key is None:
+                leak = self._rest_size / 20
+                used = max(0.0, self._rest_used - (now - self._rest_at) * leak)
+                wait = max(0.0, (used + 1 - (self._rest_size - REST_HEADROOM)) / leak)
+                # count this call now so concurrent callers queue behind it
+                self._rest_used, self._rest_at = used + 1, now
+                return wait
+            if self._gql_available is None:
+                return 0.0
+            cost = self._gql_costs.get(cost_key, GRAPHQL_DEFAULT_COST)
+            available = min(self._gql_max, self._gql_available + (now - self._gql_at) * self._gql_restore)
+            wait = max(0.0, (cost - available) / self._gql_restore)
+            self._gql_available, self._gql_at = available - cost, now
+            return wait
+
+    def _observe_rest(self, r: requests.Response) -> None:
+        header = r.headers.get("X-Shopify-Shop-Api-Call-Limit")
+        with self._lock:
+            now = time.monotonic()
+            # what we have booked ourselves, drained to now; calls still in flight are not in the header yet
+            booked = max(0.0, self._rest_used - (now - self._rest_at) * self._rest_size / 20)
+            if header and "/" in header:
+                used, size = header.split("/", 1)
+                self._rest_size = float(size)
+                booked = max(booked, float(used))
+            if r.status_code == 429:
+                booked = self._rest_size
+            self._rest_used, self._rest_at = booked, now
+
+    def _observe_graphql(self, cost_key: str, body: dict) -> None:
+        cost = (body.get("extensions") or {}).get("cost") or {}
+        status = cost.get("throttleStatus")
+        with self._lock:
+            if cost.get("requestedQueryCost") is not None:
+                self._gql_costs[cost_key] = float(cost["requestedQueryCost"])
+            if status:
+                self._gql_max = float(status["maximumAvailable"])
+                self._gql_restore = float(status["restoreRate"]) or self._gql_restore
+                self._gql_available = float(status["currentlyAvailable"])
+                self._gql_at = time.monotonic()
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            setattr(self.stats, field, getattr(self.stats, field) + 1)
+
+    def _sleep(self, sec: float, paced: bool) -> None:
+        if sec <= 0:
+            return
+        with self._lock:
+            if paced:
+                self.stats.paced_sec += sec
+            else:
+                self.stats.backoff_sec += sec
+        time.sleep(sec)
+
+
+_throttles: Dict[str, AdminThrottle] = {}
+_throttles_lock = threading.Lock()
+
+
+def throttle_for(store: str) -> AdminThrottle:
+    with _throttles_lock:
+        return _throttles.setdefault(store, AdminThrottle())
+
+
+def throttle_summary() -> str:
+    return "\n".join(t.stats.summary() for t in _throttles.values())
+
+
+def _backoff(attempt: int, retry_after: Optional[str] = None) -> float:
+    if retry_after:
+        try:
+            return float(retry_after) + random.uniform(0, 0.5)
+        except ValueError:
+            pass
+    # full jitter
+    return random.uniform(0, min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * 2 ** attempt))
+
+
+def _is_throttled(body: dict) -> bool:
+    return any((e.get("extensions") or {}).get("code") == "THROTTLED" for e in body.get("errors") or [])
+
+
+def admin_request(method: str, store: str, token: str, path: str, **kwargs) -> requests.Response:
+    """
+    Send an Admin API request (path relative to admin_base, e.g. "/products.json"), paced
+    by the shop's reported quota and retried on 429 / 5xx / GraphQL THROTTLED. Returns the
+    final response; the caller checks its status as before.
+    """
+    throttle = throttle_for(store)
+    url = f"{admin_base(store)}{path}"
+    headers = {"X-Shopify-Access-Token": token, **kwargs.pop("headers", {})}
+    if "json" in kwargs:
+        headers.setdefault("Content-Type", "application/json")
+    is_graphql = path.endswith("/graphql.json")
+    cost_key = (kwargs.get("json") or {}).get("query", "") if is_graphql else None
+    # A REST POST that died with a 5xx may still have been applied (e.g. a created redirect)
+    retry_5xx = is_graphql or method.upper() != "POST"
+    for attempt in range(MAX_RETRIES + 1):
+        throttle._sleep(throttle._reserve(cost_key), paced=True)
+        r = client.request(method, url, headers=headers, **kwargs)
+        throttle._count("requests")
+        if not is_graphql:
+            throttle._observe_rest(r)
+        last = attempt == MAX_RETRIES
+        if r.status_code == 429:
+            throttle._count("throttled")
+            if not last:
+                throttle._sleep(_backoff(attempt, r.headers.get("Retry-After")), paced=False)
+                continue
+        elif r.status_code >= 500:
+            throttle._count("server_errors")
+            if retry_5xx and not last:
+                throttle._sleep(_backoff(attempt), paced=False)
+                continue
+        elif is_graphql and r.status_code == 200:
+            body = r.json()
+            throttle._observe_graphql(cost_key, body)
+            if _is_throttled(body) and not last:
+                throttle._count("throttled")
+                # the throttleStatus just observed tells _reserve how long to wait
+                continue
+        return r
+    return r
+
+
+def graphql(store: str, token: str, query: str, variables: Optional[dict] = None) -> dict:
+    """POST a GraphQL query; returns the response JSON, raises ShopifyError on top-level errors."""
+    r = admin_request("POST", store, token, "/graphql.json", json={"query": query, "variables": variables or {}})
+    r.raise_for_status()
+    j = r.json()
+    if j.get("errors"):
+        raise ShopifyError(f"GraphQL errors: {j['errors']}")
+    return j
+
+
+def legacy_id(gid: str) -> int:
+    # gid://shopify/Product/123 -> 123 (the id the REST endpoints use)
+    return int(gid.rsplit("/", 1)[-1])
+
+
+# --- Bulk operations ---
+
+BULK_RUN = """
+mutation bulkOperationRunQuery($query: String!) {
+  bulkOperationRunQuery(query: $query) {
+    bulkOperation { id status }
+    userErrors { field message }
+  }
+}
+"""
+
+BULK_STATUS = """
+query bulkOperation($id: ID!) {
+  node(id: $id) { ... on BulkOperation { id status errorCode objectCount url partialDataUrl } }
+}
+"""
+
+
+def run_bulk_query(store: str, token: str, query: str, label: str = "bulk export") -> Optional[str]:
+    """Start a bulk query and poll until it finishes. Returns the JSONL URL (None when nothing matched)."""
+    j = graphql(store, token, BULK_RUN, {"query": query})
+    result = j["data"]["bulkOperationRunQuery"]
+    if result.get("userErrors"):
+        raise ShopifyError(f"bulkOperationRunQuery: {result['userErrors']}")
+    op_id = result["bulkOperation"]["id"]
+    started = time.monotonic()
+    delay = BULK_POLL_SEC
+    last_count = None
+    while True:
+        op = graphql(store, token, BULK_STATUS, {"id": op_id})["data"]["node"]
+        status = op["status"]
+        if status == "COMPLETED":
+            print(f"{label}: {op.get('objectCount') or 0} objects in {time.monotonic() - started:.1f}s", flush=True)
+            return op.get("url")
+        if status in ("FAILED", "CANCELED", "EXPIRED"):
+            raise ShopifyError(f"{label}: bulk operation {status} ({op.get('errorCode')})")
+        if time.monotonic() - started > BULK_TIMEOUT_SEC:
+            raise ShopifyError(f"{label}: bulk operation still {status} after {BULK_TIMEOUT_SEC}s")
+        if op.get("objectCount") != last_count:
+            last_count = op.get("objectCount")
+            print(f"{label}: {status.lower()}, {last_count or 0} objects so far…", flush=True)
+        time.sleep(delay)
+        delay = min(delay * 1.5, BULK_MAX_POLL_SEC)
+
+
+def iter_bulk_results(url: Optional[str]) -> Iterator[Dict[str, Any]]:
+    """Stream a bulk operation's JSONL export one object at a time."""
+    if not url:
+        return
+    with client.get(url, stream=True, timeout=(10, 300)) as r:
+        r.raise_for_status()
+        for line in r.iter_lines():
+            if line:
+                yield json.loads(line)
+
+
+PRODUCTS_QUERY = """
+{
+  products {
+    edges { node {
+      id title handle status
+      images { edges { node { id url altText } } }
+      media { edges { node { ... on MediaImage { id alt image { url } } } } }
+    } }
+  }
+}
+"""
+
+FILES_QUERY = """
+{
+  files(query: "media_type:IMAGE") {
+    edges { node { ... on MediaImage { id alt image { url } } } }
+  }
+}
+"""
+
+PAGES_QUERY = """
+{
+  pages { edges { node { id title body } } }
+}
+"""
+
+BLOGS_QUERY = """
+{
+  blogs {
+    edges { node {
+      id title handle
+      articles { edges { node { id title body } } }
+    } }
+  }
+}
+"""
+
+
+def export_products(store: str, token: str) -> List[dict]:
+    """
+    All products with their images, shaped like REST /products.json (fields=id,title,handle,status,images),
+    plus "media": the MediaImage records (gid, src, alt) that update_product_media_alts() writes to.
+    """
+    products: List[dict] = []
+    by_gid: Dict[str, dict] = {}
+    for obj in iter_bulk_results(run_bulk_query(store, token, PRODUCTS_QUERY, "products")):
+        parent = obj.get("__parentId")
+        if parent is None:
+            p = {
+                "id": legacy_id(obj["id"]),
+                "title": obj.get("title") or "",
+                "handle": obj.get("handle") or "",
+                "status": (obj.get("status") or "").lower(),
+                "images": [],
+                "media": [],
+            }
+            by_gid[obj["id"]] = p
+            products.append(p)
+        elif parent in by_gid:
+            p = by_gid[parent]
+            gid = obj.get("id") or ""
+            if gid.startswith("gid://shopify/ProductImage/"):
+                p["images"].append({"id": legacy_id(gid), "product_id": p["id"], "src": obj.get("url") or "", "alt": obj.get("altText")})
+            elif gid.startswith("gid://shopify/MediaImage/"):
+                # the same pictures seen as media; productUpdateMedia takes these ids, not ProductImage ids
+                p["media"].append({"id": gid, "product_id": p["id"], "src": (obj.get("image") or {}).get("url") or "", "alt": obj.get("alt")})
+    return products
+
+
+def export_files(store: str, token: str) -> List[dict]:
+    """Images in the Files library (theme/global assets among them): [{"id": gid, "src", "alt"}]."""
+    return [
+        {"id": obj["id"], "src": (obj.get("image") or {}).get("url") or "", "alt": obj.get("alt")}
+        for obj in iter_bulk_results(run_bulk_query(store, token, FILES_QUERY, "files"))
+        if obj.get("id")
+    ]
+
+
+def export_pages(store: str, token: str) -> List[dict]:
+    """All pages, shaped like REST /pages.json (fields=id,title,body_html)."""
+    return [
+        {"id": legacy_id(obj["id"]), "title": obj.get("title") or "", "body_html": obj.get("body") or ""}
+        for obj in iter_bulk_results(run_bulk_query(store, token, PAGES_QUERY, "pages"))
+    ]
+
+
+def export_blogs(store: str, token: str) -> Tuple[List[dict], Dict[int, List[dict]]]:
+    """(blogs, {blog_id: articles}), shaped like REST /blogs.json and /blogs/{id}/articles.json."""
+    blogs: List[dict] = []
+    articles: Dict[int, List[dict]] = {}
+    blog_ids: Dict[str, int] = {}
+    for obj in iter_bulk_results(run_bulk_query(store, token, BLOGS_QUERY, "blogs and articles")):
+        parent = obj.get("__parentId")
+        if parent is None:
+            blog_id = legacy_id(obj["id"])
+            blog_ids[obj["id"]] = blog_id
+            blogs.append({"id": blog_id, "title": obj.get("title") or "", "handle": obj.get("handle") or ""})
+            articles[blog_id] = []
+        elif parent in blog_ids:
+            articles[blog_ids[parent]].append(
+                {"id": legacy_id(obj["id"]), "title": obj.get("title") or "", "body_html": obj.get("body") or ""}
+            )
+    return blogs, articles
+
+
+# --- Media alt text ---
+
+PRODUCT_UPDATE_MEDIA = """
+mutation productUpdateMedia($productId: ID!, $media: [UpdateMediaInput!]!) {
+  productUpdateMedia(productId: $productId, media: $media) {
+    media { id alt }
+    mediaUserErrors { field message code }
+  }
+}
+"""
+
+FILE_UPDATE = """
+mutation fileUpdate($files: [FileUpdateInput!]!) {
+  fileUpdate(files: $files) {
+    files { id alt }
+    userErrors { field message code }
+  }
+}
+"""
+
+MEDIA_BATCH_SIZE = 50  # media per productUpdateMedia / files per fileUpdate call
+
+
+@dataclass
+class MediaAltResult:
+    media_id: str  # MediaImage gid
+    owner: str  # product gid, or "files" for the Files library
+    alt: str
+    status: str  # updated | failed | dry-run
+    error: str = ""
+
+
+def _media_results(owner: str, batch: List[Tuple[str, str]], key: str, user_errors: List[dict]) -> List[MediaAltResult]:
+    """Attribute userErrors to the inputs they name (field ["media"|"files", index, ...]); others fail the batch."""
+    per_item: Dict[int, str] = {}
+    batch_error = ""
+    for e in user_errors:
+        field = e.get("field") or []
+        if len(field) >= 2 and field[0] == key and str(field[1]).isdigit() and int(field[1]) < len(batch):
+            per_item[int(field[1])] = e.get("message") or "error"
+        else:
+            batch_error = e.get("message") or "error"
+    return [
+        MediaAltResult(media_id, owner, alt, "failed" if (i in per_item or batch_error) else "updated", per_item.get(i, batch_error))
+        for i, (media_id, alt) in enumerate(batch)
+    ]
+
+
+def _chunks(items: List[Tuple[str, str]], size: int) -> Iterator[List[Tuple[str, str]]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def update_product_media_alts(store: str, token: str, product_id: int, changes: List[Tuple[str, str]], dry_run: bool = False) -> List[MediaAltResult]:
+    """Set alt text on one product's media, [(media gid, alt)], in one productUpdateMedia call per batch."""
+    owner = f"gid://shopify/Product/{product_id}"
+    results: List[MediaAltResult] = []
+    for batch in _chunks(changes, MEDIA_BATCH_SIZE):
+        if dry_run:
+            print(f"DRY RUN: productUpdateMedia product={product_id} media={len(batch)}")
+            results.extend(MediaAltResult(media_id, owner, alt, "dry-run") for media_id, alt in batch)
+            continue
+        variables = {"productId": owner, "media": [{"id": media_id, "alt": alt} for media_id, alt in batch]}
+        try:
+            data = graphql(store, token, PRODUCT_UPDATE_MEDIA, variables)["data"]["productUpdateMedia"] or {}
+        except (ShopifyError, requests.RequestException) as e:
+            results.extend(MediaAltResult(media_id, owner, alt, "failed", str(e)) for media_id, alt in batch)
+            continue
+        results.extend(_media_results(owner, batch, "media", data.get("mediaUserErrors") or []))
+    return results
+
+
+def update_file_alts(store: str, token: str, changes: List[Tuple[str, str]], dry_run: bool = False) -> List[MediaAltResult]:
+    """Set alt text on Files-library images, [(file gid, alt)], MEDIA_BATCH_SIZE per fileUpdate call."""
+    results: List[MediaAltResult] = []
+    for batch in _chunks(changes, MEDIA_BATCH_SIZE):
+        if dry_run:
+            print(f"DRY RUN: fileUpdate files={len(batch)}")
+            results.extend(MediaAltResult(file_id, "files", alt, "dry-run") for file_id, alt in batch)
+            continue
+        variables = {"files": [{"id": file_id, "alt": alt} for file_id, alt in batch]}
+        try:
+            data = graphql(store, token, FILE_UPDATE, variables)["data"]["fileUpdate"] or {}
+        except (ShopifyError, requests.RequestException) as e:
+            results.extend(MediaAltResult(file_id, "files", alt, "failed", str(e)) for file_id, alt in batch)
+            continue
+        results.extend(_media_results("files", batch, "files", data.get("userErrors") or []))
+    return results
+
+
+def write_media_alt_results(path: str, results: List[MediaAltResult]) -> None:
+    """One CSV row per media id, so partial failures of a batch can be retried."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=[f.name for f in fields(MediaAltResult)])
+        w.writeheader()
+        w.writerows(asdict(r) for r in results)
+
+
+# --- File uploads ---
+
+FILE_CREATE = """
+mutation fileCreate($files: [FileCreateInput!]!) {
+  fileCreate(files: $files) {
+    files { id fileStatus }
+    userErrors { field message }
+  }
+}
+"""
+
+FILE_STATUS = """
+query fileStatus($id: ID!) {
+  node(id: $id) {
+    ... on MediaImage { fileStatus image { url } }
+    ... on GenericFile { fileStatus url }
+  }
+}
+"""
+
+FILES_BY_NAME = """
+query filesByName($query: String!) {
+  files(first: 10, query: $query) {
+    edges { node { id fileStatus ... on MediaImage { image { url } } ... on GenericFile { url } } }
+  }
+}
+"""
+
+FILE_DELETE = """
+mutation fileDelete($fileIds: [ID!]!) {
+  fileDelete(fileIds: $fileIds) {
+    deletedFileIds
+    userErrors { field message }
+  }
+}
+"""
+
+STAGED_UPLOADS_CREATE = """
+mutation stagedUploadsCreate($input: [StagedUploadInput!]!) {
+  stagedUploadsCreate(input: $input) {
+    stagedTargets { url resourceUrl parameters { name value } }
+    userErrors { field message }
+  }
+}
+"""
+
+STAGED_HEADER_NAMES = {"content_type": "Content-Type", "acl": "x-goog-acl"}
+FILE_READY_TIMEOUT_SEC = 120
+UPLOAD_TIMEOUT = (10, 600)
+
+
+def file_create(store: str, token: str, filename: str, original_source: str, alt: Optional[str] = None) -> str:
+    """
+    Create a File from a URL Shopify fetches itself (a public CDN URL or a staged
+    upload's resourceUrl), stored under `filename`. Returns the new file's gid.
+    """
+    item = {"originalSource": original_source, "filename": filename}
+    if alt is not None:
+        item["alt"] = alt
+    result = graphql(store, token, FILE_CREATE, {"files": [item]})["data"]["fileCreate"] or {}
+    if result.get("userErrors"):
+        raise ShopifyError(f"fileCreate {filename}: {result['userErrors']}")
+    files = result.get("files") or []
+    if not files:
+        raise ShopifyError(f"fileCreate {filename}: no file returned")
+    return files[0]["id"]
+
+
+def find_file(store: str, token: str, filename: str) -> Optional[Tuple[str, str]]:
+    """(gid, CDN URL) of a ready File stored under exactly `filename`, if there is one."""
+    data = graphql(store, token, FILES_BY_NAME, {"query": f"filename:'{filename}'"})["data"]["files"] or {}
+    for edge in data.get("edges") or []:
+        node = edge["node"]
+        url = (node.get("image") or {}).get("url") or node.get("url") or ""
+        if node.get("fileStatus") == "READY" and url.split("?", 1)[0].rsplit("/", 1)[-1] == filename:
+            return node["id"], url
+    return None
+
+
+def file_delete(store: str, token: str, file_ids: List[str]) -> None:
+    result = graphql(store, token, FILE_DELETE, {"fileIds": file_ids})["data"]["fileDelete"] or {}
+    if result.get("userErrors"):
+        raise ShopifyError(f"fileDelete: {result['userErrors']}")
+
+
+def wait_for_file_url(store: str, token: str, file_id: str, timeout: float = FILE_READY_TIMEOUT_SEC) -> str:
+    """Poll a new file until Shopify has processed it; returns its CDN URL."""
+    started = time.monotonic()
+    delay = BULK_POLL_SEC
+    while True:
+        node = graphql(store, token, FILE_STATUS, {"id": file_id})["data"]["node"] or {}
+        status = node.get("fileStatus")
+        url = (node.get("image") or {}).get("url") or node.get("url")
+        if status == "READY" and url:
+            return url
+        if status == "FAILED":
+            raise ShopifyError(f"File {file_id} failed processing")
+        if time.monotonic() - started > timeout:
+            raise ShopifyError(f"File {file_id} still {status} after {timeout:.0f}s")
+        time.sleep(delay)
+        delay = min(delay * 1.5, BULK_MAX_POLL_SEC)
+
+
+def staged_upload(store: str, token: str, path: str, filename: Optional[str] = None, mime_type: Optional[str] = None) -> str:
+    """
+    Stream a local file to a staged upload target and return its resourceUrl.
+    Uses the PUT flavour of the target, so the body goes out straight from the
+    open file (Content-Length from its size) with no multipart or base64 copy.
+    """
+    filename = filename or os.path.basename(path)
+    mime_type = mime_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    size = os.path.getsize(path)
+    staged = {"filename": filename, "mimeType": mime_type, "resource": "FILE", "fileSize": str(size), "httpMethod": "PUT"}
+    result = graphql(store, token, STAGED_UPLOADS_CREATE, {"input": [staged]})["data"]["stagedUploadsCreate"] or {}
+    if result.get("userErrors"):
+        raise ShopifyError(f"stagedUploadsCreate {filename}: {result['userErrors']}")
+    target = result["stagedTargets"][0]
+    # for PUT targets the parameters are the headers the signed URL was issued for
+    headers = {STAGED_HEADER_NAMES.get(p["name"], p["name"]): p["value"] for p in target.get("parameters") or []}
+    headers.setdefault("Content-Type", mime_type)
+    with open(path, "rb") as f:
+        r = client.put(target["url"], data=f, headers=headers, timeout=UPLOAD_TIMEOUT)
+    r.raise_for_status()
+    return target["resourceUrl"]
+
+
+def upload_file_from_disk(store: str, token: str, path: str, filename: Optional[str] = None, alt: Optional[str] = None) -> str:
+    """Staged upload + fileCreate; returns the new file's gid."""
+    filename = filename or os.path.basename(path)
+    return file_create(store, token, filename, staged_upload(store, token, path, filename), alt=alt)
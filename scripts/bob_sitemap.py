@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Streaming sitemap ingestion.
+
+Each sitemap is read in chunks and fed to an incremental XML parser
+(ET.XMLPullParser, the push-mode iterparse), and elements are cleared as soon
+as a <url>/<sitemap> closes, so memory does not grow with sitemap size.
+Gzipped sitemaps (.xml.gz, or gzip magic bytes) are inflated on the fly.
+Child sitemaps of an index are fetched by a window of threads while the
+caller consumes the earlier ones; entries still come out in index order.
+<image:image><image:loc> children are kept on the entry.
+"""
+import queue
+import threading
+import xml.etree.ElementTree as ET
+import zlib
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Iterator, List, Optional, Set, Tuple, Union
+
+from bob_client import client
+from bob_fetch import HostLimiter
+
+
+DEFAULT_SITEMAP_CONCURRENCY = 4
+CHUNK_SIZE = 64 * 1024
+BATCH_SIZE = 500  # entries handed from a reader thread to the consumer at a time
+QUEUE_SIZE = 8  # batches buffered per child sitemap before its reader blocks
+TIMEOUT = 20
+
+SM = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+IMAGE = "{http://www.google.com/schemas/sitemap-image/1.1}"
+SM_URL, SM_SITEMAP, SM_LOC, SM_LASTMOD = SM + "url", SM + "sitemap", SM + "loc", SM + "lastmod"
+IMAGE_LOC = IMAGE + "loc"
+
+
+@dataclass
+class SitemapEntry:
+    loc: str
+    lastmod: Optional[str] = None
+    images: List[str] = field(default_factory=list)
+
+
+@dataclass
+class _ChildSitemap:
+    loc: str
+
+
+_DONE = object()
+Item = Union[SitemapEntry, _ChildSitemap]
+
+
+def _chunks(url: str, user_agent: str) -> Iterator[bytes]:
+    """Body of `url` in chunks, gunzipped if it is a .gz file (Content-Encoding is handled by requests)."""
+    with client.get(url, headers={"User-Agent": user_agent}, timeout=TIMEOUT, stream=True) as r:
+        if r.status_code != 200:
+            return
+        inflate = None
+        for chunk in r.iter_content(CHUNK_SIZE):
+            if not chunk:
+                continue
+            if inflate is None:
+                inflate = zlib.decompressobj(16 + zlib.MAX_WBITS) if chunk[:2] == b"\x1f\x8b" else False
+            yield inflate.decompress(chunk) if inflate else chunk
+        if inflate:
+            yield inflate.flush()
+
+
+def parse_sitemap(url: str, user_agent: str) -> Iterator[Item]:
+    """Yield SitemapEntry for each <url> and _ChildSitemap for each index <sitemap>, streaming."""
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+    loc = lastmod = None
+    images: List[str] = []
+    try:
+        for chunk in _chunks(url, user_agent):
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == "start":
+                    if root is None:
+                        root = elem
+                    continue
+                tag = elem.tag
+                if tag == SM_LOC:
+                    loc = (elem.text or "").strip()
+                elif tag == SM_LASTMOD:
+                    lastmod = (elem.text or "").strip() or None
+                elif tag == IMAGE_LOC:
+                    if elem.text and elem.text.strip():
+                        images.append(elem.text.strip())
+                elif tag == SM_URL or tag == SM_SITEMAP:
+                    if loc:
+                        yield SitemapEntry(loc, lastmod, images) if tag == SM_URL else _ChildSitemap(loc)
+                    loc = lastmod = None
+                    images = []
+                    root.clear()
+        parser.close()
+    except Exception:
+        # Malformed XML or a network error: keep what was parsed, skip the rest
+        return
+
+
+def _read_into(q: "queue.Queue", url: str, user_agent: str, limiter: Optional[HostLimiter]) -> None:
+    try:
+        if limiter is not None:
+            limiter.bucket(url).wait()
+        batch: List[Item] = []
+        for item in parse_sitemap(url, user_agent):
+            batch.append(item)
+            if len(batch) >= BATCH_SIZE:
+                q.put(batch)
+                batch = []
+        if batch:
+            q.put(batch)
+    finally:
+        q.put(_DONE)
+
+
+def _start(url: str, user_agent: str, limiter: Optional[HostLimiter]) -> "queue.Queue":
+    # Bounded: a reader that gets ahead of the consumer blocks instead of buffering a whole sitemap
+    q: "queue.Queue" = queue.Queue(maxsize=QUEUE_SIZE)
+    threading.Thread(target=_read_into, args=(q, url, user_agent, limiter), daemon=True).start()
+    return q
+
+
+def _drain(q: "queue.Queue") -> Iterator[Item]:
+    while True:
+        batch = q.get()
+        if batch is _DONE:
+            return
+        yield from batch
+
+
+def iter_sitemap_entries(
+    sitemap_url: str,
+    user_agent: str,
+    keep: Callable[[str], bool] = lambda url: True,
+    concurrency: int = DEFAULT_SITEMAP_CONCURRENCY,
+    limiter: Optional[HostLimiter] = None,
+) -> Iterator[SitemapEntry]:
+    """Generator of unique SitemapEntry in sitemap (index) order. `keep` filters both page and child sitemap URLs."""
+    seen_sitemaps: Set[str] = set()
+    seen: Set[str] = set()
+
+    def walk(url: str) -> Iterator[SitemapEntry]:
+        seen_sitemaps.add(url)
+        children: List[str] = []
+        for item in _drain(_start(url, user_agent, limiter)):
+            if isinstance(item, _ChildSitemap):
+                if keep(item.loc) and item.loc not in seen_sitemaps:
+                    seen_sitemaps.add(item.loc)
+                    children.append(item.loc)
+            elif keep(item.loc) and item.loc not in seen:
+                seen.add(item.loc)
+                yield item
+        # Keep up to `concurrency` children streaming ahead of the one being consumed
+        todo = deque(children)
+        window: Deque[Tuple[str, "queue.Queue"]] = deque()
+        while todo or window:
+            while todo and len(window) < concurrency:
+                child = todo.popleft()
+                window.append((child, _start(child, user_agent, limiter)))
+            _, q = window.popleft()
+            for item in _drain(q):
+                if isinstance(item, _ChildSitemap):
+                    # nested index (rare): walk it in place
+                    if keep(item.loc) and item.loc not in seen_sitemaps:
+                        yield from walk(item.loc)
+                elif keep(item.loc) and item.loc not in seen:
+                    seen.add(item.loc)
+                    yield item
+
+    yield from walk(sitemap_url)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Local mirror of a theme's assets.
+
+The theme scripts used to fetch every .liquid asset from the Admin API, one at
+a time, on every run. ThemeMirror keeps the text assets of a theme under
+.cache/theme-{store}-{theme_id}/ with a manifest of each key's checksum and
+updated_at. sync() lists assets.json once, downloads only keys whose checksum
+(or updated_at, when Shopify reports no checksum) changed, concurrently, and
+drops keys that were deleted. Scripts then read from disk; put() writes through
+to the API and records the new checksum so the next sync does not re-download it.
+
+    mirror = open_theme(store, token, theme_id)
+    for key in mirror.keys(lambda k: k.endswith(".liquid")):
+        text = mirror.read(key)
+"""
+import base64
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from bob_shopify import admin_request
+
+
+DEFAULT_MIRROR_DIR = ".cache"
+DEFAULT_SYNC_WORKERS = 8
+# Text assets the scripts read; images and fonts are not mirrored
+TEXT_SUFFIXES = (".liquid", ".json", ".css", ".js", ".scss", ".svg", ".txt")
+
+
+def is_text_asset(key: str) -> bool:
+    return key.endswith(TEXT_SUFFIXES)
+
+
+def list_assets(store: str, token: str, theme_id: str) -> List[dict]:
+    """assets.json metadata: key, checksum, updated_at, size, content_type (no values)."""
+    r = admin_request("GET", store, token, f"/themes/{theme_id}/assets.json")
+    r.raise_for_status()
+    return [a for a in r.json().get("assets", []) if a.get("key")]
+
+
+def get_asset(store: str, token: str, theme_id: str, key: str) -> dict:
+    r = admin_request("GET", store, token, f"/themes/{theme_id}/assets.json", params={"asset[key]": key})
+    r.raise_for_status()
+    return r.json().get("asset", {})
+
+
+def put_asset(store: str, token: str, theme_id: str, key: str, value: str) -> dict:
+    r = admin_request("PUT", store, token, f"/themes/{theme_id}/assets.json", json={"asset": {"key": key, "value": value}})
+    if r.status_code >= 400:
+        try:
+            body = r.json()
+        except Exception:
+            body = {"raw": r.text[:500]}
+        raise RuntimeError(f"PUT {key} failed {r.status_code}: {body}")
+    return r.json().get("asset", {})
+
+
+def delete_asset(store: str, token: str, theme_id: str, key: str) -> None:
+    r = admin_request("DELETE", store, token, f"/themes/{theme_id}/assets.json", params={"asset[key]": key})
+    if r.status_code >= 400 and r.status_code != 404:
+        raise RuntimeError(f"DELETE {key} failed {r.status_code}: {r.text[:500]}")
+
+
+@dataclass
+class SyncResult:
+    downloaded: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    failed: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        failed = f", {len(self.failed)} failed" if self.failed else ""
+        return (
+            f"{len(self.downloaded)} downloaded, {len(self.removed)} removed, "
+            f"{self.unchanged} unchanged{failed} ({self.seconds:.1f}s)"
+        )
+
+
+class ThemeMirror:
+    def __init__(self, store: str, token: str, theme_id: str, root: Optional[str] = None):
+        self.store = store
+        self.token = token
+        self.theme_id = str(theme_id)
+        self.root = root or os.path.join(DEFAULT_MIRROR_DIR, f"theme-{store}-{theme_id}")
+        self.files_dir = os.path.join(self.root, "assets")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        self.manifest: Dict[str, dict] = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+    def _path(self, key: str) -> str:
+        parts = key.split("/")
+        if not key or key.startswith("/") or ".." in parts:
+            raise ValueError(f"Unexpected asset key: {key!r}")
+        return os.path.join(self.files_dir, *parts)
+
+    def _save_manifest(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=0, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    def _store(self, key: str, value: str, meta: dict) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(value)
+        self.manifest[key] = {"checksum": meta.get("checksum"), "updated_at": meta.get("updated_at"), "size": len(value.encode("utf-8"))}
+
+    @staticmethod
+    def _stale(have: Optional[dict], listed: dict) -> bool:
+        if have is None:
+            return True
+        if listed.get("checksum"):
+            return have.get("checksum") != listed["checksum"]
+        return have.get("updated_at") != listed.get("updated_at")
+
+    def sync(self, want: Callable[[str], bool] = is_text_asset, workers: int = DEFAULT_SYNC_WORKERS) -> SyncResult:
+        """Bring the mirror up to date with the theme: one listing call plus a GET per changed key."""
+        started = time.monotonic()
+        result = SyncResult()
+        listed = {a["key"]: a for a in list_assets(self.store, self.token, self.theme_id) if want(a["key"])}
+        stale = [key for key, meta in listed.items() if self._stale(self.manifest.get(key), meta)]
+        result.unchanged = len(listed) - len(stale)
+
+        def fetch(key: str):
+            try:
+                return key, get_asset(self.store, self.token, self.theme_id, key)
+            except Exception as e:
+                print(f"Theme mirror: {key} failed: {e}")
+                return key, None
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for key, asset in pool.map(fetch, stale):
+                if asset is None:
+                    result.failed.append(key)
+                    continue
+                if "value" in asset:
+                    value = asset["value"]
+                elif "attachment" in asset:
+                    # a text suffix stored as an attachment (e.g. an uploaded .svg)
+                    value = base64.b64decode(asset["attachment"]).decode("utf-8", "replace")
+                else:
+                    result.failed.append(key)
+                    continue
+                # the listing's checksum/updated_at is what the next sync compares against
+                self._store(key, value, listed[key])
+                result.downloaded.append(key)
+        for key in [k for k in self.manifest if k not in listed]:
+            self.manifest.pop(key)
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            result.removed.append(key)
+        self._save_manifest()
+        result.seconds = time.monotonic() - started
+        return result
+
+    def keys(self, want: Callable[[str], bool] = lambda key: True) -> List[str]:
+        return sorted(k for k in self.manifest if want(k))
+
+    def read(self, key: str) -> Optional[str]:
+        if key not in self.manifest:
+            return None
+        with open(self._path(key), encoding="utf-8", newline="") as f:
+            return f.read()
+
+    def put(self, key: str, value: str) -> None:
+        """Write an asset to the theme and to the mirror."""
+        asset = put_asset(self.store, self.token, self.theme_id, key, value)
+        self._store(key, value, asset)
+        self._save_manifest()
+
+    def delete(self, key: str) -> None:
+        """Delete an asset from the theme and from the mirror."""
+        delete_asset(self.store, self.token, self.theme_id, key)
+        if self.manifest.pop(key, None) is not None:
+            os.remove(self._path(key))
+            self._save_manifest()
+
+
+def open_theme(store: str, token: str, theme_id: str, sync: bool = True, workers: int = DEFAULT_SYNC_WORKERS) -> ThemeMirror:
+    """The theme's mirror, synced with the API unless sync=False (offline: read what is on disk)."""
+    mirror = ThemeMirror(store, token, theme_id)
+    if sync:
+        print(f"Theme {theme_id} mirror: {mirror.sync(workers=workers).summary()}", file=sys.stderr, flush=True)
+    return mirror
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Trigram index over a theme mirror (bob_theme) for fast regex search.
+
+Every mirrored asset's casefolded text is broken into trigrams, stored in
+SQLite next to the mirror (search.sqlite) as trigram -> keys postings. A
+query regex is parsed into the literal fragments any match must contain
+(AND across a sequence, OR across alternations; short or optional parts
+impose nothing), those fragments' trigrams pick the candidate keys, and only
+the candidates are scanned with the real regex. update() reindexes just the
+keys whose checksum changed in the mirror since the last run.
+
+    mirror = open_theme(store, token, theme_id)
+    index = ThemeIndex(mirror)
+    index.update()
+    for hit in index.search(r"star_star.*\\.svg", context=1):
+        print(hit.key, hit.line_no, hit.line)
+"""
+import bisect
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+from bob_theme import ThemeMirror
+
+
+MAX_ALTERNATIVES = 16  # literal variants tracked for a run like "ab[cd]e" before giving up on it
+MAX_CLASS_SIZE = 4  # character classes this small are expanded into literal variants
+_NEWLINE = re.compile("\n")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (key TEXT PRIMARY KEY, version TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS postings (tri TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tri, key)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_key ON postings (key);
+"""
+
+# A query over the index: ("lit", text), ("and", [q...]), ("or", [q...]); ALL matches every key
+Query = Tuple[str, object]
+ALL: Query = ("and", [])
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+if hasattr(sre_constants, "POSSESSIVE_REPEAT"):
+    _REPEATS.add(sre_constants.POSSESSIVE_REPEAT)
+_ATOMIC = getattr(sre_constants, "ATOMIC_GROUP", None)
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _class_literals(items) -> Optional[List[str]]:
+    """Characters of a small class made only of literals, e.g. [cd]; None for anything else."""
+    chars = []
+    for op, av in items:
+        if op is not sre_constants.LITERAL:
+            return None
+        chars.append(chr(av).casefold())
+    return sorted(set(chars)) if 0 < len(chars) <= MAX_CLASS_SIZE else None
+
+
+def _plan_seq(items) -> Query:
+    parts: List[Query] = []
+    alts = [""]
+
+    def flush():
+        nonlocal alts
+        if alts != [""]:
+            parts.append(("or", [("lit", a) for a in alts]) if len(alts) > 1 else ("lit", alts[0]))
+        alts = [""]
+
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            alts = [a + chr(av).casefold() for a in alts]
+            continue
+        if op is sre_constants.IN:
+            chars = _class_literals(av)
+            if chars and len(alts) * len(chars) <= MAX_ALTERNATIVES:
+                alts = [a + c for a in alts for c in chars]
+                continue
+        flush()
+        if op is sre_constants.SUBPATTERN:
+            parts.append(_plan_seq(av[-1]))
+        elif op is sre_constants.BRANCH:
+            parts.append(("or", [_plan_seq(branch) for branch in av[1]]))
+        elif op in _REPEATS:
+            lo, _, sub = av
+            if lo >= 1:
+                parts.append(_plan_seq(sub))
+        elif _ATOMIC is not None and op is _ATOMIC:
+            parts.append(_plan_seq(av))
+        # ANY, IN, AT, assertions, backreferences: no literal requirement
+    flush()
+    return ("and", parts)
+
+
+def plan(pattern: str, flags: int = 0) -> Query:
+    """The literal fragments (casefolded) that every match of `pattern` must contain."""
+    try:
+        return _plan_seq(sre_parse.parse(pattern, flags))
+    except Exception:
+        return ALL
+
+
+@dataclass
+class Hit:
+    key: str
+    line_no: int
+    line: str
+    before: List[str] = field(default_factory=list)
+    after: List[str] = field(default_factory=list)
+
+
+@dataclass
+class SearchStats:
+    candidates: int = 0
+    indexed: int = 0
+    files: int = 0
+    hits: int = 0
+    ms: float = 0.0
+
+    def summary(self) -> str:
+        return f"{self.hits} lines in {self.files} files ({self.candidates} of {self.indexed} assets scanned, {self.ms:.0f} ms)"
+
+
+class ThemeIndex:
+    def __init__(self, mirror: ThemeMirror, path: Optional[str] = None):
+        self.mirror = mirror
+        self.path = path or os.path.join(mirror.root, "search.sqlite")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript(SCHEMA)
+        self.stats = SearchStats()
+
+    @staticmethod
+    def _version(meta: dict) -> str:
+        return f"{meta.get('checksum')}|{meta.get('updated_at')}|{meta.get('size')}"
+
+    def update(self) -> Tuple[int, int]:
+        """Index keys added or changed in the mirror and drop removed ones. Returns (reindexed, removed)."""
+        indexed = dict(self.db.execute("SELECT key, version FROM docs"))
+        current = {key: self._version(meta) for key, meta in self.mirror.manifest.items()}
+        stale = [key for key, version in current.items() if indexed.get(key) != version]
+        removed = [key for key in indexed if key not in current]
+        with self.db:
+            for key in removed + stale:
+                self.db.execute("DELETE FROM postings WHERE key = ?", (key,))
+                self.db.execute("DELETE FROM docs WHERE key = ?", (key,))
+            for key in stale:
+                text = (self.mirror.read(key) or "").casefold()
+                self.db.executemany("INSERT INTO postings VALUES (?, ?)", ((tri, key) for tri in trigrams(text)))
+                self.db.execute("INSERT INTO docs VALUES (?, ?)", (key, current[key]))
+        return len(stale), len(removed)
+
+    def _postings(self, tri: str) -> Set[str]:
+        return {key for (key,) in self.db.execute("SELECT key FROM postings WHERE tri = ?", (tri,))}
+
+    def _eval(self, q: Query) -> Optional[Set[str]]:
+        """Keys that can match q; None means every key."""
+        kind, arg = q
+        if kind == "lit":
+            if len(arg) < 3 or not arg.isascii():
+                return None  # too short to index, or case folding beyond ASCII
+            keys: Optional[Set[str]] = None
+            for tri in sorted(trigrams(arg)):
+                keys = self._postings(tri) if keys is None else keys & self._postings(tri)
+                if not keys:
+                    return set()
+            return keys
+        if kind == "and":
+            keys = None
+            for sub in arg:
+                found = self._eval(sub)
+                if found is not None:
+                    keys = found if keys is None else keys & found
+            return keys
+        union: Set[str] = set()
+        for sub in arg:
+            found = self._eval(sub)
+            if found is None:
+                return None
+            union |= found
+        return union
+
+    def candidates(self, pattern: str, flags: int = 0, want: Callable[[str], bool] = lambda key: True) -> List[str]:
+        keys = self._eval(plan(pattern, flags))
+        universe = [key for (key,) in self.db.execute("SELECT key FROM docs ORDER BY key") if want(key)]
+        return universe if keys is None else [key for key in universe if key in keys]
+
+    def search(self, pattern: str, flags: int = re.I, context: int = 0, want: Callable[[str], bool] = lambda key: True) -> Iterator[Hit]:
+        """Matching lines of the indexed assets, by key then line number; self.stats describes the last search."""
+        started = time.monotonic()
+        rx = re.compile(pattern, flags)
+        keys = self.candidates(pattern, flags, want)
+        self.stats = SearchStats(candidates=len(keys), indexed=self.db.execute("SELECT COUNT(*) FROM docs").fetchone()[0])
+        for key in keys:
+            text = self.mirror.read(key) or ""
+            line_starts: Optional[List[int]] = None
+            seen: Dict[int, None] = {}
+            for m in rx.finditer(text):
+                if line_starts is None:
+                    line_starts = [0] + [nl.end() for nl in _NEWLINE.finditer(text)]
+                seen.setdefault(_line_of(line_starts, m.start()))
+            if not seen:
+                continue
+            # split on "\n" only, as line_starts does; splitlines() would also break on \r, \f, \x85, \u2028 ...
+            lines = [line[:-1] if line.endswith("\r") else line for line in text.split("\n")]
+            self.stats.files += 1
+            for n in seen:
+                self.stats.hits += 1
+                yield Hit(key, n + 1, lines[n], lines[max(0, n - context):n], lines[n + 1:n + 1 + context])
+        self.stats.ms = (time.monotonic() - started) * 1000
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def _line_of(line_starts: List[int], offset: int) -> int:
+    return bisect.bisect_right(line_starts, offset) - 1
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Audit warehouse: every image crawl as an indexed SQLite run.
+
+The pipeline used to hand data from script to script through dated CSVs
+(audits/brushonblock-images-*-YYYY-MM-DD.csv), each consumer picking the
+newest with sorted(glob(...))[-1], re-parsing all of it and splitting
+pages_found_on back into lists. The warehouse keeps each crawl as a run:
+
+- runs         run_id, kind, started, finished, source (the CSVs it was written with)
+- pages        page_url, page_title, lastmod, status per run
+- images       one row per canonical image URL: best alt, suggestions
+- page_images  one row per <img> found on a page (the by-page CSV), the
+               page <-> image edges; indexed both ways
+- fixes        prepare_bob_fixes' scoring of a run: priority and rename plan
+
+crawl_bob_images.py writes a run when it finishes; prepare_bob_fixes.py,
+derive_page_alt_stats.py and the apply scripts read the latest run (or
+--run ID) instead of the CSVs. The CSVs are still written, and any run can
+be exported again with scripts/audit_warehouse.py.
+
+    wh = Warehouse()
+    run_id = wh.latest_run()
+    for img in wh.image_rows(run_id):
+        print(img["image_url"], len(img["pages"]))
+"""
+import csv
+import datetime
+import json
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_WAREHOUSE = os.path.join("audits", "brushonblock-audit.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    started TEXT NOT NULL,
+    finished TEXT,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS pages (
+    run_id INTEGER NOT NULL,
+    page_url TEXT NOT NULL,
+    page_title TEXT,
+    lastmod TEXT,
+    status TEXT,
+    PRIMARY KEY (run_id, page_url)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS images (
+    run_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    image_url TEXT NOT NULL,
+    current_filename TEXT,
+    best_current_alt TEXT,
+    suggested_filename TEXT,
+    suggested_alt TEXT,
+    PRIMARY KEY (run_id, seq)
+) WITHOUT ROWID;
+CREATE UNIQUE INDEX IF NOT EXISTS images_url ON images (run_id, image_url);
+CREATE TABLE IF NOT EXISTS page_images (
+    run_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    page_url TEXT NOT NULL,
+    image_url TEXT NOT NULL,
+    canon TEXT NOT NULL,
+    current_filename TEXT,
+    suggested_filename TEXT,
+    current_alt TEXT,
+    suggested_alt TEXT,
+    has_alt INTEGER NOT NULL,  -- current_alt.strip() != ''
+    has_suggestion INTEGER NOT NULL,  -- suggested_alt.strip() != ''
+    PRIMARY KEY (run_id, seq)
+) WITHOUT ROWID;
+-- covers the per-page ALT counts (seq rides along as the primary key)
+CREATE INDEX IF NOT EXISTS page_images_page ON page_images (run_id, page_url, has_alt, has_suggestion);
+CREATE INDEX IF NOT EXISTS page_images_canon ON page_images (run_id, canon, page_url);
+CREATE TABLE IF NOT EXISTS fixes (
+    run_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    image_url TEXT NOT NULL,
+    scope TEXT,
+    decorative INTEGER,
+    score INTEGER,
+    reasons TEXT,
+    action TEXT,
+    rename_reason TEXT,
+    rename_steps TEXT,
+    PRIMARY KEY (run_id, position)
+) WITHOUT ROWID;
+"""
+
+BY_PAGE_COLUMNS = ["page_url", "image_url", "current_filename", "suggested_filename", "current_alt", "suggested_alt"]
+UNIQUE_COLUMNS = ["image_url", "current_filename", "pages_found_on", "best_current_alt", "suggested_filename", "suggested_alt"]
+
+
+def canonical_image_url(url: str) -> str:
+    return url.split("?", 1)[0]
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+class Warehouse:
+    def __init__(self, path: str = DEFAULT_WAREHOUSE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.executescript(SCHEMA)
+
+    # --- runs ---
+
+    def begin_run(self, kind: str = "images", source: Optional[dict] = None, started: Optional[str] = None) -> int:
+        """A new run; its rows are invisible to latest_run() until finish_run()."""
+        cur = self.db.execute(
+            "INSERT INTO runs (kind, started, source) VALUES (?, ?, ?)", (kind, started or _now(), json.dumps(source or {}))
+        )
+        return cur.lastrowid
+
+    def finish_run(self, run_id: int) -> None:
+        self.db.execute("UPDATE runs SET finished = ? WHERE run_id = ?", (_now(), run_id))
+        self.db.commit()
+
+    def latest_run(self, kind: str = "images") -> Optional[int]:
+        row = self.db.execute(
+            "SELECT MAX(run_id) FROM runs WHERE kind = ? AND finished IS NOT NULL", (kind,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def runs(self, kind: Optional[str] = None) -> List[dict]:
+        q = """
+            SELECT r.run_id, r.kind, r.started, r.finished, r.source,
+                   (SELECT COUNT(*) FROM pages p WHERE p.run_id = r.run_id),
+                   (SELECT COUNT(*) FROM images i WHERE i.run_id = r.run_id),
+                   (SELECT COUNT(*) FROM page_images e WHERE e.run_id = r.run_id)
+            FROM runs r WHERE (? IS NULL OR r.kind = ?) ORDER BY r.run_id
+        """
+        keys = ("run_id", "kind", "started", "finished", "source", "pages", "images", "page_images")
+        return [dict(zip(keys, row)) for row in self.db.execute(q, (kind, kind))]
+
+    def delete_run(self, run_id: int) -> None:
+        with self.db:
+            for table in ("fixes", "page_images", "images", "pages", "runs"):
+                self.db.execute(f"DELETE FROM {table} WHERE run_id = ?", (run_id,))
+
+    # --- writing a run ---
+
+    def add_pages(self, run_id: int, rows: Iterable[Sequence]) -> None:
+        """rows: (page_url, page_title, lastmod, status)."""
+        self.db.executemany("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)", ((run_id, *r) for r in rows))
+
+    def add_page_images(self, run_id: int, rows: Iterable[Sequence[str]]) -> int:
+        """rows: by-page CSV rows (BY_PAGE_COLUMNS order), in page order. Returns how many."""
+        n = 0
+
+        def gen():
+            nonlocal n
+            for n, (page_url, image_url, fname, s_name, alt, s_alt) in enumerate(rows, 1):
+                yield run_id, n, page_url, image_url, canonical_image_url(image_url), fname, s_name, alt, s_alt, int(bool(alt.strip())), int(bool(s_alt.strip()))
+
+        self.db.executemany("INSERT INTO page_images VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", gen())
+        return n
+
+    def add_images(self, run_id: int, rows: Iterable[Sequence[str]]) -> int:
+        """rows: unique CSV rows (UNIQUE_COLUMNS order); pages_found_on is not stored, the edges are."""
+        n = 0
+
+        def gen():
+            nonlocal n
+            for n, (image_url, fname, _pages, best_alt, s_name, s_alt) in enumerate(rows, 1):
+                yield run_id, n, image_url, fname, best_alt, s_name, s_alt
+
+        self.db.executemany("INSERT INTO images VALUES (?, ?, ?, ?, ?, ?, ?)", gen())
+        return n
+
+    def import_csvs(self, by_page_csv: str, unique_csv: str, started: Optional[str] = None) -> int:
+        """Load an image crawl's by-page and unique CSVs as a finished run (backfill of older audits)."""
+        run_id = self.begin_run("images", {"by_page_csv": by_page_csv, "unique_csv": unique_csv}, started)
+        with open(by_page_csv, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            self.add_page_images(run_id, reader)
+        with open(unique_csv, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            self.add_images(run_id, reader)
+        # pages seen in the crawl; titles are not in the CSVs
+        self.db.execute(
+            "INSERT OR IGNORE INTO pages (run_id, page_url, status) SELECT DISTINCT ?, page_url, 'imported' FROM page_images WHERE run_id = ?",
+            (run_id, run_id),
+        )
+        self.finish_run(run_id)
+        return run_id
+
+    # --- reading a run ---
+
+    def pages_by_image(self, run_id: int) -> Dict[str, List[str]]:
+        """Canonical image URL -> sorted distinct pages it appears on."""
+        out: Dict[str, List[str]] = {}
+        last = None
+        # the (run_id, canon, page_url) index yields duplicates next to each other; skipping them
+        # here is cheaper than a DISTINCT sort
+        for edge in self.db.execute("SELECT canon, page_url FROM page_images WHERE run_id = ? ORDER BY canon, page_url", (run_id,)):
+            if edge != last:
+                out.setdefault(edge[0], []).append(edge[1])
+                last = edge
+        return out
+
+    def image_rows(self, run_id: int) -> List[dict]:
+        """The unique-images view: UNIQUE_COLUMNS keys, plus `pages` as a list."""
+        pages = self.pages_by_image(run_id)
+        rows = []
+        for image_url, fname, best_alt, s_name, s_alt in self.db.execute(
+            "SELECT image_url, current_filename, best_current_alt, suggested_filename, suggested_alt FROM images WHERE run_id = ? ORDER BY seq",
+            (run_id,),
+        ):
+            found = pages.get(image_url, [])
+            rows.append({
+                "image_url": image_url,
+                "current_filename": fname,
+                "pages": found,
+                "pages_found_on": "; ".join(found),
+                "best_current_alt": best_alt,
+                "suggested_filename": s_name,
+                "suggested_alt": s_alt,
+            })
+        return rows
+
+    def page_image_rows(self, run_id: int, page_url: Optional[str] = None) -> List[dict]:
+        """The by-page view (BY_PAGE_COLUMNS keys), in crawl order; one page's rows if page_url is given."""
+        cols = ", ".join(BY_PAGE_COLUMNS)
+        if page_url is None:
+            cur = self.db.execute(f"SELECT {cols} FROM page_images WHERE run_id = ? ORDER BY seq", (run_id,))
+        else:
+            cur = self.db.execute(f"SELECT {cols} FROM page_images WHERE run_id = ? AND page_url = ? ORDER BY seq", (run_id, page_url))
+        return [dict(zip(BY_PAGE_COLUMNS, row)) for row in cur]
+
+    def iter_page_images(self, run_id: int) -> Iterable[Tuple[str, ...]]:
+        """The by-page rows as tuples (BY_PAGE_COLUMNS order), in crawl order, streamed from the cursor."""
+        return self.db.execute(f"SELECT {', '.join(BY_PAGE_COLUMNS)} FROM page_images WHERE run_id = ? ORDER BY seq", (run_id,))
+
+    def page_alt_stats(self, run_id: int) -> List[dict]:
+        """Per-page image/ALT counts, most contentful missing ALTs first (ties: more images, then crawl order)."""
+        q = """
+            SELECT page_url,
+                   COUNT(*) AS total_images,
+                   SUM(NOT has_alt AND has_suggestion) AS missing_alt_content,
+                   SUM(has_alt AND NOT has_suggestion) AS alt_should_be_empty,
+                   SUM(NOT has_suggestion) AS decorative_count
+            FROM page_images WHERE run_id = ?
+            GROUP BY page_url
+            ORDER BY missing_alt_content DESC, total_images DESC, MIN(seq)
+        """
+        keys = ("page_url", "total_images", "missing_alt_content", "alt_should_be_empty", "decorative_count")
+        return [dict(zip(keys, row)) for row in self.db.execute(q, (run_id,))]
+
+    # --- fixes (prepare_bob_fixes) ---
+
+    def set_fixes(self, run_id: int, rows: Iterable[dict]) -> None:
+        """Replace a run's scored fixes; rows in priority order with the `fixes` columns as keys."""
+        with self.db:
+            self.db.execute("DELETE FROM fixes WHERE run_id = ?", (run_id,))
+            self.db.executemany(
+                "INSERT INTO fixes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (run_id, pos, r["image_url"], r["scope"], int(r["decorative"]), r["score"], r["reasons"], r["action"], r["rename_reason"], r["rename_steps"])
+                    for pos, r in enumerate(rows, 1)
+                ),
+            )
+
+    def has_fixes(self, run_id: int) -> bool:
+        return self.db.execute("SELECT 1 FROM fixes WHERE run_id = ? LIMIT 1", (run_id,)).fetchone() is not None
+
+    def rename_plan(self, run_id: int) -> List[dict]:
+        """The rename plan (rename-plan CSV columns) of a run that prepare_bob_fixes has scored."""
+        pages = self.pages_by_image(run_id)
+        q = """
+            SELECT f.image_url, i.current_filename, i.suggested_filename, f.scope, f.rename_reason, f.rename_steps
+            FROM fixes f JOIN images i ON i.run_id = f.run_id AND i.image_url = f.image_url
+            WHERE f.run_id = ? AND f.rename_reason != '' ORDER BY f.position
+        """
+        rows = []
+        for image_url, fname, s_name, scope, reason, steps in self.db.execute(q, (run_id,)):
+            found = pages.get(image_url, [])
+            rows.append({
+                "image_url": image_url,
+                "current_filename": fname,
+                "suggested_filename": s_name,
+                "scope": scope,
+                "reason_for_rename": reason,
+                "recommended_steps": steps,
+                "pages_count": str(len(found)),
+                "pages_sample": "; ".join(found[:3]),
+            })
+        return rows
+
+    # --- CSV export ---
+
+    def export_by_page_csv(self, run_id: int, path: str) -> None:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(BY_PAGE_COLUMNS)
+            w.writerows(self.iter_page_images(run_id))
+
+    def export_unique_csv(self, run_id: int, path: str) -> None:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(UNIQUE_COLUMNS)
+            w.writerows([r[c] for c in UNIQUE_COLUMNS] for r in self.image_rows(run_id))
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def open_run(run_id: Optional[int] = None, path: str = DEFAULT_WAREHOUSE) -> Tuple[Optional[Warehouse], Optional[int]]:
+    """
+    (warehouse, run_id) for `run_id` or the latest finished image run; (None, None)
+    when there is no warehouse or no finished run yet (callers fall back to the CSVs).
+    """
+    if not os.path.exists(path):
+        if run_id is not None:
+            raise SystemExit(f"No audit warehouse at {path}.")
+        return None, None
+    wh = Warehouse(path)
+    if run_id is None:
+        run_id = wh.latest_run()
+        if run_id is None:
+            wh.close()
+            return None, None
+    elif not wh.db.execute("SELECT 1 FROM runs WHERE run_id = ? AND finished IS NOT NULL", (run_id,)).fetchone():
+        raise SystemExit(f"No finished run {run_id} in {path}.")
+    return wh, run_id
+
+
+def latest_image_rows(run_id: Optional[int] = None) -> Optional[List[dict]]:
+    """image_rows() of a run (default: the latest), or None without a warehouse run."""
+    wh, run_id = open_run(run_id)
+    if wh is None:
+        return None
+    try:
+        return wh.image_rows(run_id)
+    finally:
+        wh.close()
+
+
+def latest_rename_plan(run_id: Optional[int] = None) -> Optional[List[dict]]:
+    """rename_plan() of a run (default: the latest), or None if it has not been scored by prepare_bob_fixes."""
+    wh, run_id = open_run(run_id)
+    if wh is None:
+        return None
+    try:
+        return wh.rename_plan(run_id) if wh.has_fixes(run_id) else None
+    finally:
+        wh.close()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Bounded concurrent writer for Admin API mutations.
+
+WritePool runs up to `workers` writes at once; the shop's rate limit is still
+enforced by admin_request's shared throttle, so more workers only fill the
+time each call spends waiting on the network. Writes submitted under the same
+key (e.g. "page:123") run one after another in submission order. submit()
+blocks once `max_pending` writes are queued, so a producer walking a large
+store does not buffer every body in memory. Failed writes are kept with their
+error; retry_failures() runs them again unless a later write to the same key
+already succeeded.
+
+    pool = WritePool(workers=8)
+    for page in pages:
+        pool.submit(f"page:{page['id']}", page["title"], lambda p=page: rest_put(...))
+    pool.join()
+    pool.retry_failures()
+    print(pool.summary())
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional
+
+
+DEFAULT_WRITE_WORKERS = 4
+PENDING_PER_WORKER = 4
+
+
+@dataclass
+class Write:
+    key: str  # resource the write belongs to; same-key writes are serialized
+    label: str
+    fn: Callable[[], object]
+    seq: int = 0
+    attempts: int = 0
+    error: str = ""
+
+
+class WritePool:
+    def __init__(self, workers: int = DEFAULT_WRITE_WORKERS, max_pending: Optional[int] = None):
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        self._slots = threading.BoundedSemaphore(max_pending or self.workers * PENDING_PER_WORKER)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._chains: Dict[str, Deque[Write]] = {}  # key -> writes waiting behind the one running
+        self._last_ok: Dict[str, int] = {}  # key -> seq of its latest successful write
+        self._pending = 0
+        self._seq = 0
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+        self.succeeded = 0
+        self.superseded = 0  # failed writes not retried because a later one to the same key succeeded
+        self.failures: List[Write] = []
+
+    def submit(self, key: str, label: str, fn: Callable[[], object]) -> None:
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        self._enqueue(Write(key, label, fn, seq))
+
+    def _enqueue(self, w: Write) -> None:
+        self._slots.acquire()
+        with self._lock:
+            if self._started is None:
+                self._started = time.monotonic()
+            self._pending += 1
+            chain = self._chains.get(w.key)
+            if chain is not None:
+                chain.append(w)
+                return
+            self._chains[w.key] = deque()
+        self._executor.submit(self._run, w)
+
+    def _run(self, w: Write) -> None:
+        w.attempts += 1
+        try:
+            w.fn()
+            ok = True
+        except Exception as e:
+            w.error = f"{type(e).__name__}: {e}"
+            ok = False
+        self._slots.release()
+        with self._lock:
+            if ok:
+                self.succeeded += 1
+                self._last_ok[w.key] = max(self._last_ok.get(w.key, 0), w.seq)
+            else:
+                self.failures.append(w)
+            chain = self._chains[w.key]
+            nxt = chain.popleft() if chain else None
+            if nxt is None:
+                del self._chains[w.key]
+            self._pending -= 1
+            self._finished = time.monotonic()
+            if self._pending == 0:
+                self._idle.notify_all()
+        if nxt is not None:
+            self._executor.submit(self._run, nxt)
+
+    def join(self) -> None:
+        """Wait until every submitted write has finished."""
+        with self._lock:
+            while self._pending:
+                self._idle.wait()
+
+    def retry_failures(self) -> int:
+        """Run failed writes again (once per call) and wait for them; returns how many were retried."""
+        self.join()
+        with self._lock:
+            failed, self.failures = self.failures, []
+            # a newer write to the same resource already landed: retrying would put stale content back
+            retry = [w for w in failed if self._last_ok.get(w.key, 0) < w.seq]
+            self.superseded += len(failed) - len(retry)
+        for w in retry:
+            w.error = ""
+            self._enqueue(w)
+        self.join()
+        return len(retry)
+
+    def close(self) -> None:
+        self.join()
+        self._executor.shutdown()
+
+    def summary(self) -> str:
+        with self._lock:
+            elapsed = (self._finished - self._started) if self._started and self._finished else 0.0
+            done = self.succeeded + len(self.failures)
+            rate = f", {done / elapsed:.1f} writes/s" if elapsed > 0 else ""
+            superseded = f", {self.superseded} superseded" if self.superseded else ""
+            return f"{self.succeeded} writes ok, {len(self.failures)} failed{superseded} in {elapsed:.1f}s ({self.workers} workers{rate})"
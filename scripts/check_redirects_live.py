@@ -1,13 +1,13 @@
 #!/usr/bin/env python3
 import sys
-import requests
+from bob_client import client
 
 def main():
     ok = True
     for path in ("ai.txt", "llms.txt"):
         url = f"https://brushonblock.com/{path}"
         try:
-            r = requests.get(url, timeout=20)
+            r = client.get(url, timeout=20)
             print(f"{path} -> {r.status_code} ({len(r.content)} bytes)")
             if r.status_code != 200:
                 ok = False
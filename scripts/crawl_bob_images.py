@@ -1,22 +1,31 @@
 #!/usr/bin/env python3
+import argparse
 import csv
+import json
+import os
 import re
+import sqlite3
 import sys
 import time
-from collections import defaultdict
 from dataclasses import dataclass
-from html.parser import HTMLParser
-import html as htmllib
-from io import StringIO
-from typing import Dict, List, Optional, Set, Tuple
-
-try:
-    import requests
-except Exception:
-    print("This script requires the 'requests' package.")
-    sys.exit(1)
-
-import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from bob_html import PageDoc, parse_page
+from bob_warehouse import DEFAULT_WAREHOUSE, Warehouse
+from bob_crawl import (
+    Analyzer,
+    Crawler,
+    Page,
+    SitemapEntry,
+    add_crawl_args,
+    check_robots,
+    crawler_options,
+    frontier_entries,
+    gather_sitemap_entries,
+    http_cache_summary,
+    open_frontier,
+    run_frontier_worker,
+)
 
 
 BASE_DOMAIN = "brushonblock.com"
@@ -24,20 +33,10 @@ BASE_URL = f"https://{BASE_DOMAIN}"
 USER_AGENT = "ImageAuditBot/1.0 (+https://example.com)"
 RATE_LIMIT_SEC = 0.5  # 2 req/sec
 TIMEOUT = 20
-
-
-def http_get(url: str) -> Optional[requests.Response]:
-    try:
-        r = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=TIMEOUT)
-        if r.status_code == 200:
-            return r
-        return None
-    except Exception:
-        return None
-
-
-def is_same_host(url: str) -> bool:
-    return BASE_DOMAIN in url.split("/")[2] if url.startswith("http") else True
+# Per-page lastmod/title from the last run, used by --incremental
+STATE_PATH = os.path.join(".cache", "image-crawl-state.json")
+# Streaming run in progress; removed when the run completes
+CHECKPOINT_PATH = os.path.join(".cache", "image-crawl-checkpoint.sqlite")
 
 
 def canonicalize_image_url(url: str) -> str:
@@ -66,17 +65,6 @@ def slugify(text: str, max_words: int = 12) -> str:
     return "-".join(words)
 
 
-def derive_page_title(html: str) -> str:
-    # Prefer og:title -> <title>
-    m = re.search(r'<meta[^>]+property=["\']og:title["\'][^>]+content=["\']([^"\']+)["\']', html, re.I)
-    if m:
-        return htmllib.unescape(m.group(1).strip())
-    m = re.search(r"<title>(.*?)</title>", html, re.I | re.S)
-    if m:
-        return htmllib.unescape(re.sub(r"\s+", " ", m.group(1)).strip())
-    return ""
-
-
 def guess_is_product_page(url: str) -> bool:
     return "/products/" in url
 
@@ -142,197 +130,348 @@ class ImgRecord:
     page_title: str
 
 
-class ImgParser(HTMLParser):
-    def __init__(self):
-        super().__init__()
-        self.images: List[Tuple[str, str]] = []  # (src, alt)
-        self._in_title = False
-        self._title_buf = StringIO()
-
-    def handle_starttag(self, tag, attrs):
-        if tag.lower() == "img":
-            d = {k.lower(): v for k, v in attrs}
-            src = d.get("src") or d.get("data-src") or d.get("data-srcset") or ""
-            # If srcset provided and src empty, take first URL
-            if (not src) and "srcset" in d:
-                srcset = d.get("srcset", "")
-                if srcset:
-                    src = srcset.split(",")[0].strip().split(" ")[0]
-            alt = d.get("alt", "") or ""
-            if src:
-                self.images.append((src, alt))
-        elif tag.lower() == "title":
-            self._in_title = True
-
-    def handle_endtag(self, tag):
-        if tag.lower() == "title":
-            self._in_title = False
-
-    def handle_data(self, data):
-        if self._in_title:
-            self._title_buf.write(data)
-
-    def title(self) -> str:
-        return self._title_buf.getvalue().strip()
+def parse_images_from_html(html: str) -> Tuple[List[Tuple[str, str]], str]:
+    doc = parse_page(html, only=("images", "title"))
+    return doc.images, doc.page_title
 
 
-def parse_images_from_html(html: str) -> Tuple[List[Tuple[str, str]], str]:
-    parser = ImgParser()
-    parser.feed(html)
-    # Prefer og:title if available
-    title = derive_page_title(html) or parser.title()
-    return parser.images, title
-
-
-def gather_urls_from_sitemaps() -> List[str]:
-    urls: List[str] = []
-    seen_sitemaps: Set[str] = set()
-
-    def fetch_sitemap(url: str):
-        if url in seen_sitemaps:
-            return
-        seen_sitemaps.add(url)
-        time.sleep(RATE_LIMIT_SEC)
-        r = http_get(url)
-        if not r:
-            return
-        try:
-            root = ET.fromstring(r.text)
-        except Exception:
-            return
-        ns = {"sm": "http://www.sitemaps.org/schemas/sitemap/0.9"}
-        # If it's an index of sitemaps
-        for loc in root.findall(".//sm:sitemap/sm:loc", ns):
-            loc_url = loc.text.strip()
-            if is_same_host(loc_url):
-                fetch_sitemap(loc_url)
-        # If it's a urlset
-        for loc in root.findall(".//sm:url/sm:loc", ns):
-            loc_url = loc.text.strip()
-            if is_same_host(loc_url):
-                urls.append(loc_url)
-
-    # Start
-    fetch_sitemap(f"{BASE_URL}/sitemap.xml")
-    # Deduplicate, keep stable order
-    seen: Set[str] = set()
-    ordered = []
-    for u in urls:
-        if u not in seen:
-            seen.add(u)
-            ordered.append(u)
-    return ordered
-
-
-def check_robots() -> bool:
-    r = http_get(f"{BASE_URL}/robots.txt")
-    if not r:
-        return True
-    text = r.text
-    # crude: if Disallow: / for user-agent *
-    blocks_all = False
-    current = None
-    for line in text.splitlines():
-        line = line.strip()
-        if not line or line.startswith("#"):
-            continue
-        if line.lower().startswith("user-agent:"):
-            current = line.split(":", 1)[1].strip()
-        if line.lower().startswith("disallow:") and (current == "*"):
-            path = line.split(":", 1)[1].strip()
-            if path == "/":
-                blocks_all = True
-    return not blocks_all
+def records_from_doc(page_url: str, doc: PageDoc) -> Tuple[List[ImgRecord], str]:
+    records: List[ImgRecord] = []
+    title = doc.page_title
+    for src, alt in doc.images:
+        # Resolve relative URLs
+        if src.startswith("//"):
+            src = "https:" + src
+        elif src.startswith("/"):
+            src = BASE_URL + src
+        records.append(ImgRecord(
+            page_url=page_url,
+            image_url=src,
+            current_filename=filename_from_url(src),
+            current_alt=(alt or "").strip(),
+            page_title=title or "",
+        ))
+    return records, title or ""
+
+
+BY_PAGE_HEADER = ["page_url", "image_url", "current_filename", "suggested_filename", "current_alt", "suggested_alt"]
+UNIQUE_HEADER = ["image_url", "current_filename", "pages_found_on", "best_current_alt", "suggested_filename", "suggested_alt"]
+
+
+def by_page_row(r: ImgRecord) -> List[str]:
+    s_alt = suggest_alt(r.current_alt, r.page_title, r.current_filename, r.page_url)
+    s_name = suggest_filename(r.current_filename, s_alt or r.current_alt, r.page_title, r.page_url)
+    return [r.page_url, r.image_url, r.current_filename, s_name, r.current_alt, s_alt]
+
+
+def unique_row(canon: str, current_filename: str, pages: List[str], alts: List[str], page_titles: List[str]) -> List[str]:
+    pages = sorted(pages)
+    best_alt = sorted(alts, key=lambda s: (-len(s), s))[0] if alts else ""
+    # Heuristic page title for suggestion
+    page_title = sorted(page_titles, key=lambda s: (-len(s), s))[0] if page_titles else ""
+    s_alt = suggest_alt(best_alt, page_title, current_filename, pages[0] if pages else BASE_URL)
+    s_name = suggest_filename(current_filename, s_alt or best_alt, page_title, pages[0] if pages else BASE_URL)
+    return [canon, current_filename, "; ".join(pages), best_alt, s_name, s_alt]
+
+
+def load_crawl_state(path: str = STATE_PATH) -> Dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_crawl_state(by_page_csv: str, pages: Dict[str, Dict], path: str = STATE_PATH) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"by_page_csv": by_page_csv, "pages": pages}, f)
+    os.replace(tmp, path)
+
+
+CHECKPOINT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS plan (
+    seq INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    lastmod TEXT,
+    changed INTEGER NOT NULL,
+    title TEXT,
+    status TEXT
+);
+CREATE TABLE IF NOT EXISTS prev_rows (page_url TEXT, image_url TEXT, current_filename TEXT, current_alt TEXT);
+CREATE INDEX IF NOT EXISTS prev_rows_page ON prev_rows (page_url);
+CREATE TABLE IF NOT EXISTS image_info (canon TEXT PRIMARY KEY, current_filename TEXT);
+CREATE TABLE IF NOT EXISTS image_pages (canon TEXT, page_url TEXT, PRIMARY KEY (canon, page_url)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS image_alts (canon TEXT, alt TEXT, PRIMARY KEY (canon, alt)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS image_titles (canon TEXT, title TEXT, PRIMARY KEY (canon, title)) WITHOUT ROWID;
+"""
+
+
+class ImageCheckpoint:
+    """
+    SQLite checkpoint for a streaming image crawl: the page plan with a cursor,
+    the by-page CSV byte offset at the last commit, and the unique-image
+    aggregate (sets of pages/alts/titles per canonical URL) kept on disk.
+    """
+
+    def __init__(self, path: str = CHECKPOINT_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(CHECKPOINT_SCHEMA)
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set(self, key: str, value) -> None:
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, str(value)))
+
+    def add_records(self, records: Sequence[ImgRecord]) -> None:
+        for r in records:
+            canon = canonicalize_image_url(r.image_url)
+            self.db.execute("INSERT OR IGNORE INTO image_info VALUES (?, ?)", (canon, r.current_filename))
+            self.db.execute("INSERT OR IGNORE INTO image_pages VALUES (?, ?)", (canon, r.page_url))
+            if r.current_alt:
+                self.db.execute("INSERT OR IGNORE INTO image_alts VALUES (?, ?)", (canon, r.current_alt))
+            if r.page_title:
+                self.db.execute("INSERT OR IGNORE INTO image_titles VALUES (?, ?)", (canon, r.page_title))
+
+    def unique_rows(self) -> Iterator[List[str]]:
+        q = self.db.execute
+        for canon, fname in self.db.execute("SELECT canon, current_filename FROM image_info ORDER BY canon").fetchall():
+            pages = [p for (p,) in q("SELECT page_url FROM image_pages WHERE canon = ?", (canon,))]
+            alts = [a for (a,) in q("SELECT alt FROM image_alts WHERE canon = ?", (canon,))]
+            titles = [t for (t,) in q("SELECT title FROM image_titles WHERE canon = ?", (canon,))]
+            yield unique_row(canon, fname, pages, alts, titles)
+
+    def commit(self) -> None:
+        self.db.commit()
+
+    def close(self, remove: bool = False) -> None:
+        self.db.close()
+        if remove:
+            for suffix in ("", "-wal", "-shm", "-journal"):
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
+
+
+class ImageAnalyzer(Analyzer):
+    """
+    Streams by-page rows to disk as each page finishes and keeps the unique-image
+    aggregate in an on-disk checkpoint, so memory stays flat and an interrupted
+    run resumes where it stopped.
+
+    With incremental=True only pages that are new or whose sitemap lastmod
+    changed are fetched; the previous run's rows are reused for the rest and
+    pages that left the sitemap are dropped.
+    """
+
+    name = "images"
+
+    def __init__(
+        self,
+        entries: Sequence[SitemapEntry],
+        incremental: bool = False,
+        state_path: str = STATE_PATH,
+        checkpoint_path: str = CHECKPOINT_PATH,
+        warehouse_path: str = DEFAULT_WAREHOUSE,
+    ):
+        self.state_path = state_path
+        self.warehouse_path = warehouse_path
+        self.previous = load_crawl_state(state_path)
+        resuming = os.path.exists(checkpoint_path)
+        self.ckpt = ImageCheckpoint(checkpoint_path)
+        by_page = self.ckpt.get("by_page_csv")
+        if resuming and by_page and os.path.exists(by_page + ".partial"):
+            self.out_by_page = self.ckpt.get("by_page_csv")
+            self.out_unique = self.ckpt.get("unique_csv")
+            print(f"Resuming image crawl from checkpoint ({self.ckpt.get('cursor')} pages done).")
+        else:
+            self.ckpt.close(remove=True)
+            self.ckpt = ImageCheckpoint(checkpoint_path)
+            self._start(entries, incremental)
+
+        self.plan: List[Tuple[str, bool, str]] = []  # (url, changed, previous title)
+        self.seq: Dict[str, int] = {}
+        for seq, url, changed, title in self.ckpt.db.execute("SELECT seq, url, changed, title FROM plan ORDER BY seq"):
+            self.seq[url] = len(self.plan)
+            self.plan.append((url, bool(changed), title or ""))
+        self.cursor = int(self.ckpt.get("cursor", "0"))
+
+        partial = self.out_by_page + ".partial"
+        offset = int(self.ckpt.get("offset", "0"))
+        if offset:
+            # Drop any rows written after the last committed checkpoint
+            with open(partial, "r+b") as f:
+                f.truncate(offset)
+            self._f = open(partial, "a", newline="", encoding="utf-8")
+            self._w = csv.writer(self._f)
+        else:
+            self._f = open(partial, "w", newline="", encoding="utf-8")
+            self._w = csv.writer(self._f)
+            self._w.writerow(BY_PAGE_HEADER)
+            self._checkpoint()
+
+    def _start(self, entries: Sequence[SitemapEntry], incremental: bool) -> None:
+        date = time.strftime('%Y-%m-%d')
+        self.out_by_page = f"audits/brushonblock-images-by-page-{date}.csv"
+        self.out_unique = f"audits/brushonblock-images-unique-{date}.csv"
+        os.makedirs("audits", exist_ok=True)
+        prev_pages: Dict[str, Dict] = {}
+        prev_csv = self.previous.get("by_page_csv")
+        if incremental:
+            if prev_csv and os.path.exists(prev_csv):
+                prev_pages = self.previous.get("pages", {})
+                with open(prev_csv, newline="", encoding="utf-8") as f:
+                    self.ckpt.db.executemany(
+                        "INSERT INTO prev_rows VALUES (?, ?, ?, ?)",
+                        ((r["page_url"], r["image_url"], r["current_filename"], r["current_alt"]) for r in csv.DictReader(f)),
+                    )
+            else:
+                print("No previous image crawl state; running a full crawl.")
+        for seq, e in enumerate(entries):
+            prev = prev_pages.get(e.loc)
+            changed = prev is None or not e.lastmod or prev.get("lastmod") != e.lastmod
+            self.ckpt.db.execute(
+                "INSERT OR IGNORE INTO plan (seq, url, lastmod, changed, title) VALUES (?, ?, ?, ?, ?)",
+                (seq, e.loc, e.lastmod, int(changed), (prev or {}).get("title", "")),
+            )
+        if incremental and prev_pages:
+            current = {e.loc for e in entries}
+            changed_n = self.ckpt.db.execute("SELECT COUNT(*) FROM plan WHERE changed = 1").fetchone()[0]
+            print(f"Incremental: {changed_n} new/changed pages to re-crawl, {len(current) - changed_n} unchanged, {len(set(prev_pages) - current)} removed from sitemap.")
+        self.ckpt.set("by_page_csv", self.out_by_page)
+        self.ckpt.set("unique_csv", self.out_unique)
+        self.ckpt.set("started", time.strftime('%Y-%m-%dT%H:%M:%S'))
+        self.ckpt.set("cursor", 0)
+        self.ckpt.set("offset", 0)
+        self.ckpt.commit()
+
+    def _checkpoint(self) -> None:
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self.ckpt.set("cursor", self.cursor)
+        self.ckpt.set("offset", self._f.tell())
+        self.ckpt.commit()
+
+    def _write(self, url: str, records: List[ImgRecord], title: str, status: str) -> None:
+        for r in records:
+            self._w.writerow(by_page_row(r))
+        self.ckpt.add_records(records)
+        self.ckpt.db.execute("UPDATE plan SET title = ?, status = ? WHERE url = ?", (title, status, url))
+
+    def _reuse_previous(self, url: str, title: str, status: str) -> None:
+        rows = self.ckpt.db.execute(
+            "SELECT page_url, image_url, current_filename, current_alt FROM prev_rows WHERE page_url = ? ORDER BY rowid", (url,)
+        ).fetchall()
+        self._write(url, [ImgRecord(p, i, f, a, title) for p, i, f, a in rows], title, status)
+
+    def _advance_to(self, seq: int) -> None:
+        # Emit previous-run rows for unchanged pages that precede `seq` in sitemap order
+        while self.cursor < seq:
+            url, changed, prev_title = self.plan[self.cursor]
+            if not changed:
+                self._reuse_previous(url, prev_title, "unchanged")
+            self.cursor += 1
+
+    def wants(self, url: str) -> bool:
+        seq = self.seq.get(url)
+        return seq is not None and seq >= self.cursor and self.plan[seq][1]
+
+    @staticmethod
+    def extract(page: Page) -> Dict:
+        records, title = records_from_doc(page.url, page.doc)
+        return {"title": title, "images": [[r.image_url, r.current_filename, r.current_alt] for r in records]}
+
+    def absorb(self, url: str, data: Dict) -> None:
+        seq = self.seq[url]
+        self._advance_to(seq)
+        title = data["title"]
+        records = [ImgRecord(url, image_url, fname, alt, title) for image_url, fname, alt in data["images"]]
+        self._write(url, records, title, "fetched")
+        self.cursor = seq + 1
+        self._checkpoint()
+
+    def on_error(self, url: str) -> None:
+        seq = self.seq[url]
+        self._advance_to(seq)
+        # Refetch failed: keep last run's rows (if any); the page is retried next run
+        self._reuse_previous(url, self.plan[seq][2], "failed")
+        self.cursor = seq + 1
+        self._checkpoint()
+
+    def finish(self) -> List[str]:
+        self._advance_to(len(self.plan))
+        self._checkpoint()
+        self._f.close()
+
+        unique = list(self.ckpt.unique_rows())
+        with open(self.out_unique, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(UNIQUE_HEADER)
+            w.writerows(unique)
+        os.replace(self.out_by_page + ".partial", self.out_by_page)
+        run_id = self._store_run(unique)
+
+        pages: Dict[str, Dict] = {}
+        for url, lastmod, title, status in self.ckpt.db.execute("SELECT url, lastmod, title, status FROM plan ORDER BY seq"):
+            if status == "failed":
+                continue
+            pages[url] = {"lastmod": lastmod, "title": title or ""}
+        save_crawl_state(self.out_by_page, pages, self.state_path)
+        self.ckpt.close(remove=True)
+        return [self.out_by_page, self.out_unique, f"{self.warehouse_path} (run {run_id})"]
+
+    def _store_run(self, unique: List[List[str]]) -> int:
+        """Record the finished crawl in the audit warehouse; returns its run id."""
+        wh = Warehouse(self.warehouse_path)
+        run_id = wh.begin_run("images", {"by_page_csv": self.out_by_page, "unique_csv": self.out_unique}, started=self.ckpt.get("started"))
+        wh.add_pages(run_id, self.ckpt.db.execute("SELECT url, title, lastmod, status FROM plan ORDER BY seq"))
+        with open(self.out_by_page, newline="", encoding="utf-8") as f:
+            rows = csv.reader(f)
+            next(rows, None)
+            wh.add_page_images(run_id, rows)
+        wh.add_images(run_id, unique)
+        wh.finish_run(run_id)
+        wh.close()
+        return run_id
 
 
 def main():
-    ok = check_robots()
+    ap = argparse.ArgumentParser(description="Crawl the storefront and export image ALT/filename audits.")
+    add_crawl_args(ap, RATE_LIMIT_SEC, name="images")
+    ap.add_argument("--incremental", action="store_true", help="Re-fetch only pages new or changed (sitemap lastmod) since the last run and merge into its CSVs")
+    args = ap.parse_args()
+    options = crawler_options(args)
+    if args.worker:
+        run_frontier_worker(args, {ImageAnalyzer.name: ImageAnalyzer.extract}, USER_AGENT, options)
+        return
+
+    ok = check_robots(USER_AGENT)
     if not ok:
         print("robots.txt disallows crawling. Exiting.")
         sys.exit(2)
 
-    print("Fetching sitemaps…", flush=True)
-    all_urls = gather_urls_from_sitemaps()
-    print(f"Discovered {len(all_urls)} pages.")
+    frontier = open_frontier(args)
+    entries = frontier_entries(frontier)
+    if entries is None:
+        print("Fetching sitemaps…", flush=True)
+        entries = gather_sitemap_entries(f"{BASE_URL}/sitemap.xml", USER_AGENT)
+    print(f"Discovered {len(entries)} pages.")
 
-    records: List[ImgRecord] = []
-    for i, page in enumerate(all_urls, 1):
-        time.sleep(RATE_LIMIT_SEC)
-        r = http_get(page)
-        if not r:
-            continue
-        html = r.text
-        imgs, title = parse_images_from_html(html)
-        for src, alt in imgs:
-            # Resolve relative URLs
-            if src.startswith("//"):
-                src = "https:" + src
-            elif src.startswith("/"):
-                src = BASE_URL + src
-            rec = ImgRecord(
-                page_url=page,
-                image_url=src,
-                current_filename=filename_from_url(src),
-                current_alt=(alt or "").strip(),
-                page_title=title or "",
-            )
-            records.append(rec)
-        if i % 25 == 0:
-            print(f"Processed {i}/{len(all_urls)} pages…", flush=True)
-
-    # Write by-page CSV
-    out_by_page = f"audits/brushonblock-images-by-page-{time.strftime('%Y-%m-%d')}.csv"
-    out_unique = f"audits/brushonblock-images-unique-{time.strftime('%Y-%m-%d')}.csv"
-
-    os_pages: Dict[str, List[ImgRecord]] = defaultdict(list)
-    for r in records:
-        os_pages[r.page_url].append(r)
-
-    # Dedupe images by canonical URL
-    by_image: Dict[str, Dict] = {}
-    for r in records:
-        canon = canonicalize_image_url(r.image_url)
-        if canon not in by_image:
-            by_image[canon] = {
-                "image_url": canon,
-                "current_filename": r.current_filename,
-                "pages": set(),
-                "alts": set(),
-                "page_titles": set(),
-            }
-        by_image[canon]["pages"].add(r.page_url)
-        if r.current_alt:
-            by_image[canon]["alts"].add(r.current_alt)
-        if r.page_title:
-            by_image[canon]["page_titles"].add(r.page_title)
-
-    # Ensure audits folder exists
-    import os
-    os.makedirs("audits", exist_ok=True)
-
-    with open(out_by_page, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(["page_url", "image_url", "current_filename", "suggested_filename", "current_alt", "suggested_alt"]) 
-        for r in records:
-            s_alt = suggest_alt(r.current_alt, r.page_title, r.current_filename, r.page_url)
-            s_name = suggest_filename(r.current_filename, s_alt or r.current_alt, r.page_title, r.page_url)
-            w.writerow([r.page_url, r.image_url, r.current_filename, s_name, r.current_alt, s_alt])
-
-    with open(out_unique, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(["image_url", "current_filename", "pages_found_on", "best_current_alt", "suggested_filename", "suggested_alt"]) 
-        for canon, info in sorted(by_image.items()):
-            pages = sorted(info["pages"]) 
-            best_alt = sorted(info["alts"], key=lambda s: (-len(s), s))[0] if info["alts"] else ""
-            # Heuristic page title for suggestion
-            page_title = sorted(info["page_titles"], key=lambda s: (-len(s), s))[0] if info["page_titles"] else ""
-            s_alt = suggest_alt(best_alt, page_title, info["current_filename"], pages[0] if pages else BASE_URL)
-            s_name = suggest_filename(info["current_filename"], s_alt or best_alt, page_title, pages[0] if pages else BASE_URL)
-            w.writerow([canon, info["current_filename"], "; ".join(pages), best_alt, s_name, s_alt])
+    analyzer = ImageAnalyzer(entries, incremental=args.incremental)
+    outputs = Crawler([analyzer], user_agent=USER_AGENT, **options).run(
+        [e.loc for e in entries], frontier=frontier, lastmods={e.loc: e.lastmod for e in entries}
+    )
 
     print("Done.")
-    print(out_by_page)
-    print(out_unique)
+    if http_cache_summary():
+        print(http_cache_summary())
+    for path in outputs:
+        print(path)
 
 
 if __name__ == "__main__":
@@ -1,20 +1,24 @@
 #!/usr/bin/env python3
+import argparse
 import csv
+import os
 import time
-import re
-import sys
 from collections import defaultdict
-from html.parser import HTMLParser
-from io import StringIO
-from typing import Dict, List, Set, Tuple
-
-try:
-    import requests
-except Exception:
-    print("This script requires the 'requests' package.")
-    sys.exit(1)
-
-import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, List, Set, Tuple
+
+from bob_html import parse_page
+from bob_crawl import (
+    Analyzer,
+    Crawler,
+    Page,
+    add_crawl_args,
+    crawler_options,
+    frontier_entries,
+    gather_urls_from_sitemaps,
+    http_cache_summary,
+    open_frontier,
+    run_frontier_worker,
+)
 
 
 BASE_DOMAIN = "brushonblock.com"
@@ -24,100 +28,9 @@ RATE_LIMIT_SEC = 0.5
 TIMEOUT = 20
 
 
-def http_get(url: str):
-    try:
-        r = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=TIMEOUT)
-        if r.status_code == 200:
-            return r
-        return None
-    except Exception:
-        return None
-
-
-def is_same_host(url: str) -> bool:
-    return BASE_DOMAIN in url.split("/")[2] if url.startswith("http") else True
-
-
-def derive_page_title(html: str) -> str:
-    # Prefer og:title then <title>
-    m = re.search(r'<meta[^>]+property=["\']og:title["\'][^>]+content=["\']([^"\']+)["\']', html, re.I)
-    if m:
-        return m.group(1).strip()
-    m = re.search(r"<title>(.*?)</title>", html, re.I | re.S)
-    if m:
-        return re.sub(r"\s+", " ", m.group(1)).strip()
-    return ""
-
-
-class LinkParser(HTMLParser):
-    def __init__(self):
-        super().__init__()
-        self.links: List[str] = []
-        self._title_buf = StringIO()
-        self._in_title = False
-
-    def handle_starttag(self, tag, attrs):
-        if tag.lower() == "a":
-            d = {k.lower(): v for k, v in attrs}
-            href = d.get("href")
-            if href:
-                self.links.append(href)
-        elif tag.lower() == "title":
-            self._in_title = True
-
-    def handle_endtag(self, tag):
-        if tag.lower() == "title":
-            self._in_title = False
-
-    def handle_data(self, data):
-        if self._in_title:
-            self._title_buf.write(data)
-
-    def title(self) -> str:
-        return self._title_buf.getvalue().strip()
-
-
 def parse_links(html: str) -> Tuple[List[str], str]:
-    p = LinkParser()
-    p.feed(html)
-    title = derive_page_title(html) or p.title()
-    return p.links, title
-
-
-def gather_urls_from_sitemaps() -> List[str]:
-    urls: List[str] = []
-    seen_sitemaps: Set[str] = set()
-
-    def fetch_sitemap(url: str):
-        if url in seen_sitemaps:
-            return
-        seen_sitemaps.add(url)
-        time.sleep(RATE_LIMIT_SEC)
-        r = http_get(url)
-        if not r:
-            return
-        try:
-            root = ET.fromstring(r.text)
-        except Exception:
-            return
-        ns = {"sm": "http://www.sitemaps.org/schemas/sitemap/0.9"}
-        for loc in root.findall(".//sm:sitemap/sm:loc", ns):
-            loc_url = loc.text.strip()
-            if is_same_host(loc_url):
-                fetch_sitemap(loc_url)
-        for loc in root.findall(".//sm:url/sm:loc", ns):
-            loc_url = loc.text.strip()
-            if is_same_host(loc_url):
-                urls.append(loc_url)
-
-    fetch_sitemap(f"{BASE_URL}/sitemap.xml")
-    seen: Set[str] = set()
-    out = []
-    for u in urls:
-        if u not in seen:
-            seen.add(u)
-            out.append(u)
-    return out
+    doc = parse_page(html, only=("links", "title"))
+    return doc.links, doc.page_title
 
 
 def absolutize(href: str) -> str:
@@ -159,57 +72,84 @@ def is_blog_article(url: str) -> bool:
     return len(parts) == 3
 
 
-def main():
-    print("Fetching sitemap and pages…", flush=True)
-    all_pages = gather_urls_from_sitemaps()
-    print(f"Discovered {len(all_pages)} pages.")
+class LinkAnalyzer(Analyzer):
+    name = "links"
 
-    link_counts: Dict[str, int] = defaultdict(int)
-    linked_from: Dict[str, Set[str]] = defaultdict(set)
-
-    for i, page in enumerate(all_pages, 1):
-        time.sleep(RATE_LIMIT_SEC)
-        r = http_get(page)
-        if not r:
-            continue
-        html = r.text
-        links, _ = parse_links(html)
-        for href in links:
+    def __init__(self):
+        self.link_counts: Dict[str, int] = defaultdict(int)
+        self.linked_from: Dict[str, Set[str]] = defaultdict(set)
+        self.titles: Dict[str, str] = {}
+
+    @staticmethod
+    def extract(page: Page) -> Dict:
+        doc = page.doc
+        targets = []
+        for href in doc.links:
             abs_url = absolutize(href)
             if not abs_url or not abs_url.startswith("http"):
                 continue
             cu = canon(abs_url)
             if is_blog_article(cu):
-                link_counts[cu] += 1
-                linked_from[cu].add(page)
-        if i % 25 == 0:
-            print(f"Processed {i}/{len(all_pages)} pages…", flush=True)
-
-    # Fetch titles for each blog article
-    titles: Dict[str, str] = {}
-    for j, url in enumerate(link_counts.keys(), 1):
-        time.sleep(RATE_LIMIT_SEC)
-        r = http_get(url)
-        if r:
-            titles[url] = derive_page_title(r.text)
-
-    # Export CSV
-    import os, datetime
-    os.makedirs("audits", exist_ok=True)
-    out = f"audits/blog-internal-link-leaders-{time.strftime('%Y-%m-%d')}.csv"
-    with open(out, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(["blog_url", "title", "internal_link_count", "unique_pages_linking", "sample_sources"])
-        for url, count in sorted(link_counts.items(), key=lambda kv: kv[1], reverse=True):
-            pages = sorted(linked_from[url])
-            w.writerow([url, titles.get(url, ""), count, len(pages), "; ".join(pages[:3])])
-
-    # Print Top 10
-    top10 = sorted(link_counts.items(), key=lambda kv: kv[1], reverse=True)[:10]
-    print("Top 10 by internal links:")
-    for rank, (u, c) in enumerate(top10, 1):
-        print(f"{rank}. {titles.get(u, '')} — {c} links → {u}")
-    print(out)
+                targets.append(cu)
+        # Blog articles in the sitemap give us their title for free
+        title = doc.page_title if is_blog_article(canon(page.url)) else None
+        return {"title": title, "targets": targets}
+
+    def absorb(self, url: str, data: Dict) -> None:
+        if data["title"] is not None:
+            self.titles[canon(url)] = data["title"]
+        for cu in data["targets"]:
+            self.link_counts[cu] += 1
+            self.linked_from[cu].add(url)
+
+    def followups(self) -> Iterable[str]:
+        # Only fetch titles for linked articles the crawl did not visit
+        return [u for u in self.link_counts if u not in self.titles]
+
+    def on_followup(self, page: Page) -> None:
+        self.titles[page.url] = page.doc.page_title
+
+    def finish(self) -> List[str]:
+        os.makedirs("audits", exist_ok=True)
+        out = f"audits/blog-internal-link-leaders-{time.strftime('%Y-%m-%d')}.csv"
+        with open(out, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["blog_url", "title", "internal_link_count", "unique_pages_linking", "sample_sources"])
+            for url, count in sorted(self.link_counts.items(), key=lambda kv: kv[1], reverse=True):
+                pages = sorted(self.linked_from[url])
+                w.writerow([url, self.titles.get(url, ""), count, len(pages), "; ".join(pages[:3])])
+
+        # Print Top 10
+        top10 = sorted(self.link_counts.items(), key=lambda kv: kv[1], reverse=True)[:10]
+        print("Top 10 by internal links:")
+        for rank, (u, c) in enumerate(top10, 1):
+            print(f"{rank}. {self.titles.get(u, '')} — {c} links → {u}")
+        return [out]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Count internal links pointing at blog articles.")
+    add_crawl_args(ap, RATE_LIMIT_SEC, name="links")
+    args = ap.parse_args()
+    options = crawler_options(args)
+    if args.worker:
+        run_frontier_worker(args, {LinkAnalyzer.name: LinkAnalyzer.extract}, USER_AGENT, options)
+        return
+
+    frontier = open_frontier(args)
+    entries = frontier_entries(frontier)
+    if entries is not None:
+        all_pages = [e.loc for e in entries]
+    else:
+        print("Fetching sitemap and pages…", flush=True)
+        all_pages = gather_urls_from_sitemaps(f"{BASE_URL}/sitemap.xml", USER_AGENT)
+    print(f"Discovered {len(all_pages)} pages.")
+
+    outputs = Crawler([LinkAnalyzer()], user_agent=USER_AGENT, **options).run(all_pages, frontier=frontier)
+    if http_cache_summary():
+        print(http_cache_summary())
+    for path in outputs:
+        print(path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+One crawl pass for the full storefront audit.
+
+Fetches every sitemap page once and feeds it to the image, internal-link and
+heading-order analyzers. Outputs are the same files the individual scripts
+write (images by-page/unique CSVs, blog link leaders CSV, heading JSON + MD).
+"""
+import argparse
+import sys
+from typing import List
+
+from audit_heading_order import HeadingAnalyzer, pick_sample
+from bob_crawl import (
+    BASE_URL,
+    USER_AGENT,
+    Analyzer,
+    Crawler,
+    add_crawl_args,
+    check_robots,
+    crawler_options,
+    frontier_entries,
+    gather_sitemap_entries,
+    http_cache_summary,
+    open_frontier,
+    run_frontier_worker,
+)
+from crawl_bob_images import ImageAnalyzer
+from crawl_bob_links import LinkAnalyzer
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Single-pass storefront crawl feeding the image, link and heading audits.")
+    ap.add_argument("--sitemap", default=f"{BASE_URL}/sitemap.xml")
+    ap.add_argument("--heading-max-pages", type=int, default=200, help="Sample size for the heading audit")
+    ap.add_argument("--heading-out-prefix", default="brushonblock-heading-order")
+    ap.add_argument("--incremental-images", action="store_true", help="Image audit re-crawls only new/changed pages (sitemap lastmod); other analyzers still see every page")
+    ap.add_argument("--skip-images", action="store_true")
+    ap.add_argument("--skip-links", action="store_true")
+    ap.add_argument("--skip-headings", action="store_true")
+    add_crawl_args(ap, name="site")
+    args = ap.parse_args()
+    options = crawler_options(args)
+    if args.worker:
+        extractors = {a.name: a.extract for a in (ImageAnalyzer, LinkAnalyzer, HeadingAnalyzer)}
+        run_frontier_worker(args, extractors, USER_AGENT, options)
+        return
+
+    if not check_robots(USER_AGENT):
+        print("robots.txt disallows crawling. Exiting.")
+        sys.exit(2)
+
+    frontier = open_frontier(args)
+    entries = frontier_entries(frontier)
+    if entries is None:
+        print("Fetching sitemaps…", flush=True)
+        entries = gather_sitemap_entries(args.sitemap, USER_AGENT)
+    urls = [e.loc for e in entries]
+    if not urls:
+        print("No URLs discovered.")
+        sys.exit(2)
+    print(f"Discovered {len(urls)} pages.")
+
+    analyzers: List[Analyzer] = []
+    if not args.skip_images:
+        analyzers.append(ImageAnalyzer(entries, incremental=args.incremental_images))
+    if not args.skip_links:
+        analyzers.append(LinkAnalyzer())
+    if not args.skip_headings:
+        analyzers.append(HeadingAnalyzer(pick_sample(urls, args.heading_max_pages), args.heading_out_prefix))
+    if not analyzers:
+        print("All analyzers skipped; nothing to do.")
+        sys.exit(0)
+
+    crawler = Crawler(analyzers, user_agent=USER_AGENT, **options)
+    outputs = crawler.run(urls, frontier=frontier, lastmods={e.loc: e.lastmod for e in entries})
+    print(f"Done. Fetched {crawler.fetched} pages for {len(analyzers)} analyzers.")
+    if http_cache_summary():
+        print(http_cache_summary())
+    for path in outputs:
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
+import argparse
 import csv
 import glob
 import os
 from collections import defaultdict
 from datetime import datetime
+from typing import Dict, List, Tuple
+
+from bob_warehouse import open_run
 
 
 def latest_by_page_csv() -> str:
@@ -22,13 +26,7 @@ def slugify_page(url: str) -> str:
     return url
 
 
-def main():
-    src = latest_by_page_csv()
-    today = datetime.now().strftime('%Y-%m-%d')
-    out_pages = f"audits/brushonblock-top-pages-missing-alt-{today}.csv"
-    fixpack_dir = f"audits/fixpacks-{today}"
-    os.makedirs(fixpack_dir, exist_ok=True)
-
+def page_stats_from_csv(src: str) -> Tuple[List[dict], Dict[str, List[dict]]]:
     pages = defaultdict(list)
     with open(src, newline='', encoding='utf-8') as f:
         r = csv.DictReader(f)
@@ -53,6 +51,29 @@ def main():
 
     # Sort by contentful missing ALT desc then total images desc
     summary.sort(key=lambda x: (x['missing_alt_content'], x['total_images']), reverse=True)
+    return summary, pages
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Rank pages by missing ALT text and write fix packs for the top pages.")
+    ap.add_argument('--run', type=int, help='Audit warehouse run id (default: the latest)')
+    ap.add_argument('--csv', help='Read this by-page CSV instead of the audit warehouse')
+    args = ap.parse_args()
+
+    today = datetime.now().strftime('%Y-%m-%d')
+    out_pages = f"audits/brushonblock-top-pages-missing-alt-{today}.csv"
+    fixpack_dir = f"audits/fixpacks-{today}"
+    os.makedirs(fixpack_dir, exist_ok=True)
+
+    wh, run_id = open_run(args.run) if not args.csv else (None, None)
+    if wh is not None:
+        # counts are one GROUP BY over the run's page/image edges; fix packs one indexed lookup per page
+        print(f"Reading run {run_id} from {wh.path}")
+        summary = wh.page_alt_stats(run_id)
+        page_rows = lambda page_url: wh.page_image_rows(run_id, page_url)
+    else:
+        summary, pages = page_stats_from_csv(args.csv or latest_by_page_csv())
+        page_rows = pages.__getitem__
 
     with open(out_pages, 'w', newline='', encoding='utf-8') as f:
         w = csv.writer(f)
@@ -64,7 +85,7 @@ def main():
     top = summary[:25]
     for s in top:
         page_url = s['page_url']
-        rows = pages[page_url]
+        rows = page_rows(page_url)
         slug = slugify_page(page_url)
         out = os.path.join(fixpack_dir, f"{slug}.csv")
         with open(out, 'w', newline='', encoding='utf-8') as f:
@@ -73,10 +94,11 @@ def main():
             for r in rows:
                 w.writerow([r['page_url'], r['image_url'], r['current_filename'], r['current_alt'], r['suggested_alt'], r['suggested_filename']])
 
+    if wh is not None:
+        wh.close()
     print(out_pages)
     print(fixpack_dir)
 
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Byte size, pixel dimensions, format and cache headers of every audited image.
+
+Reads the unique images of the latest audit warehouse run (or --run ID, or a
+unique images CSV with --csv), probes each one with a HEAD and a small Range
+read (see bob_image_probe), and writes the heaviest first to
+audits/brushonblock-image-weights-YYYY-MM-DD.csv.
+
+The results are kept in .cache/image-index.sqlite, keyed by URL and ETag: a
+rerun only sends a conditional HEAD per image and reads the headers of the
+ones that changed.
+
+  python3 scripts/probe_bob_images.py
+  python3 scripts/probe_bob_images.py --csv audits/brushonblock-images-unique-2025-10-22.csv --heavy-kb 150
+"""
+import argparse
+import asyncio
+import csv
+import glob
+import os
+import sys
+from datetime import datetime
+from typing import List, Optional, Tuple, Union
+
+from bob_fetch import DEFAULT_CONCURRENCY, DEFAULT_RATE_PER_HOST, AsyncFetcher, HostLimiter
+from bob_image_probe import DEFAULT_IMAGE_INDEX_PATH, ImageEntry, ImageIndex, max_age, probe_image
+from bob_warehouse import latest_image_rows
+
+
+USER_AGENT = "ImageAuditBot/1.0 (+https://example.com)"
+HEAVY_KB = 200
+SHORT_CACHE_SEC = 7 * 24 * 3600
+LEGACY_FORMATS = {"jpeg", "png", "gif"}  # served although the request accepted WebP/AVIF
+
+WEIGHT_COLUMNS = [
+    "image_url", "bytes", "format", "width", "height", "megapixels", "bytes_per_pixel",
+    "pages_count", "content_type", "cache_control", "max_age", "etag", "notes", "error",
+]
+
+
+def latest_unique_csv() -> str:
+    paths = sorted(glob.glob("audits/brushonblock-images-unique-*.csv"))
+    if not paths:
+        raise SystemExit("No unique images CSV found. Run crawl first.")
+    return paths[-1]
+
+
+def load_images(csv_path: Optional[str], run_id: Optional[int]) -> List[dict]:
+    if not csv_path:
+        rows = latest_image_rows(run_id)
+        if rows is not None:
+            return rows
+    with open(csv_path or latest_unique_csv(), newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        row["pages"] = [p.strip() for p in row["pages_found_on"].split(";") if p.strip()]
+    return rows
+
+
+def notes_for(entry: ImageEntry, heavy_bytes: int) -> List[str]:
+    notes = []
+    if entry.bytes is not None and entry.bytes >= heavy_bytes:
+        notes.append("heavy")
+    if entry.format in LEGACY_FORMATS:
+        notes.append(f"served_as_{entry.format}")
+    if entry.width is None and entry.format != "svg":
+        notes.append("dimensions_unknown")
+    age = max_age(entry.cache_control)
+    if "no-store" in entry.cache_control or "no-cache" in entry.cache_control or (age is not None and age < SHORT_CACHE_SEC):
+        notes.append("short_cache")
+    elif age is None and not entry.expires:
+        notes.append("no_cache_lifetime")
+    return notes
+
+
+def weight_row(image: dict, result: Union[ImageEntry, Exception], heavy_bytes: int) -> dict:
+    row = dict.fromkeys(WEIGHT_COLUMNS, "")
+    row["image_url"] = image["image_url"]
+    row["pages_count"] = len(image["pages"])
+    if isinstance(result, Exception):
+        row["error"] = str(result) or type(result).__name__
+        return row
+    pixels = (result.width or 0) * (result.height or 0)
+    age = max_age(result.cache_control)
+    row.update(
+        bytes=result.bytes if result.bytes is not None else "",
+        format=result.format or "",
+        width=result.width or "",
+        height=result.height or "",
+        megapixels=f"{pixels / 1e6:.2f}" if pixels else "",
+        bytes_per_pixel=f"{result.bytes / pixels:.2f}" if pixels and result.bytes else "",
+        content_type=result.content_type,
+        cache_control=result.cache_control,
+        max_age=age if age is not None else "",
+        etag=result.etag,
+        notes="; ".join(notes_for(result, heavy_bytes)),
+    )
+    return row
+
+
+async def probe_all(urls: List[str], index: ImageIndex, concurrency: int, rate: float) -> List[Tuple[str, Union[ImageEntry, Exception]]]:
+    def probe(url: str) -> Union[ImageEntry, Exception]:
+        try:
+            return probe_image(url, index, USER_AGENT)
+        except Exception as e:
+            index.count(failed=1)
+            return e
+
+    fetcher = AsyncFetcher(probe, concurrency=concurrency, limiter=HostLimiter(rate))
+    results = []
+    try:
+        async for url, result in fetcher.map_ordered(urls):
+            results.append((url, result))
+            if len(results) % 100 == 0:
+                print(f"Probed {len(results)}/{len(urls)} images...")
+    finally:
+        fetcher.close()
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Probe every audited image for bytes, dimensions, format and cache headers.")
+    ap.add_argument("--run", type=int, help="Audit warehouse run id (default: the latest)")
+    ap.add_argument("--csv", help="Read this unique images CSV instead of the audit warehouse")
+    ap.add_argument("--index-path", default=DEFAULT_IMAGE_INDEX_PATH)
+    ap.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Probes in flight")
+    ap.add_argument("--rate", type=float, default=DEFAULT_RATE_PER_HOST, help="Max probes/sec per host")
+    ap.add_argument("--heavy-kb", type=float, default=HEAVY_KB, help="Flag images at least this large")
+    args = ap.parse_args()
+
+    images = load_images(args.csv, args.run)
+    if not images:
+        print("No images to probe.")
+        sys.exit(2)
+    by_url = {img["image_url"]: img for img in images}
+    urls = [u if u.startswith("http") else "https:" + u for u in by_url]
+
+    index = ImageIndex(args.index_path)
+    try:
+        results = asyncio.run(probe_all(urls, index, args.concurrency, args.rate))
+    finally:
+        index.close()
+
+    heavy_bytes = int(args.heavy_kb * 1000)
+    rows = [weight_row(image, result, heavy_bytes) for image, (_, result) in zip(by_url.values(), results)]
+    rows.sort(key=lambda r: -(r["bytes"] or 0))
+
+    out = f"audits/brushonblock-image-weights-{datetime.now().strftime('%Y-%m-%d')}.csv"
+    os.makedirs("audits", exist_ok=True)
+    with open(out, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=WEIGHT_COLUMNS)
+        w.writeheader()
+        w.writerows(rows)
+
+    total = sum(r["bytes"] or 0 for r in rows)
+    heavy = [r for r in rows if "heavy" in r["notes"]]
+    print(f"Images: {len(rows)}, {total / 1_000_000:.1f} MB; {len(heavy)} at or over {args.heavy_kb:g} KB")
+    for r in heavy[:10]:
+        print(f"  {r['bytes'] / 1000:.0f} KB  {r['format']} {r['width']}x{r['height']}  on {r['pages_count']} pages  {r['image_url']}")
+    print(index.stats.summary())
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,33 +3,67 @@
 Shopify apply script (dry-run by default).
 
 What it does:
-- Reads audits/brushonblock-images-unique-*.csv and prepares ALT updates.
-- Optionally, reads audits/brushonblock-rename-plan-*.csv and prepares rename swaps.
+- Reads the latest image run from the audit warehouse (bob_warehouse), or
+  audits/brushonblock-images-unique-*.csv without one, and prepares ALT updates.
+- Optionally, reads the rename plan (warehouse, or audits/brushonblock-rename-plan-*.csv)
+  and prepares rename swaps.
 
 How to run (later with access):
 - export SHOPIFY_STORE="yourstore"  # without .myshopify.com
 - export SHOPIFY_TOKEN="shpat_..."  # Admin API token
 - python3 scripts/shopify_apply_alt_and_rename.py --apply-alts --apply-renames --theme-staging-id 123456789 --confirm
 
+Products, pages and articles are listed with GraphQL bulk operations
+(--no-bulk falls back to REST since_id paging). Product media alts are written
+with one productUpdateMedia call per product and Files-library images (theme/
+global assets) with batched fileUpdate calls; each media id's outcome goes to
+audits/shopify-media-alt-results-YYYY-MM-DD.csv. With --no-bulk, product images
+are updated one REST PUT at a time and the Files library is skipped.
+
+With --confirm, every planned write is journaled under .cache/journal/ with
+the value it replaces before the first one is made (bob_journal). If the run
+dies, --resume --confirm finishes it from the journal without listing the
+store again; --rollback --confirm writes the previous values back.
+
+--delta limits the run to the images that changed between the last two
+crawls (the newest audits/brushonblock-images-delta-*.csv from
+scripts/audit_delta.py, or the path given).
+
 Defaults:
 - DRY RUN unless --confirm is passed.
 - API version set to 2024-10. Adjust if needed.
 """
 import argparse
-import base64
 import csv
+import datetime
 import glob
-import json
 import os
-import re
 import sys
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
-import requests
 from requests.exceptions import HTTPError, RequestException
 
-
-API_VERSION = os.getenv("SHOPIFY_API_VERSION", "2024-10")
+from bob_html import rewrite_img_alts
+from bob_delta import delta_image_urls
+from bob_journal import Entry, Handler, Journal, JournalError, Outcome, open_journal, rollback, run_entries
+from bob_shopify import (
+    MEDIA_BATCH_SIZE,
+    MediaAltResult,
+    admin_request,
+    export_blogs,
+    export_files,
+    export_pages,
+    export_products,
+    throttle_summary,
+    update_file_alts,
+    update_product_media_alts,
+    write_media_alt_results,
+)
+from bob_warehouse import latest_image_rows, latest_rename_plan
+from bob_writer import DEFAULT_WRITE_WORKERS
+
+
+JOURNAL_SCRIPT = "apply-alts"
 
 
 def require_env(name: str) -> str:
@@ -52,14 +86,9 @@ def canon(url: str) -> str:
     return url.split("?", 1)[0]
 
 
-def rest_base(store: str) -> str:
-    return f"https://{store}.myshopify.com/admin/api/{API_VERSION}"
-
-
 def rest_get(store: str, token: str, path: str, params: Optional[dict] = None) -> dict:
-    url = f"{rest_base(store)}{path}"
     try:
-        r = requests.get(url, headers={"X-Shopify-Access-Token": token})
+        r = admin_request("GET", store, token, path, params=params)
         r.raise_for_status()
         return r.json()
     except HTTPError as e:
@@ -69,9 +98,8 @@ def rest_get(store: str, token: str, path: str, params: Optional[dict] = None) -
 
 
 def rest_put(store: str, token: str, path: str, payload: dict) -> dict:
-    url = f"{rest_base(store)}{path}"
     try:
-        r = requests.put(url, json=payload, headers={"X-Shopify-Access-Token": token, "Content-Type": "application/json"})
+        r = admin_request("PUT", store, token, path, json=payload)
         r.raise_for_status()
         return r.json()
     except HTTPError as e:
@@ -81,9 +109,8 @@ def rest_put(store: str, token: str, path: str, payload: dict) -> dict:
 
 
 def rest_post(store: str, token: str, path: str, payload: dict) -> dict:
-    url = f"{rest_base(store)}{path}"
     try:
-        r = requests.post(url, json=payload, headers={"X-Shopify-Access-Token": token, "Content-Type": "application/json"})
+        r = admin_request("POST", store, token, path, json=payload)
         r.raise_for_status()
         return r.json()
     except HTTPError as e:
@@ -94,6 +121,10 @@ def rest_post(store: str, token: str, path: str, payload: dict) -> dict:
 
 def load_unique_csv(path: Optional[str]) -> List[dict]:
     if not path:
+        # latest audit warehouse run; the newest CSV if there is none
+        rows = latest_image_rows()
+        if rows is not None:
+            return rows
         path = latest("audits/brushonblock-images-unique-*.csv")
     with open(path, newline='', encoding='utf-8') as f:
         return list(csv.DictReader(f))
@@ -101,6 +132,9 @@ def load_unique_csv(path: Optional[str]) -> List[dict]:
 
 def load_rename_csv(path: Optional[str]) -> List[dict]:
     if not path:
+        rows = latest_rename_plan()
+        if rows is not None:
+            return rows
         path = latest("audits/brushonblock-rename-plan-*.csv")
     with open(path, newline='', encoding='utf-8') as f:
         return list(csv.DictReader(f))
@@ -145,13 +179,11 @@ def map_product_images_by_src(products: List[dict]):
     return m_full, m_fname_unique
 
 
-def update_product_image_alt(store: str, token: str, product_id: int, image_id: int, new_alt: str, dry_run: bool):
-    path = f"/products/{product_id}/images/{image_id}.json"
-    payload = {"image": {"id": image_id, "alt": new_alt}}
-    if dry_run:
-        print("DRY RUN: PUT", path, json.dumps(payload))
-        return
-    rest_put(store, token, path, payload)
+def match_image(url: str, m_full: Dict[str, dict], m_fname: Dict[str, dict]) -> Optional[dict]:
+    src = canon(url)
+    if src in m_full:
+        return m_full[src]
+    return m_fname.get(filename_only(src))
 
 
 def list_pages(store: str, token: str) -> List[dict]:
@@ -186,77 +218,96 @@ def list_articles(store: str, token: str, blog_id: int) -> List[dict]:
 
 
 def replace_img_alts_in_html(html: str, mapping: Dict[str, str], add_only: bool = False) -> str:
-    # Naive replace: for each src canonical, ensure alt exists/updated
-    # We will replace alt="..." or insert alt="..." after src
-    for src, alt in mapping.items():
-        # Match the img tag with this src (allow query strings in content)
-        pattern = re.compile(rf"(<img[^>]*?src=\"{re.escape(src)}[^\"]*\"[^>]*)(>)", re.I)
-
-        def repl(m):
-            tag_open = m.group(1)
-            end = m.group(2)
-            if re.search(r"\balt=\"[^\"]*\"", tag_open, re.I):
-                if add_only:
-                    # Leave existing alt intact
-                    return tag_open + end
-                else:
-                    tag_open2 = re.sub(r"\balt=\"[^\"]*\"", f'alt="{alt}"', tag_open, flags=re.I)
-                    return tag_open2 + end
-            else:
-                return tag_open + f' alt="{alt}"' + end
-
-        html = pattern.sub(repl, html)
-    return html
-
-
-def apply_alt_updates(store: str, token: str, unique_csv: str, confirm: bool, limit: Optional[int], update_products: bool = True, update_pages: bool = True, update_articles: bool = True):
-    dry = not confirm
-    if limit is None:
-        limit = 50 if dry else 25
+    # One tokenizer pass: each <img src> (canonicalized) is looked up in mapping; only alt spans change
+    return rewrite_img_alts(html, mapping, add_only=add_only, key=canon)
+
+
+def plan_media_alt_updates(store: str, token: str, journal: Journal, candidates: List[dict], limit: int, update_products: bool, update_files: bool) -> None:
+    """
+    Match CSV rows to product media first, then to the Files library, and plan the
+    changes in batches: one productUpdateMedia per product, fileUpdate for the rest.
+    """
+    products = export_products(store, token) if update_products else []
+    media_full, media_fname = map_product_images_by_src([{"id": p["id"], "images": p["media"]} for p in products])
+    files_full: Dict[str, dict] = {}
+    files_fname: Dict[str, dict] = {}
+    if update_files:
+        files_full, files_fname = map_product_images_by_src([{"id": None, "images": export_files(store, token)}])
+    seen = set()
+    product_ids = set()
+    product_updates = file_updates = 0
+    for r in candidates:
+        s_alt = r['suggested_alt'].strip()
+        match = match_image(r['image_url'], media_full, media_fname) if update_products else None
+        is_file = False
+        if match is None and update_files:
+            match = match_image(r['image_url'], files_full, files_fname)
+            is_file = True
+        if match is None or match['image']['id'] in seen or (match['image'].get('alt') or '') == s_alt:
+            continue
+        # Product media also show up in Files; update each media id once
+        media_id = match['image']['id']
+        seen.add(media_id)
+        before = match['image'].get('alt') or ''
+        if is_file:
+            if file_updates < limit:
+                journal.add("file_alt", {"media_id": media_id}, before, s_alt, key=media_id, batch=f"files:{file_updates // MEDIA_BATCH_SIZE}")
+                file_updates += 1
+        elif product_updates < limit:
+            product_id = match['product_id']
+            journal.add("product_media_alt", {"product_id": product_id, "media_id": media_id}, before, s_alt, key=media_id, batch=f"product:{product_id}")
+            product_ids.add(product_id)
+            product_updates += 1
+    print(f"Product media queued: {product_updates} across {len(product_ids)} products")
+    print(f"Files library images queued: {file_updates}")
+
+
+def plan_alt_updates(store: str, token: str, journal: Journal, unique_csv: Optional[str], limit: int, update_products: bool = True, update_pages: bool = True, update_articles: bool = True, bulk: bool = True, update_files: bool = True, only: Optional[Set[str]] = None) -> None:
+    """
+    List the store and journal every alt change (with the value it replaces); nothing
+    is written. only: canonical image URLs to consider (a delta), default all.
+    """
     rows = load_unique_csv(unique_csv)
+    if only is not None:
+        rows = [r for r in rows if canon(r['image_url']) in only]
+        print(f"Delta: {len(rows)} audited images added or changed since the previous crawl")
     # Build mapping for product image updates
     candidates = [r for r in rows if r['suggested_alt'].strip()]
-    # Products
-    if update_products:
+    # Products (and, in bulk mode, Files-library images such as theme/global assets)
+    if update_products and not bulk:
         products = list_products_with_images(store, token)
         img_map_full, img_map_fname = map_product_images_by_src(products)
         updates = 0
         for r in candidates:
-            src = canon(r['image_url'])
             s_alt = r['suggested_alt'].strip()
-            match = None
-            if src in img_map_full:
-                match = img_map_full[src]
-            else:
-                fname = filename_only(src)
-                if fname in img_map_fname:
-                    match = img_map_fname[fname]
+            match = match_image(r['image_url'], img_map_full, img_map_fname)
             if match is not None:
                 prod_id = match['product_id']
                 img = match['image']
                 if (img.get('alt') or '') != s_alt:
-                    update_product_image_alt(store, token, prod_id, img['id'], s_alt, dry)
+                    journal.add("product_image_alt", {"product_id": prod_id, "image_id": img['id']}, img.get('alt') or '', s_alt, key=f"image:{img['id']}")
                     updates += 1
                     if updates >= limit:
                         break
         print(f"Product images queued: {updates}")
-    else:
+    elif bulk and (update_products or update_files):
+        plan_media_alt_updates(store, token, journal, candidates, limit, update_products, update_files)
+    if not update_products:
         print("Product image updates skipped by flag.")
+    if update_files and not bulk:
+        print("Files library updates skipped: they need the GraphQL listing (drop --no-bulk).")
 
     # Pages and articles: build a mapping src->alt and rewrite HTML
     page_updates = 0
     mapping = {canon(r['image_url']): r['suggested_alt'].strip() for r in candidates}
     # Pages
     if update_pages:
-        for p in list_pages(store, token):
+        for p in export_pages(store, token) if bulk else list_pages(store, token):
             body = p.get('body_html') or ''
             new_body = replace_img_alts_in_html(body, mapping, add_only=True)
             if new_body != body:
-                if dry:
-                    title = p.get('title', '')
-                    print(f"DRY RUN: UPDATE PAGE id={p['id']} title=\"{title}\"")
-                else:
-                    rest_put(store, token, f"/pages/{p['id']}.json", {"page": {"id": p['id'], "body_html": new_body}})
+                title = p.get('title', '')
+                journal.add("page_body", {"id": p['id']}, body, new_body, key=f"page:{p['id']}", label=f"page id={p['id']} title=\"{title}\"")
                 page_updates += 1
                 if page_updates >= limit:
                     break
@@ -267,15 +318,18 @@ def apply_alt_updates(store: str, token: str, unique_csv: str, confirm: bool, li
     # Articles
     art_updates = 0
     if update_articles:
-        for b in list_blogs(store, token):
-            for a in list_articles(store, token, b['id']):
+        if bulk:
+            blogs, articles_by_blog = export_blogs(store, token)
+        else:
+            blogs = list_blogs(store, token)
+            articles_by_blog = None
+        for b in blogs:
+            articles = articles_by_blog[b['id']] if articles_by_blog is not None else list_articles(store, token, b['id'])
+            for a in articles:
                 body = a.get('body_html') or ''
                 new_body = replace_img_alts_in_html(body, mapping, add_only=True)
                 if new_body != body:
-                    if dry:
-                        print("DRY RUN: PUT /blogs/{blog_id}/articles/{id}.json", b['id'], a['id'])
-                    else:
-                        rest_put(store, token, f"/blogs/{b['id']}/articles/{a['id']}.json", {"article": {"id": a['id'], "body_html": new_body}})
+                    journal.add("article_body", {"blog_id": b['id'], "id": a['id']}, body, new_body, key=f"article:{a['id']}", label=f"article {b['id']}/{a['id']}")
                     art_updates += 1
                     if art_updates >= limit:
                         break
@@ -286,6 +340,111 @@ def apply_alt_updates(store: str, token: str, unique_csv: str, confirm: bool, li
         print("Blog article updates skipped by flag.")
 
 
+def alt_handlers(store: str, token: str, dry: bool, results: List[MediaAltResult]) -> Dict[str, Handler]:
+    """Journal handlers for each kind of alt change; revert=True writes the "before" values."""
+
+    def value(e: Entry, revert: bool) -> str:
+        return e.before if revert else e.after
+
+    def media_outcomes(out: List[MediaAltResult]) -> List[Outcome]:
+        results.extend(out)
+        return [(None, (r.error or "failed") if r.status == "failed" else "") for r in out]
+
+    def product_media(entries: List[Entry], revert: bool) -> List[Outcome]:
+        changes = [(e.target["media_id"], value(e, revert)) for e in entries]
+        return media_outcomes(update_product_media_alts(store, token, entries[0].target["product_id"], changes, dry_run=dry))
+
+    def files(entries: List[Entry], revert: bool) -> List[Outcome]:
+        return media_outcomes(update_file_alts(store, token, [(e.target["media_id"], value(e, revert)) for e in entries], dry_run=dry))
+
+    def rest(request: Callable[[Entry, str], Tuple[str, dict]]) -> Handler:
+        def handler(entries: List[Entry], revert: bool) -> List[Outcome]:
+            out: List[Outcome] = []
+            for e in entries:
+                path, payload = request(e, value(e, revert))
+                if dry:
+                    print(f"DRY RUN: PUT {path} ({e.label})")
+                    out.append((None, ""))
+                    continue
+                try:
+                    rest_put(store, token, path, payload)
+                    out.append((None, ""))
+                except (HTTPError, RequestException) as ex:
+                    out.append((None, str(ex)))
+            return out
+        return handler
+
+    return {
+        "product_media_alt": product_media,
+        "file_alt": files,
+        "product_image_alt": rest(lambda e, alt: (
+            f"/products/{e.target['product_id']}/images/{e.target['image_id']}.json",
+            {"image": {"id": e.target['image_id'], "alt": alt}},
+        )),
+        "page_body": rest(lambda e, body: (f"/pages/{e.target['id']}.json", {"page": {"id": e.target['id'], "body_html": body}})),
+        "article_body": rest(lambda e, body: (
+            f"/blogs/{e.target['blog_id']}/articles/{e.target['id']}.json",
+            {"article": {"id": e.target['id'], "body_html": body}},
+        )),
+    }
+
+
+def run_alt_journal(store: str, token: str, journal: Journal, dry: bool, write_workers: int = DEFAULT_WRITE_WORKERS, revert: bool = False) -> None:
+    """Apply the journal's pending entries (or, with revert, roll back its done ones)."""
+    results: List[MediaAltResult] = []
+    handlers = alt_handlers(store, token, dry, results)
+    # writes go through a bounded pool so several are in flight while admin_request keeps the pace
+    workers = 1 if dry else write_workers
+    if revert:
+        pool = rollback(journal, handlers, workers=workers)
+    else:
+        pool = run_entries(journal, journal.pending(), handlers, workers=workers)
+    if results:
+        out = f"audits/shopify-media-alt-results-{datetime.date.today().isoformat()}.csv"
+        write_media_alt_results(out, results)
+        failed = sum(1 for r in results if r.status == "failed")
+        print(f"Media alt results ({failed} failed): {out}")
+    if not dry:
+        print(f"Writes: {pool.summary()}")
+        print(f"Journal {journal.summary()}")
+    for w in pool.failures:
+        print(f"FAILED {w.label} after {w.attempts} attempts: {w.error}")
+    journal.close()
+
+
+def apply_alt_updates(store: str, token: str, unique_csv: str, confirm: bool, limit: Optional[int], update_products: bool = True, update_pages: bool = True, update_articles: bool = True, bulk: bool = True, update_files: bool = True, write_workers: int = DEFAULT_WRITE_WORKERS, only: Optional[Set[str]] = None):
+    dry = not confirm
+    if limit is None:
+        limit = 50 if dry else 25
+    # Every change is journaled (with its current value) before the first write; dry runs keep it in memory
+    journal = Journal() if dry else Journal.create(JOURNAL_SCRIPT, store, {"unique_csv": unique_csv, "limit": limit, "delta": only is not None})
+    plan_alt_updates(store, token, journal, unique_csv, limit, update_products, update_pages, update_articles, bulk, update_files, only)
+    journal.seal()
+    if not dry:
+        print(f"Journal: {journal.path} ({len(journal.entries)} writes planned; --resume continues it, --rollback undoes it)")
+    run_alt_journal(store, token, journal, dry, write_workers)
+
+
+def resume_or_rollback(store: str, token: str, journal_path: Optional[str], confirm: bool, revert: bool, write_workers: int) -> None:
+    """Continue an interrupted --confirm run from its journal, or undo it; no store listing either way."""
+    try:
+        journal = open_journal(JOURNAL_SCRIPT, store, journal_path)
+    except JournalError as e:
+        print(e)
+        sys.exit(1)
+    print(f"Journal {journal.summary()}")
+    if "plan" not in journal.sealed:
+        print("The run stopped while planning, before any write; run it again without --resume/--rollback.")
+        sys.exit(1)
+    entries = list(reversed(journal.done())) if revert else journal.pending()
+    if not confirm:
+        for e in entries:
+            print(f"DRY RUN: {'ROLLBACK' if revert else 'APPLY'} {e.kind} {e.label}")
+        print(f"{len(entries)} entries; pass --confirm to {'roll them back' if revert else 'apply them'}.")
+        return
+    run_alt_journal(store, token, journal, dry=False, write_workers=write_workers, revert=revert)
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument('--unique-csv', help='Path to images unique CSV')
@@ -294,15 +453,30 @@ def main():
     ap.add_argument('--apply-renames', action='store_true')
     ap.add_argument('--theme-staging-id', type=str, help='Theme ID for code updates (renames)')
     ap.add_argument('--confirm', action='store_true', help='Actually make changes (default dry-run)')
-    ap.add_argument('--limit', type=int, help='Limit updates per category (products/pages/articles). Default: 50 dry-run, 25 confirm')
+    ap.add_argument('--limit', type=int, help='Limit updates per category (products/files/pages/articles). Default: 50 dry-run, 25 confirm')
     ap.add_argument('--skip-products', action='store_true', help='Skip product media alt updates')
+    ap.add_argument('--skip-files', action='store_true', help='Skip Files library (theme/global image) alt updates')
     ap.add_argument('--skip-pages', action='store_true', help='Skip Page body_html alt updates')
     ap.add_argument('--skip-articles', action='store_true', help='Skip Blog Article body_html alt updates')
+    ap.add_argument('--no-bulk', action='store_true', help='List products/pages/articles with REST paging instead of GraphQL bulk operations')
+    ap.add_argument('--write-workers', type=int, default=DEFAULT_WRITE_WORKERS, help='Updates in flight at once (still paced by the API rate limit)')
+    ap.add_argument('--resume', nargs='?', const='', metavar='JOURNAL', help='Finish an interrupted --apply-alts --confirm run from its journal (default: the latest)')
+    ap.add_argument('--rollback', nargs='?', const='', metavar='JOURNAL', help='Write back the previous values of a journaled --apply-alts run (default: the latest)')
+    ap.add_argument('--delta', nargs='?', const='', metavar='DELTA_CSV', help='Only images an audit_delta.py images delta added or changed (default: the newest delta)')
     args = ap.parse_args()
 
     store = os.getenv('SHOPIFY_STORE')
     token = os.getenv('SHOPIFY_TOKEN')
 
+    if args.resume is not None or args.rollback is not None:
+        if not store or not token:
+            print('Set SHOPIFY_STORE and SHOPIFY_TOKEN env vars before applying.')
+            sys.exit(2)
+        revert = args.rollback is not None
+        resume_or_rollback(store, token, (args.rollback if revert else args.resume) or None, args.confirm, revert, args.write_workers)
+        print(throttle_summary())
+        return
+
     if args.apply_alts:
         if not store or not token:
             print('Set SHOPIFY_STORE and SHOPIFY_TOKEN env vars before applying.')
@@ -316,7 +490,12 @@ def main():
             update_products=not args.skip_products,
             update_pages=not args.skip_pages,
             update_articles=not args.skip_articles,
+            bulk=not args.no_bulk,
+            update_files=not args.skip_files,
+            write_workers=args.write_workers,
+            only=delta_image_urls(args.delta or None) if args.delta is not None else None,
         )
+        print(throttle_summary())
 
     if args.apply_renames:
         print('Rename workflow is more invasive and will:')
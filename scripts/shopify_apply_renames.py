@@ -1,54 +1,50 @@
 #!/usr/bin/env python3
 import argparse
-import base64
 import csv
 import io
 import os
-import re
 import sys
+from collections import Counter
 from typing import Dict, List, Optional, Tuple
 
-import requests
-from requests.exceptions import HTTPError
+from requests.exceptions import HTTPError, RequestException
 
+from bob_delta import delta_image_urls
+from bob_journal import DONE, Entry, Handler, Journal, JournalError, Outcome, open_journal, rollback, run_entries
+from bob_rename import Rename, RenameEngine
+from bob_shopify import ShopifyError, admin_request, file_create, file_delete, find_file, throttle_summary, upload_file_from_disk, wait_for_file_url
+from bob_theme import ThemeMirror, open_theme
+from bob_warehouse import latest_rename_plan
+from bob_writer import DEFAULT_WRITE_WORKERS
 
-API_VERSION = os.getenv("SHOPIFY_API_VERSION", "2024-10")
 
-
-def rest_base(store: str) -> str:
-    return f"https://{store}.myshopify.com/admin/api/{API_VERSION}"
+JOURNAL_SCRIPT = "apply-renames"
 
 
 def rest_get(store: str, token: str, path: str, params: Optional[dict] = None) -> dict:
-    url = f"{rest_base(store)}{path}"
-    r = requests.get(url, headers={"X-Shopify-Access-Token": token})
+    r = admin_request("GET", store, token, path, params=params)
     r.raise_for_status()
     return r.json()
 
 
 def rest_put(store: str, token: str, path: str, payload: dict) -> dict:
-    url = f"{rest_base(store)}{path}"
-    r = requests.put(url, json=payload, headers={"X-Shopify-Access-Token": token, "Content-Type": "application/json"})
+    r = admin_request("PUT", store, token, path, json=payload)
     r.raise_for_status()
     return r.json()
 
 
 def rest_post(store: str, token: str, path: str, payload: dict) -> dict:
-    url = f"{rest_base(store)}{path}"
-    r = requests.post(url, json=payload, headers={"X-Shopify-Access-Token": token, "Content-Type": "application/json"})
+    r = admin_request("POST", store, token, path, json=payload)
     r.raise_for_status()
     return r.json()
 
 
-def http_get_bytes(url: str) -> bytes:
-    r = requests.get(url, timeout=60)
-    r.raise_for_status()
-    return r.content
-
-
 def load_rename_plan(path: Optional[str]) -> List[dict]:
     if not path:
-        # pick latest
+        # latest audit warehouse run scored by prepare_bob_fixes; else the newest CSV
+        rows = latest_rename_plan()
+        if rows is not None:
+            return rows
         import glob
         paths = sorted(glob.glob("audits/brushonblock-rename-plan-*.csv"))
         if not paths:
@@ -82,114 +78,224 @@ def choose_initial_items(rows: List[dict], max_items: int) -> List[dict]:
     return picks[:max_items]
 
 
-def list_theme_asset_keys(store: str, token: str, theme_id: str) -> List[str]:
-    j = rest_get(store, token, f"/themes/{theme_id}/assets.json")
-    keys = []
-    for a in j.get('assets', []):
-        k = a.get('key')
-        if not k:
-            continue
-        # Focus on Liquid templates/snippets/sections/layout and settings_data
-        if k.endswith('.liquid') or k == 'config/settings_data.json':
-            keys.append(k)
-    return keys
+def is_rename_target(key: str) -> bool:
+    # Focus on Liquid templates/snippets/sections/layout and settings_data
+    return key.endswith('.liquid') or key == 'config/settings_data.json'
 
 
-def get_asset_value(store: str, token: str, theme_id: str, key: str) -> Optional[str]:
-    url = f"/themes/{theme_id}/assets.json?asset[key]={key}"
-    r = requests.get(rest_base(store) + url, headers={"X-Shopify-Access-Token": token})
-    r.raise_for_status()
-    data = r.json().get('asset', {})
-    if 'value' in data:
-        return data['value']
-    if 'attachment' in data:
-        # Binary; skip
-        return None
-    return None
+def upload_renamed_file(store: str, token: str, old_url: str, new_name: str, from_dir: Optional[str]) -> Tuple[str, str]:
+    """
+    Create the renamed copy in Files without downloading it: Shopify fetches old_url
+    itself (fileCreate originalSource), or a local replacement in from_dir is streamed
+    through a staged upload. Returns the new file's (gid, CDN URL).
+    """
+    local = os.path.join(from_dir, new_name) if from_dir else None
+    if local and os.path.isfile(local):
+        file_id = upload_file_from_disk(store, token, local, new_name)
+    else:
+        file_id = file_create(store, token, new_name, old_url)
+    return file_id, wait_for_file_url(store, token, file_id)
 
 
-def put_asset_value(store: str, token: str, theme_id: str, key: str, value: str):
-    payload = {"asset": {"key": key, "value": value}}
+def upload_asset_to_theme(store: str, token: str, theme_id: str, filename: str, source_url: str) -> str:
+    key = f"assets/{filename}"
+    # src: Shopify downloads the asset from the URL itself
+    payload = {"asset": {"key": key, "src": source_url}}
     rest_put(store, token, f"/themes/{theme_id}/assets.json", payload)
+    # Theme asset URL must be resolved at render-time via asset_url
+    return key
 
 
-def upload_file_to_files(store: str, token: str, filename: str, content: bytes) -> str:
-    payload = {"file": {"filename": filename, "attachment": base64.b64encode(content).decode('ascii')}}
-    j = rest_post(store, token, "/files.json", payload)
-    return j['file']['url']
+def plan_uploads(journal: Journal, items: List[dict], limit: int, from_dir: Optional[str]) -> None:
+    for r in items[:limit]:
+        target = {"old_url": canonical(r['image_url']), "old_name": r['current_filename'], "new_name": r['suggested_filename'], "from_dir": from_dir}
+        journal.add("upload", target, None, r['suggested_filename'], key=f"file:{r['suggested_filename']}", label=f"{r['current_filename']} -> {r['suggested_filename']}")
+    journal.seal("uploads")
 
 
-def upload_asset_to_theme(store: str, token: str, theme_id: str, filename: str, content: bytes, content_type: Optional[str] = None):
-    key = f"assets/{filename}"
-    payload = {"asset": {"key": key, "attachment": base64.b64encode(content).decode('ascii')}}
-    if content_type:
-        payload['asset']['content_type'] = content_type
-    rest_put(store, token, f"/themes/{theme_id}/assets.json", payload)
-    # Theme asset URL must be resolved at render-time via asset_url
-    return key
+def journaled_renames(journal: Journal) -> List[Rename]:
+    """The renames whose new file exists, from the journal's finished uploads."""
+    return [Rename(e.target['old_url'], e.target['old_name'], e.target['new_name'], e.result['url']) for e in journal.entries if e.kind == "upload" and e.state == DONE]
 
 
-def apply_renames(store: str, token: str, theme_id: str, items: List[dict], confirm: bool, limit: int) -> List[Tuple[str, str, str]]:
-    # returns list of (old_filename, new_filename, new_url)
-    changed: List[Tuple[str, str, str]] = []
-    asset_keys = list_theme_asset_keys(store, token, theme_id)
-    for i, r in enumerate(items[:limit], 1):
-        old_url = canonical(r['image_url'])
-        old_name = r['current_filename']
-        new_name = r['suggested_filename']
-        try:
-            content = http_get_bytes(old_url)
-        except Exception as e:
-            print(f"Skip {old_name}: failed to download ({e})")
+def plan_theme_updates(journal: Journal, mirror: ThemeMirror) -> None:
+    # Update theme code references (URLs, filename literals, file_url filters) for the
+    # whole plan in one pass over each asset; only the assets that change are journaled
+    engine = RenameEngine(journaled_renames(journal))
+    for key in mirror.keys(is_rename_target):
+        val = mirror.read(key)
+        if val is None:
             continue
-        # Upload new file into Files library
-        try:
-            new_url = upload_file_to_files(store, token, new_name, content)
-        except HTTPError as e:
-            # Fallback: upload as theme asset
-            print(f"Files API upload failed for {new_name}, falling back to theme asset. ({e})")
-            # Guess content-type by extension
-            ct = 'image/svg+xml' if new_name.lower().endswith('.svg') else None
-            asset_key = upload_asset_to_theme(store, token, theme_id, new_name, content, content_type=ct)
-            # Use Liquid asset_url expression as replacement token in .liquid files
-            new_url = f"{{{{ '{new_name}' | asset_url }}}}"
-
-        # Update theme code references (URLs and filename literals)
-        for key in asset_keys:
+        new_val, counts = engine.rewrite(val)
+        if new_val != val:
+            journal.add("theme_asset", {"key": key, "references": dict(counts)}, val, new_val, key=f"asset:{key}", label=key)
+    journal.seal("theme")
+
+
+def rename_handlers(store: str, token: str, mirror: ThemeMirror, confirm: bool, resuming: bool = False) -> Dict[str, Handler]:
+    """
+    Journal handlers: uploads (revert deletes the new file) and theme asset rewrites
+    (revert restores the old text). Without confirm neither writes anything: uploads
+    report the file they would create and stand in its predicted URL. When resuming, an upload that was in flight when
+    the run died may have landed without being journaled, so a file already stored
+    under the new name is adopted instead of creating a duplicate.
+    """
+
+    def uploads(entries: List[Entry], revert: bool) -> List[Outcome]:
+        out: List[Outcome] = []
+        for e in entries:
+            t = e.target
+            if revert:
+                try:
+                    if e.result.get('file_id'):
+                        file_delete(store, token, [e.result['file_id']])
+                    else:
+                        mirror.delete(e.result['asset_key'])
+                    out.append((None, ""))
+                except (ShopifyError, RequestException, RuntimeError) as ex:
+                    out.append((None, str(ex)))
+                continue
+            if not confirm:
+                # nothing is created: the theme rewrites are planned against the URL the file would get
+                source = os.path.join(t['from_dir'], t['new_name']) if t['from_dir'] and os.path.isfile(os.path.join(t['from_dir'], t['new_name'])) else t['old_url']
+                print(f"DRY RUN: would upload {t['new_name']} (from {source})")
+                out.append(({"url": f"{t['old_url'].rsplit('/', 1)[0]}/{t['new_name']}", "dry_run": True}, ""))
+                continue
             try:
-                val = get_asset_value(store, token, theme_id, key)
-            except Exception:
+                found = find_file(store, token, t['new_name']) if resuming else None
+                file_id, new_url = found or upload_renamed_file(store, token, t['old_url'], t['new_name'], t['from_dir'])
+                result = {"file_id": file_id, "url": new_url}
+            except (ShopifyError, RequestException) as ex:
+                # Fallback: theme asset, also fetched server-side
+                print(f"Files upload failed for {t['new_name']}, falling back to theme asset. ({ex})")
+                try:
+                    asset_key = upload_asset_to_theme(store, token, mirror.theme_id, t['new_name'], t['old_url'])
+                except HTTPError as ex:
+                    print(f"Skip {t['old_name']}: theme asset upload failed ({ex})")
+                    out.append((None, str(ex)))
+                    continue
+                # Use Liquid asset_url expression as replacement token in .liquid files
+                result = {"asset_key": asset_key, "url": f"{{{{ '{t['new_name']}' | asset_url }}}}"}
+            print(f"Prepared rename {t['old_name']} -> {t['new_name']}")
+            out.append((result, ""))
+        return out
+
+    def theme_assets(entries: List[Entry], revert: bool) -> List[Outcome]:
+        out: List[Outcome] = []
+        for e in entries:
+            replacements = sum(e.target['references'].values())
+            if not confirm:
+                print(f"DRY RUN: would update {e.label} ({replacements} replacements)")
+                out.append((None, ""))
                 continue
-            if not isinstance(val, str):
+            try:
+                mirror.put(e.target['key'], e.before if revert else e.after)
+            except (RuntimeError, RequestException) as ex:
+                out.append((None, str(ex)))
                 continue
-            new_val = val
-            if old_url in new_val:
-                new_val = new_val.replace(old_url, new_url)
-            # Replace file_url usage like 'old_name' | file_url with asset_url if we fell back
-            if old_name in new_val:
-                if "asset_url" in new_url:
-                    # Replace "'old' | file_url" with "'new' | asset_url"
-                    new_val = re.sub(rf"(['\"])\s*{re.escape(old_name)}\s*(['\"])\s*\|\s*file_url",
-                                     lambda m: f"'{new_name}' | asset_url", new_val)
-                else:
-                    new_val = new_val.replace(old_name, new_name)
-            if new_val != val:
-                if confirm:
-                    put_asset_value(store, token, theme_id, key, new_val)
-                    print(f"Updated {key}")
-                else:
-                    print(f"DRY RUN: would update {key}")
-        changed.append((old_name, new_name, new_url))
-        print(f"Prepared rename {old_name} -> {new_name}")
+            print(f"{'Restored' if revert else 'Updated'} {e.label}" + ("" if revert else f" ({replacements} replacements)"))
+            out.append((None, ""))
+        return out
+
+    return {"upload": uploads, "theme_asset": theme_assets}
+
+
+def report_failures(pool) -> None:
+    for w in pool.failures:
+        print(f"FAILED {w.label} after {w.attempts} attempts: {w.error}")
+
+
+def run_rename_journal(store: str, token: str, journal: Journal, mirror: ThemeMirror, confirm: bool, workers: int = DEFAULT_WRITE_WORKERS, resuming: bool = False) -> List[Tuple[str, str, str, int]]:
+    """
+    Run the journal's pending uploads, plan the theme rewrites from the uploads that
+    landed (unless an earlier run already did), then run the pending rewrites.
+    Returns (old_filename, new_filename, new_url, theme references replaced) per rename.
+    """
+    handlers = rename_handlers(store, token, mirror, confirm, resuming)
+    if "theme" not in journal.sealed:
+        report_failures(run_entries(journal, journal.pending(["upload"]), handlers, workers=workers))
+        plan_theme_updates(journal, mirror)
+    # theme rewrites run one at a time: each writes through to the mirror's manifest
+    report_failures(run_entries(journal, journal.pending(["theme_asset"]), handlers, workers=1))
+    touched: Counter = Counter()
+    for e in journal.entries:
+        if e.kind == "theme_asset" and e.state == DONE:
+            touched.update(e.target['references'])
+    return [(r.old_name, r.new_name, r.new_url, touched[r.old_name]) for r in journaled_renames(journal)]
+
+
+def apply_renames(store: str, token: str, theme_id: str, items: List[dict], confirm: bool, limit: int, from_dir: Optional[str] = None, workers: int = DEFAULT_WRITE_WORKERS) -> List[Tuple[str, str, str, int]]:
+    # returns list of (old_filename, new_filename, new_url, theme references replaced)
+    mirror = open_theme(store, token, theme_id)
+    # Uploads, then theme rewrites, are journaled before they run; dry runs keep the journal in memory
+    journal = Journal.create(JOURNAL_SCRIPT, store, {"theme_id": theme_id}) if confirm else Journal()
+    plan_uploads(journal, items, limit, from_dir)
+    if confirm:
+        print(f"Journal: {journal.path} (--resume continues it, --rollback undoes it)")
+    changed = run_rename_journal(store, token, journal, mirror, confirm, workers)
+    if confirm:
+        print(f"Journal {journal.summary()}")
+    journal.close()
     return changed
 
 
+def resume_or_rollback(store: str, token: str, journal_path: Optional[str], confirm: bool, revert: bool, workers: int) -> List[Tuple[str, str, str, int]]:
+    """Finish an interrupted --confirm run from its journal, or undo it; no store listing either way."""
+    try:
+        journal = open_journal(JOURNAL_SCRIPT, store, journal_path)
+    except JournalError as e:
+        print(e)
+        sys.exit(1)
+    print(f"Journal {journal.summary()}")
+    if "uploads" not in journal.sealed:
+        print("The run stopped while planning, before any write; run it again without --resume/--rollback.")
+        sys.exit(1)
+    if not confirm:
+        entries = list(reversed(journal.done())) if revert else journal.pending()
+        for e in entries:
+            print(f"DRY RUN: {'ROLLBACK' if revert else 'APPLY'} {e.kind} {e.label}")
+        if not revert and "theme" not in journal.sealed:
+            print("Theme rewrites are planned once the uploads finish.")
+        print(f"{len(entries)} entries; pass --confirm to {'roll them back' if revert else 'apply them'}.")
+        sys.exit(0)
+    # The mirror only needs a sync when the theme rewrites are still to be planned
+    mirror = open_theme(store, token, journal.meta['theme_id'], sync=not revert and "theme" not in journal.sealed)
+    if revert:
+        pool = rollback(journal, rename_handlers(store, token, mirror, confirm), workers=1)
+        print(f"Rollback: {pool.summary()}")
+        report_failures(pool)
+        changed = []
+    else:
+        changed = run_rename_journal(store, token, journal, mirror, confirm, workers, resuming=True)
+    print(f"Journal {journal.summary()}")
+    journal.close()
+    return changed
+
+
+def write_applied_log(changed: List[Tuple[str, str, str, int]]) -> None:
+    os.makedirs('audits', exist_ok=True)
+    import datetime
+    out = f"audits/rename-applied-{datetime.date.today().isoformat()}.csv"
+    with open(out, 'w', newline='', encoding='utf-8') as f:
+        w = csv.writer(f)
+        w.writerow(['old_filename', 'new_filename', 'new_url', 'theme_references'])
+        for o, n, u, refs in changed:
+            w.writerow([o, n, u, refs])
+    print(out)
+
+
 def main():
     ap = argparse.ArgumentParser(description="Apply file renames to a staging theme by uploading new Files and updating theme code references.")
-    ap.add_argument('--theme-id', required=True, help='Target staging theme ID (unpublished)')
+    ap.add_argument('--theme-id', help='Target staging theme ID (unpublished)')
     ap.add_argument('--rename-plan', help='Path to rename plan CSV')
     ap.add_argument('--limit', type=int, default=5, help='Max number of items to process')
+    ap.add_argument('--from-dir', help='Directory of replacement files named by suggested_filename; uploaded from disk instead of copied from the CDN')
+    ap.add_argument('--all', action='store_true', help='Take items from the whole rename plan, not just the initial homepage picks')
     ap.add_argument('--confirm', action='store_true', help='Apply changes (default dry-run)')
+    ap.add_argument('--write-workers', type=int, default=DEFAULT_WRITE_WORKERS, help='Uploads in flight at once')
+    ap.add_argument('--resume', nargs='?', const='', metavar='JOURNAL', help='Finish an interrupted --confirm run from its journal (default: the latest)')
+    ap.add_argument('--rollback', nargs='?', const='', metavar='JOURNAL', help='Restore the theme assets and delete the files a journaled --confirm run created (default: the latest)')
+    ap.add_argument('--delta', nargs='?', const='', metavar='DELTA_CSV', help='Only images an audit_delta.py images delta added or changed (default: the newest delta)')
     args = ap.parse_args()
 
     store = os.getenv('SHOPIFY_STORE')
@@ -198,23 +304,32 @@ def main():
         print('Set SHOPIFY_STORE and SHOPIFY_TOKEN env vars.')
         sys.exit(2)
 
+    if args.resume is not None or args.rollback is not None:
+        revert = args.rollback is not None
+        changed = resume_or_rollback(store, token, (args.rollback if revert else args.resume) or None, args.confirm, revert, args.write_workers)
+        if not revert:
+            write_applied_log(changed)
+        print(throttle_summary())
+        return
+    if not args.theme_id:
+        ap.error('--theme-id is required')
+
     rows = load_rename_plan(args.rename_plan)
-    items = choose_initial_items(rows, args.limit)
+    if args.delta is not None:
+        only = delta_image_urls(args.delta or None)
+        rows = [r for r in rows if canonical(r['image_url']) in only]
+        print(f"Delta: {len(rows)} rename plan items added or changed since the previous crawl")
+    if args.all:
+        items = [r for r in rows if r['suggested_filename'] and r['suggested_filename'] != r['current_filename']][:args.limit]
+    else:
+        items = choose_initial_items(rows, args.limit)
     if not items:
         print('No initial items found in rename plan.')
         sys.exit(0)
 
-    changed = apply_renames(store, token, args.theme_id, items, confirm=args.confirm, limit=args.limit)
-    # Log
-    os.makedirs('audits', exist_ok=True)
-    import datetime
-    out = f"audits/rename-applied-{datetime.date.today().isoformat()}.csv"
-    with open(out, 'w', newline='', encoding='utf-8') as f:
-        w = csv.writer(f)
-        w.writerow(['old_filename', 'new_filename', 'new_url'])
-        for o, n, u in changed:
-            w.writerow([o, n, u])
-    print(out)
+    changed = apply_renames(store, token, args.theme_id, items, confirm=args.confirm, limit=args.limit, from_dir=args.from_dir, workers=args.write_workers)
+    write_applied_log(changed)
+    print(throttle_summary())
 
 
 if __name__ == '__main__':
@@ -2,17 +2,11 @@
 import os
 import sys
 import json
-import requests
-
-API_VERSION = os.getenv("SHOPIFY_API_VERSION", "2024-10")
-
-def rest_base(store: str) -> str:
-    return f"https://{store}.myshopify.com/admin/api/{API_VERSION}"
+from bob_shopify import admin_request, throttle_summary
 
 def create_redirect(store: str, token: str, path: str, target: str) -> int:
-    url = f"{rest_base(store)}/redirects.json"
     payload = {"redirect": {"path": path, "target": target}}
-    r = requests.post(url, headers={"X-Shopify-Access-Token": token, "Content-Type": "application/json"}, json=payload, timeout=60)
+    r = admin_request("POST", store, token, "/redirects.json", json=payload)
     # 422 if exists; treat as success
     try:
         body = r.json()
@@ -32,6 +26,7 @@ def main():
     s1 = create_redirect(store, token, "/ai.txt", ai_url)
     s2 = create_redirect(store, token, "/llms.txt", llms_url)
     # Basic success criterion: both 201/200/202/422
+    print(throttle_summary())
     ok = all(code in (200,201,202,301,302,422) for code in (s1,s2))
     sys.exit(0 if ok else 1)
 
@@ -7,27 +7,18 @@ import sys
 from pathlib import Path
 from typing import Optional
 
-import requests
-
-
-API_VERSION = os.getenv("SHOPIFY_API_VERSION", "2024-10")
-
-
-def rest_base(store: str) -> str:
-    return f"https://{store}.myshopify.com/admin/api/{API_VERSION}"
+from bob_shopify import ShopifyError, admin_request, graphql, throttle_summary
 
 
 def rest_get(store: str, token: str, path: str, params: Optional[dict] = None) -> dict:
-    url = f"{rest_base(store)}{path}"
-    r = requests.get(url, headers={"X-Shopify-Access-Token": token}, params=params, timeout=60)
+    r = admin_request("GET", store, token, path, params=params)
     r.raise_for_status()
     return r.json()
 
 
 def rest_put_asset(store: str, token: str, theme_id: str, key: str, value: str):
-    url = f"{rest_base(store)}/themes/{theme_id}/assets.json"
     payload = {"asset": {"key": key, "value": value}}
-    r = requests.put(url, json=payload, headers={"X-Shopify-Access-Token": token, "Content-Type": "application/json"}, timeout=60)
+    r = admin_request("PUT", store, token, f"/themes/{theme_id}/assets.json", json=payload)
     if r.status_code >= 400:
         try:
             body = r.json()
@@ -38,8 +29,7 @@ def rest_put_asset(store: str, token: str, theme_id: str, key: str, value: str):
 
 
 def rest_get_asset(store: str, token: str, theme_id: str, key: str) -> str:
-    url = f"{rest_base(store)}/themes/{theme_id}/assets.json"
-    r = requests.get(url, params={"asset[key]": key}, headers={"X-Shopify-Access-Token": token}, timeout=60)
+    r = admin_request("GET", store, token, f"/themes/{theme_id}/assets.json", params={"asset[key]": key})
     r.raise_for_status()
     return r.json().get("asset", {}).get("value", "")
 
@@ -61,13 +51,6 @@ def add_render_to_head(html: str) -> str:
     return new
 
 
-def graphql(store: str, token: str, query: str, variables: dict) -> dict:
-    url = f"{rest_base(store)}/graphql.json"
-    r = requests.post(url, headers={"X-Shopify-Access-Token": token, "Content-Type": "application/json"}, json={"query": query, "variables": variables}, timeout=60)
-    r.raise_for_status()
-    return r.json()
-
-
 def file_create_text(store: str, token: str, filename: str, content: str) -> Optional[str]:
     # Try GraphQL fileCreate with a data URL
     data_url = "data:text/plain;base64," + base64.b64encode(content.encode("utf-8")).decode("ascii")
@@ -80,7 +63,10 @@ def file_create_text(store: str, token: str, filename: str, content: str) -> Opt
     }
     """
     vars = {"files": [{"filename": filename, "contentType": "TEXT", "originalSource": data_url}]}
-    j = graphql(store, token, q, vars)
+    try:
+        j = graphql(store, token, q, vars)
+    except ShopifyError:
+        return None
     # Resolve URL
     try:
         files = j["data"]["fileCreate"]["files"]
@@ -98,18 +84,17 @@ def file_create_text(store: str, token: str, filename: str, content: str) -> Opt
             q2 = """
             query($id: ID!) { node(id: $id) { __typename ... on MediaImage { image { url } } } }
             """
-            j2 = graphql(store, token, q2, {"id": rid})
             try:
+                j2 = graphql(store, token, q2, {"id": rid})
                 return j2["data"]["node"]["image"]["url"]
-            except Exception:
+            except (ShopifyError, KeyError, TypeError):
                 return None
     return None
 
 
 def create_redirect(store: str, token: str, path: str, target: str):
-    url = f"{rest_base(store)}/redirects.json"
     payload = {"redirect": {"path": path, "target": target}}
-    r = requests.post(url, headers={"X-Shopify-Access-Token": token, "Content-Type": "application/json"}, json=payload, timeout=60)
+    r = admin_request("POST", store, token, "/redirects.json", json=payload)
     # 422 if exists; ignore
     if r.status_code not in (200, 201, 202):
         try:
@@ -174,6 +159,7 @@ def main():
     print(f"  home:   https://brushonblock.com/?preview_theme_id={theme_id}")
     print(f"  ai.txt:   https://brushonblock.com/ai.txt?preview_theme_id={theme_id}")
     print(f"  llms.txt: https://brushonblock.com/llms.txt?preview_theme_id={theme_id}")
+    print(throttle_summary())
 
 
 if __name__ == "__main__":
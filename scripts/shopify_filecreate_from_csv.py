@@ -3,37 +3,19 @@ import csv
 import os
 import sys
 from typing import Optional
-import requests
 
-API_VERSION = os.getenv("SHOPIFY_API_VERSION", "2024-10")
+from requests.exceptions import RequestException
 
-def graphql(store: str, token: str, query: str, variables: dict) -> dict:
-    url = f"https://{store}.myshopify.com/admin/api/{API_VERSION}/graphql.json"
-    r = requests.post(url, headers={"X-Shopify-Access-Token": token, "Content-Type": "application/json"}, json={"query": query, "variables": variables}, timeout=60)
-    r.raise_for_status()
-    return r.json()
+from bob_shopify import ShopifyError, file_create, wait_for_file_url
 
 def file_create_image(store: str, token: str, filename: str, source_url: str) -> Optional[str]:
-    q = """
-    mutation fileCreate($files: [FileCreateInput!]!) {
-      fileCreate(files: $files) {
-        files { __typename ... on MediaImage { id image { url altText } } ... on GenericFile { id url } }
-        userErrors { field message }
-      }
-    }
-    """
-    vars = {"files": [{"filename": filename, "originalSource": source_url}]}
-    j = graphql(store, token, q, vars)
-    errs = j.get("data",{}).get("fileCreate",{}).get("userErrors")
-    if errs:
-        print("GraphQL userErrors:", errs)
-    files = j.get("data",{}).get("fileCreate",{}).get("files",[])
-    if not files:
+    # Shopify fetches source_url itself (originalSource); nothing is downloaded here
+    try:
+        file_id = file_create(store, token, filename, source_url)
+        return wait_for_file_url(store, token, file_id)
+    except (ShopifyError, RequestException) as e:
+        print("fileCreate failed:", e)
         return None
-    f = files[0]
-    if f.get("__typename") == "MediaImage":
-        return f.get("image",{}).get("url")
-    return f.get("url")
 
 def main():
     if len(sys.argv) < 2:
@@ -56,4 +38,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
@@ -1,32 +1,32 @@
 #!/usr/bin/env python3
+"""
+Fill empty product image ALT with the product title (dry-run by default).
+
+Products are listed with a GraphQL bulk operation and each product's missing
+alts are set with a single productUpdateMedia call; --no-bulk lists with REST
+paging and sends one PUT per image instead. Every media/image id is logged to
+audits/shopify-product-alt-fills-YYYY-MM-DD.csv with its status.
+"""
 import argparse
 import csv
+import datetime
 import os
 import sys
-import time
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
-import requests
 from requests.exceptions import HTTPError
 
-
-API_VERSION = os.getenv("SHOPIFY_API_VERSION", "2024-10")
-
-
-def rest_base(store: str) -> str:
-    return f"https://{store}.myshopify.com/admin/api/{API_VERSION}"
+from bob_shopify import admin_request, export_products, throttle_summary, update_product_media_alts
 
 
 def rest_get(store: str, token: str, path: str) -> dict:
-    url = f"{rest_base(store)}{path}"
-    r = requests.get(url, headers={"X-Shopify-Access-Token": token})
+    r = admin_request("GET", store, token, path)
     r.raise_for_status()
     return r.json()
 
 
 def rest_put(store: str, token: str, path: str, payload: dict) -> dict:
-    url = f"{rest_base(store)}{path}"
-    r = requests.put(url, json=payload, headers={"X-Shopify-Access-Token": token, "Content-Type": "application/json"})
+    r = admin_request("PUT", store, token, path, json=payload)
     r.raise_for_status()
     return r.json()
 
@@ -44,8 +44,8 @@ def list_all_products(store: str, token: str) -> List[dict]:
     return products
 
 
-def fill_missing_product_alts(store: str, token: str, confirm: bool, limit: int, sleep_sec: float = 0.15) -> int:
-    products = list_all_products(store, token)
+def fill_missing_product_alts(store: str, token: str, confirm: bool, limit: int, bulk: bool = True) -> int:
+    products = export_products(store, token) if bulk else list_all_products(store, token)
     queued = 0
     updates_csv_rows = []
     for p in products:
@@ -53,51 +53,71 @@ def fill_missing_product_alts(store: str, token: str, confirm: bool, limit: int,
         title = (p.get("title") or "").strip()
         if not title:
             continue
-        for img in p.get("images", []):
+        changes: List[Tuple[str, str]] = []
+        for img in p.get("media" if bulk else "images", []):
             alt = (img.get("alt") or "").strip()
             if alt:
                 continue
+            if queued >= limit:
+                break
+            queued += 1
+            if bulk:
+                changes.append((img["id"], title))
+                continue
             image_id = img.get("id")
             payload = {"image": {"id": image_id, "alt": title}}
             path = f"/products/{pid}/images/{image_id}.json"
+            status, error = "updated", ""
             if confirm:
                 try:
                     rest_put(store, token, path, payload)
                 except HTTPError as e:
                     # Log and continue
                     sys.stderr.write(f"Failed {path}: {e}\n")
-                    continue
-                time.sleep(sleep_sec)
+                    status, error = "failed", str(e)
             else:
                 print("DRY RUN:", path, payload)
-            queued += 1
+                status = "dry-run"
             updates_csv_rows.append({
                 "product_id": pid,
                 "product_title": title,
                 "image_id": image_id,
                 "new_alt": title,
+                "status": status,
+                "error": error,
             })
-            if queued >= limit:
-                break
+        if changes:
+            # one productUpdateMedia for all of this product's missing alts
+            for res in update_product_media_alts(store, token, pid, changes, dry_run=not confirm):
+                if res.status == "failed":
+                    sys.stderr.write(f"Failed {res.media_id}: {res.error}\n")
+                updates_csv_rows.append({
+                    "product_id": pid,
+                    "product_title": title,
+                    "image_id": res.media_id,
+                    "new_alt": res.alt,
+                    "status": res.status,
+                    "error": res.error,
+                })
         if queued >= limit:
             break
 
     # Write a quick log CSV
     os.makedirs("audits", exist_ok=True)
-    import datetime
     out = f"audits/shopify-product-alt-fills-{datetime.date.today().isoformat()}.csv"
     with open(out, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=["product_id", "product_title", "image_id", "new_alt"])
+        w = csv.DictWriter(f, fieldnames=["product_id", "product_title", "image_id", "new_alt", "status", "error"])
         w.writeheader()
         w.writerows(updates_csv_rows)
     print(out)
-    return queued
+    return sum(1 for row in updates_csv_rows if row["status"] != "failed")
 
 
 def main():
     ap = argparse.ArgumentParser(description="Fill empty product image ALT with product title")
     ap.add_argument("--confirm", action="store_true", help="Apply changes (without this it is dry-run)")
     ap.add_argument("--limit", type=int, default=200, help="Max number of image updates to perform")
+    ap.add_argument("--no-bulk", action="store_true", help="List products with REST paging instead of a GraphQL bulk operation")
     args = ap.parse_args()
 
     store = os.getenv("SHOPIFY_STORE")
@@ -106,9 +126,10 @@ def main():
         print("Set SHOPIFY_STORE and SHOPIFY_TOKEN env vars.")
         sys.exit(2)
 
-    count = fill_missing_product_alts(store, token, confirm=args.confirm, limit=args.limit)
+    count = fill_missing_product_alts(store, token, confirm=args.confirm, limit=args.limit, bulk=not args.no_bulk)
     mode = "APPLIED" if args.confirm else "DRY RUN" 
-    print(f"{mode}: queued {count} product image ALT updates")
+    print(f"{mode}: {count} product image ALT updates")
+    print(throttle_summary())
 
 
 if __name__ == "__main__":
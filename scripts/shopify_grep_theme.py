@@ -1,48 +1,71 @@
 #!/usr/bin/env python3
+"""
+Search a theme's assets with a regex (case-insensitive).
+
+The theme is mirrored locally (bob_theme) and searched through a trigram index
+(bob_theme_search), so only assets containing the pattern's literal fragments
+are scanned. Each run syncs the mirror and reindexes changed assets first;
+--offline skips the API entirely.
+
+  SHOPIFY_STORE=... SHOPIFY_TOKEN=... SHOPIFY_THEME_ID=... \\
+    python3 scripts/shopify_grep_theme.py "star_star_star" -C 2
+"""
+import argparse
 import os
 import re
 import sys
-from typing import List
-import requests
-
-API_VERSION = os.getenv("SHOPIFY_API_VERSION", "2024-10")
 
-def rest_base(store: str) -> str:
-    return f"https://{store}.myshopify.com/admin/api/{API_VERSION}"
+from bob_theme import open_theme
+from bob_theme_search import ThemeIndex
 
-def list_assets(store: str, token: str, theme_id: str) -> List[str]:
-    url = f"{rest_base(store)}/themes/{theme_id}/assets.json"
-    r = requests.get(url, headers={"X-Shopify-Access-Token": token}, timeout=60)
-    r.raise_for_status()
-    return [a["key"] for a in r.json().get("assets", []) if a.get("key")]
-
-def get_asset(store: str, token: str, theme_id: str, key: str) -> str:
-    url = f"{rest_base(store)}/themes/{theme_id}/assets.json"
-    r = requests.get(url, params={"asset[key]": key}, headers={"X-Shopify-Access-Token": token}, timeout=60)
-    r.raise_for_status()
-    return r.json().get("asset", {}).get("value", "")
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: shopify_grep_theme.py <pattern>")
-        sys.exit(2)
-    pattern = sys.argv[1]
+    ap = argparse.ArgumentParser(description="Regex search over a theme's assets (Liquid files by default).")
+    ap.add_argument("pattern")
+    ap.add_argument("-C", "--context", type=int, default=0, help="Lines of context around each match")
+    ap.add_argument("-l", "--files-with-matches", action="store_true", help="Print only the matching asset keys")
+    ap.add_argument("--all-assets", action="store_true", help="Search every mirrored text asset, not just .liquid")
+    ap.add_argument("--case-sensitive", action="store_true")
+    ap.add_argument("--offline", action="store_true", help="Search the local mirror without syncing it")
+    args = ap.parse_args()
+
     store = os.getenv("SHOPIFY_STORE")
     token = os.getenv("SHOPIFY_TOKEN")
     theme_id = os.getenv("SHOPIFY_THEME_ID")
-    if not (store and token and theme_id):
+    if not (store and token and theme_id) and not (args.offline and store and theme_id):
         print("Set SHOPIFY_STORE, SHOPIFY_TOKEN, SHOPIFY_THEME_ID.")
         sys.exit(2)
-    rx = re.compile(pattern, re.I)
-    keys = [k for k in list_assets(store, token, theme_id) if k.endswith('.liquid')]
-    for key in keys:
-        try:
-            val = get_asset(store, token, theme_id, key)
-        except Exception:
-            continue
-        if rx.search(val):
-            print(key)
+    try:
+        re.compile(args.pattern)
+    except re.error as e:
+        print(f"Bad pattern: {e}")
+        sys.exit(2)
+
+    mirror = open_theme(store, token or "", theme_id, sync=not args.offline)
+    index = ThemeIndex(mirror)
+    reindexed, removed = index.update()
+    if reindexed or removed:
+        print(f"Search index: {reindexed} reindexed, {removed} removed", file=sys.stderr)
+
+    want = (lambda key: True) if args.all_assets else (lambda key: key.endswith(".liquid"))
+    flags = 0 if args.case_sensitive else re.I
+    last_key = None
+    for hit in index.search(args.pattern, flags=flags, context=args.context, want=want):
+        if args.files_with_matches:
+            if hit.key != last_key:
+                print(hit.key)
+        else:
+            if args.context and last_key is not None:
+                print("--")
+            for i, line in enumerate(hit.before):
+                print(f"{hit.key}-{hit.line_no - len(hit.before) + i}-{line}")
+            print(f"{hit.key}:{hit.line_no}:{hit.line}")
+            for i, line in enumerate(hit.after):
+                print(f"{hit.key}-{hit.line_no + 1 + i}-{line}")
+        last_key = hit.key
+    print(index.stats.summary(), file=sys.stderr)
+    index.close()
+
 
 if __name__ == '__main__':
     main()
-
@@ -1,37 +1,17 @@
 #!/usr/bin/env python3
 import argparse
-import json
 import os
-import re
 import sys
-from typing import Dict, List
+from typing import Dict
 
-import requests
+from bob_theme import ThemeMirror, open_theme
 
 
-API_VERSION = os.getenv("SHOPIFY_API_VERSION", "2024-10")
-
-
-def rest_base(store: str) -> str:
-    return f"https://{store}.myshopify.com/admin/api/{API_VERSION}"
-
-
-def get_asset(store: str, token: str, theme_id: str, key: str) -> str:
-    url = f"{rest_base(store)}/themes/{theme_id}/assets.json"
-    r = requests.get(url, params={'asset[key]': key}, headers={"X-Shopify-Access-Token": token}, timeout=30)
-    r.raise_for_status()
-    return r.json().get('asset', {}).get('value', '')
-
-
-def put_asset(store: str, token: str, theme_id: str, key: str, value: str):
-    url = f"{rest_base(store)}/themes/{theme_id}/assets.json"
-    payload = {"asset": {"key": key, "value": value}}
-    r = requests.put(url, json=payload, headers={"X-Shopify-Access-Token": token, "Content-Type": "application/json"}, timeout=60)
-    r.raise_for_status()
-
-
-def patch_refs(store: str, token: str, theme_id: str, key: str, mapping: Dict[str, str], confirm: bool):
-    before = get_asset(store, token, theme_id, key)
+def patch_refs(mirror: ThemeMirror, key: str, mapping: Dict[str, str], confirm: bool):
+    before = mirror.read(key)
+    if before is None:
+        print(f"No such asset {key}")
+        return
     after = before
     changes = []
     for old, new in mapping.items():
@@ -40,7 +20,7 @@ def patch_refs(store: str, token: str, theme_id: str, key: str, mapping: Dict[st
             changes.append((old, new))
     if changes:
         if confirm:
-            put_asset(store, token, theme_id, key, after)
+            mirror.put(key, after)
             print(f"Updated {key} -> {len(changes)} replacements")
         else:
             print(f"DRY RUN: would update {key} -> {len(changes)} replacements")
@@ -72,8 +52,9 @@ def main():
         old, new = m.split('=', 1)
         mapping[old] = new
 
+    mirror = open_theme(store, token, args.theme_id)
     for key in args.key:
-        patch_refs(store, token, args.theme_id, key, mapping, args.confirm)
+        patch_refs(mirror, key, mapping, args.confirm)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the parts of the Shopify Admin API the shopify_* scripts use.
+
+Serves a generated catalog (products with images/media, a Files library,
+pages, blogs with articles, one theme's assets) over REST (since_id paging,
+PUT updates, assets.json with checksums, redirects.json) and
+GraphQL (bulkOperationRunQuery, bulk operation polling via node(id:), JSONL
+download, productUpdateMedia, fileUpdate, fileCreate with file status polling,
+fileDelete, and stagedUploadsCreate with PUT targets served under /staged/). Rate limits behave like
+Shopify's: a REST leaky bucket reported in X-Shopify-Shop-Api-Call-Limit (429
+with Retry-After when full) and GraphQL cost points reported in
+extensions.cost.throttleStatus (THROTTLED errors when exhausted). State lives
+in memory and resets on restart. Use it to exercise the scripts without a real store:
+
+  python3 scripts/shopify_standin_server.py --products 2000 --latency 0.2 &
+  export SHOPIFY_ADMIN_URL=http://127.0.0.1:8899 SHOPIFY_STORE=standin SHOPIFY_TOKEN=x
+  python3 scripts/shopify_fill_missing_product_alts.py
+"""
+import argparse
+import base64
+import datetime
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+CDN = "https://cdn.shopify.com/s/files/1/0000/0001"
+
+
+class Store:
+    def __init__(self, n_products: int, images_per_product: int, n_pages: int, n_blogs: int, articles_per_blog: int, n_files: int = 30, n_theme_assets: int = 120):
+        self.lock = threading.Lock()
+        self.products: Dict[int, dict] = {}
+        self.pages: Dict[int, dict] = {}
+        self.blogs: Dict[int, dict] = {}
+        self.articles: Dict[int, Dict[int, dict]] = {}
+        self.media: Dict[str, dict] = {}  # MediaImage gid -> product image
+        self.files: Dict[str, dict] = {}  # Files-library-only images (theme/global assets)
+        image_id = 5000
+        for i in range(n_products):
+            pid = 1000 + i
+            images = []
+            for k in range(images_per_product):
+                image_id += 1
+                # every third image starts without alt text
+                alt = "" if (i + k) % 3 == 0 else f"Product {i} view {k}"
+                images.append({"id": image_id, "product_id": pid, "src": f"{CDN}/products/p{pid}_{k}.jpg?v=1", "alt": alt})
+                # the same image as a MediaImage (shares alt with the ProductImage, as on Shopify)
+                self.media[f"gid://shopify/MediaImage/{image_id + 100000}"] = images[-1]
+            self.products[pid] = {
+                "id": pid,
+                "title": f"Product {i}",
+                "handle": f"product-{i}",
+                "status": "active" if i % 10 else "draft",
+                "images": images,
+            }
+        for i in range(n_files):
+            gid = f"gid://shopify/MediaImage/{9001 + i}"
+            self.files[gid] = {"src": f"{CDN}/files/global_{i}.png?v=1", "alt": "" if i % 2 == 0 else f"Global image {i}"}
+        srcs = [img["src"] for p in self.products.values() for img in p["images"]] or [f"{CDN}/files/placeholder.jpg"]
+        for i in range(n_pages):
+            self.pages[2000 + i] = {"id": 2000 + i, "title": f"Page {i}", "body_html": self._body(i, srcs)}
+        for b in range(n_blogs):
+            blog_id = 3000 + b
+            self.blogs[blog_id] = {"id": blog_id, "title": f"Blog {b}", "handle": f"blog-{b}"}
+            self.articles[blog_id] = {}
+            for a in range(articles_per_blog):
+                aid = 4000 + b * articles_per_blog + a
+                self.articles[blog_id][aid] = {"id": aid, "title": f"Article {b}.{a}", "body_html": self._body(aid, srcs)}
+        self.theme_assets: Dict[str, dict] = {}
+        for key, value in self._theme(n_theme_assets, n_files):
+            self.set_asset(key, value)
+        self.bulk_ops: Dict[int, dict] = {}
+        self.staged: Dict[int, Optional[int]] = {}  # staged upload id -> bytes received (None until PUT)
+        self.created_files = 0  # fileCreate counter; gids stay unique after deletes
+        self.redirects: Dict[str, dict] = {}  # path -> redirect
+        self.quota_lock = threading.Lock()
+        self.rest_size = 40.0
+        self.rest_used = 0.0
+        self.rest_at = time.monotonic()
+        self.gql_max = 1000.0
+        self.gql_restore = 50.0
+        self.gql_available = self.gql_max
+        self.gql_at = time.monotonic()
+
+    def rest_call(self) -> Tuple[bool, str]:
+        """Admit one REST call if the leaky bucket has room; returns (admitted, call-limit header)."""
+        with self.quota_lock:
+            now = time.monotonic()
+            self.rest_used = max(0.0, self.rest_used - (now - self.rest_at) * self.rest_size / 20)
+            self.rest_at = now
+            admitted = self.rest_used + 1 <= self.rest_size
+            if admitted:
+                self.rest_used += 1
+            return admitted, f"{int(round(self.rest_used))}/{int(self.rest_size)}"
+
+    def graphql_cost(self, cost: float) -> Tuple[bool, dict]:
+        """Charge a query's cost if enough points are available; returns (admitted, extensions.cost)."""
+        with self.quota_lock:
+            now = time.monotonic()
+            self.gql_available = min(self.gql_max, self.gql_available + (now - self.gql_at) * self.gql_restore)
+            self.gql_at = now
+            admitted = self.gql_available >= cost
+            if admitted:
+                self.gql_available -= cost
+            return admitted, {
+                "requestedQueryCost": cost,
+                "actualQueryCost": cost if admitted else None,
+                "throttleStatus": {
+                    "maximumAvailable": self.gql_max,
+                    "currentlyAvailable": int(self.gql_available),
+                    "restoreRate": self.gql_restore,
+                },
+            }
+
+    # --- theme assets ---
+
+    @staticmethod
+    def _theme(n: int, n_files: int) -> Iterator[Tuple[str, object]]:
+        """A theme with Liquid files that reference Files-library images, a few inline JSON-LD blocks and a binary asset."""
+        kinds = ("sections", "snippets", "templates", "layout")
+        for i in range(n):
+            kind = kinds[i % len(kinds)]
+            f = i % max(1, n_files)
+            lines = [
+                f"{{%- comment -%}} {kind} {i} {{%- endcomment -%}}",
+                f'<div class="{kind}-{i}">',
+                f"  <img src=\"{CDN}/files/global_{f}.png?v=1\" alt=\"\">",
+                f"  {{{{ 'global_{(f + 1) % max(1, n_files)}.png' | file_url | image_tag }}}}",
+            ]
+            if i % 5 == 0:
+                lines.append("  {{ 'star_star_star_star_star.svg' | file_url }}")
+            if i % 7 == 0:
+                lines.append('  <script type="application/ld+json">{"@type": "Organization", "name": "Stand-in"}</script>')
+            lines += [f"  <p>{{{{ section.settings.text_{k} }}}}</p>" for k in range(20)] + ["</div>"]
+            yield f"{kind}/{kind[:-1] if kind != 'layout' else 'theme'}-{i}.liquid", "\n".join(lines) + "\n"
+        yield "layout/theme.liquid", "<!doctype html>\n<html>\n<head>\n  {{ content_for_header }}\n</head>\n<body>{{ content_for_layout }}</body>\n</html>\n"
+        yield "config/settings_data.json", json.dumps({"current": {"logo": "shopify://shop_images/BOB_logo_horiz_2022_SVG_1.svg"}}, indent=2)
+        yield "assets/logo.png", b"\x89PNG\r\n\x1a\n" + bytes(64)
+
+    def set_asset(self, key: str, value) -> dict:
+        raw = value if isinstance(value, bytes) else value.encode()
+        asset = {
+            "key": key,
+            "checksum": hashlib.md5(raw).hexdigest(),
+            "size": len(raw),
+            "content_type": "image/png" if isinstance(value, bytes) else "text/x-liquid",
+            "updated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="microseconds"),
+        }
+        if isinstance(value, bytes):
+            asset["attachment"] = base64.b64encode(value).decode("ascii")
+        else:
+            asset["value"] = value
+        self.theme_assets[key] = asset
+        return asset
+
+    @staticmethod
+    def _body(i: int, srcs: List[str]) -> str:
+        imgs = "".join(f'<p><img src="{srcs[(i * 7 + k) % len(srcs)].split("?")[0]}"></p>' for k in range(3))
+        return f"<h2>Section {i}</h2><p>Body text {i}.</p>{imgs}"
+
+    # --- bulk exports ---
+
+    def bulk_lines(self, root: str) -> Iterator[dict]:
+        if root == "products":
+            for p in self.products.values():
+                gid = f"gid://shopify/Product/{p['id']}"
+                yield {"id": gid, "title": p["title"], "handle": p["handle"], "status": p["status"].upper()}
+                for img in p["images"]:
+                    yield {"id": f"gid://shopify/ProductImage/{img['id']}", "url": img["src"], "altText": img["alt"] or None, "__parentId": gid}
+                for img in p["images"]:
+                    media_gid = f"gid://shopify/MediaImage/{img['id'] + 100000}"
+                    yield {"id": media_gid, "alt": img["alt"], "image": {"url": img["src"]}, "__parentId": gid}
+        elif root == "files":
+            # product media are listed in Files too
+            for gid, f in list(self.files.items()) + list(self.media.items()):
+                yield {"id": gid, "alt": f["alt"], "image": {"url": f["src"]}}
+        elif root == "pages":
+            for pg in self.pages.values():
+                yield {"id": f"gid://shopify/Page/{pg['id']}", "title": pg["title"], "body": pg["body_html"]}
+        elif root == "blogs":
+            for blog in self.blogs.values():
+                gid = f"gid://shopify/Blog/{blog['id']}"
+                yield {"id": gid, "title": blog["title"], "handle": blog["handle"]}
+                for art in self.articles[blog["id"]].values():
+                    yield {"id": f"gid://shopify/Article/{art['id']}", "title": art["title"], "body": art["body_html"], "__parentId": gid}
+
+
+def paged(items: List[dict], query: Dict[str, List[str]]) -> List[dict]:
+    since_id = int(query.get("since_id", ["0"])[0] or 0)
+    limit = min(250, int(query.get("limit", ["50"])[0] or 50))
+    return [x for x in sorted(items, key=lambda x: x["id"]) if x["id"] > since_id][:limit]
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    store: Store
+    latency = 0.0
+    bulk_sec = 1.0
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send(self, status: int, payload, content_type: str = "application/json", headers: Optional[Dict[str, str]] = None) -> None:
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json_body(self) -> dict:
+        n = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(n) or b"{}")
+
+    def _route(self) -> Tuple[str, Dict[str, List[str]]]:
+        parts = urlsplit(self.path)
+        path = re.sub(r"^/admin/api/[^/]+", "", parts.path)
+        return path, parse_qs(parts.query)
+
+    def _rest_admitted(self) -> bool:
+        admitted, limit = self.store.rest_call()
+        self._call_limit = limit
+        if not admitted:
+            self._send(
+                429,
+                {"errors": "Exceeded 2 calls per second for api client. Reduce request rates to resume uninterrupted service."},
+                headers={"Retry-After": "1.0", "X-Shopify-Shop-Api-Call-Limit": limit},
+            )
+        return admitted
+
+    def _send_rest(self, status: int, payload) -> None:
+        self._send(status, payload, headers={"X-Shopify-Shop-Api-Call-Limit": self._call_limit})
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        path, query = self._route()
+        s = self.store
+        m = re.fullmatch(r"/bulk/(\d+)\.jsonl", path)
+        if m:
+            op = s.bulk_ops.get(int(m.group(1)))
+            if op is None:
+                return self._send(404, {"errors": "Not Found"})
+            body = "".join(json.dumps(line) + "\n" for line in s.bulk_lines(op["root"])).encode()
+            return self._send(200, body, "application/jsonl")
+        if not self._rest_admitted():
+            return
+        with s.lock:
+            if path == "/products.json":
+                return self._send_rest(200, {"products": paged(list(s.products.values()), query)})
+            if path == "/pages.json":
+                return self._send_rest(200, {"pages": paged(list(s.pages.values()), query)})
+            if path == "/blogs.json":
+                return self._send_rest(200, {"blogs": list(s.blogs.values())})
+            m = re.fullmatch(r"/blogs/(\d+)/articles\.json", path)
+            if m and int(m.group(1)) in s.articles:
+                return self._send_rest(200, {"articles": paged(list(s.articles[int(m.group(1))].values()), query)})
+            if re.fullmatch(r"/themes/\d+/assets\.json", path):
+                key = query.get("asset[key]", [None])[0]
+                if key is None:
+                    listing = [{k: v for k, v in a.items() if k not in ("value", "attachment")} for a in s.theme_assets.values()]
+                    return self._send_rest(200, {"assets": listing})
+                if key in s.theme_assets:
+                    return self._send_rest(200, {"asset": s.theme_assets[key]})
+        self._send_rest(404, {"errors": "Not Found"})
+
+    def do_PUT(self):
+        time.sleep(self.latency)
+        path, _ = self._route()
+        s = self.store
+        m = re.fullmatch(r"/staged/(\d+)", path)
+        if m:
+            # stream the upload to nowhere, counting bytes, like a signed storage URL would accept it
+            remaining = int(self.headers.get("Content-Length") or 0)
+            received = 0
+            while remaining:
+                chunk = self.rfile.read(min(remaining, 1 << 16))
+                if not chunk:
+                    break
+                received += len(chunk)
+                remaining -= len(chunk)
+            if int(m.group(1)) not in s.staged:
+                return self._send(404, b"", "text/plain")
+            s.staged[int(m.group(1))] = received
+            return self._send(200, b"", "text/plain")
+        payload = self._json_body()
+        if not self._rest_admitted():
+            return
+        with s.lock:
+            m = re.fullmatch(r"/products/(\d+)/images/(\d+)\.json", path)
+            if m and int(m.group(1)) in s.products:
+                for img in s.products[int(m.group(1))]["images"]:
+                    if img["id"] == int(m.group(2)):
+                        img.update({k: v for k, v in payload.get("image", {}).items() if k == "alt"})
+                        return self._send_rest(200, {"image": img})
+            m = re.fullmatch(r"/pages/(\d+)\.json", path)
+            if m and int(m.group(1)) in s.pages:
+                s.pages[int(m.group(1))].update({k: v for k, v in payload.get("page", {}).items() if k in ("title", "body_html")})
+                return self._send_rest(200, {"page": s.pages[int(m.group(1))]})
+            m = re.fullmatch(r"/blogs/(\d+)/articles/(\d+)\.json", path)
+            if m and int(m.group(2)) in s.articles.get(int(m.group(1)), {}):
+                art = s.articles[int(m.group(1))][int(m.group(2))]
+                art.update({k: v for k, v in payload.get("article", {}).items() if k in ("title", "body_html")})
+                return self._send_rest(200, {"article": art})
+            if re.fullmatch(r"/themes/\d+/assets\.json", path) and payload.get("asset", {}).get("key"):
+                asset = payload["asset"]
+                if "src" in asset:
+                    value = f"(fetched from {asset['src']})".encode()
+                else:
+                    value = base64.b64decode(asset["attachment"]) if "attachment" in asset else asset.get("value", "")
+                saved = s.set_asset(asset["key"], value)
+                return self._send_rest(200, {"asset": {k: v for k, v in saved.items() if k not in ("value", "attachment")}})
+        self._send_rest(404, {"errors": "Not Found"})
+
+    def do_DELETE(self):
+        time.sleep(self.latency)
+        path, query = self._route()
+        if not self._rest_admitted():
+            return
+        s = self.store
+        with s.lock:
+            key = query.get("asset[key]", [None])[0]
+            if re.fullmatch(r"/themes/\d+/assets\.json", path) and key in s.theme_assets:
+                del s.theme_assets[key]
+                return self._send_rest(200, {"message": f"{key} was successfully deleted"})
+        self._send_rest(404, {"errors": "Not Found"})
+
+    def do_POST(self):
+        time.sleep(self.latency)
+        path, _ = self._route()
+        req = self._json_body()  # read it even for a 404 so the keep-alive connection stays in sync
+        if path == "/redirects.json":
+            if not self._rest_admitted():
+                return
+            redirect = req.get("redirect") or {}
+            with self.store.lock:
+                if not redirect.get("path") or redirect["path"] in self.store.redirects:
+                    return self._send_rest(422, {"errors": {"path": ["has already been taken"]}})
+                saved = {"id": 9000 + len(self.store.redirects), "path": redirect["path"], "target": redirect.get("target", "")}
+                self.store.redirects[saved["path"]] = saved
+            return self._send_rest(201, {"redirect": saved})
+        if path != "/graphql.json":
+            return self._send(404, {"errors": "Not Found"})
+        query = req.get("query") or ""
+        # Polling is cheap; everything else is charged like a small query/mutation
+        admitted, cost = self.store.graphql_cost(1 if "node(" in query else 10)
+        if admitted:
+            result = self.graphql(query, req.get("variables") or {})
+        else:
+            result = {"errors": [{"message": "Throttled", "extensions": {"code": "THROTTLED"}}]}
+        result["extensions"] = {"cost": cost}
+        self._send(200, result)
+
+    def graphql(self, query: str, variables: dict) -> dict:
+        s = self.store
+        if "bulkOperationRunQuery" in query:
+            m = re.match(r"\s*\{\s*(\w+)", variables.get("query") or "")
+            if not m or m.group(1) not in ("products", "pages", "blogs", "files"):
+                return {"data": {"bulkOperationRunQuery": {"bulkOperation": None, "userErrors": [{"field": ["query"], "message": "Unsupported bulk query for the stand-in"}]}}}
+            with s.lock:
+                if any(op["done_at"] > time.time() for op in s.bulk_ops.values()):
+                    return {"data": {"bulkOperationRunQuery": {"bulkOperation": None, "userErrors": [{"field": None, "message": "A bulk query operation for this app and shop is already in progress"}]}}}
+                op_id = len(s.bulk_ops) + 1
+                s.bulk_ops[op_id] = {"root": m.group(1), "done_at": time.time() + self.bulk_sec}
+            return {"data": {"bulkOperationRunQuery": {"bulkOperation": {"id": f"gid://shopify/BulkOperation/{op_id}", "status": "CREATED"}, "userErrors": []}}}
+        if "BulkOperation" in query and "node(" in query:
+            op_id = int(str(variables.get("id", "")).rsplit("/", 1)[-1] or 0)
+            op = s.bulk_ops.get(op_id)
+            if op is None:
+                return {"data": {"node": None}}
+            done = time.time() >= op["done_at"]
+            count = sum(1 for _ in s.bulk_lines(op["root"]))
+            host = self.headers.get("Host")
+            return {"data": {"node": {
+                "id": f"gid://shopify/BulkOperation/{op_id}",
+                "status": "COMPLETED" if done else "RUNNING",
+                "errorCode": None,
+                "objectCount": str(count if done else count // 2),
+                "url": f"http://{host}/bulk/{op_id}.jsonl" if done and count else None,
+                "partialDataUrl": None,
+            }}}
+        if "fileStatus" in query and "node(" in query:
+            with s.lock:
+                f = s.files.get(str(variables.get("id", ""))) or s.media.get(str(variables.get("id", "")))
+                if f is None:
+                    return {"data": {"node": None}}
+                ready = time.time() >= f.get("ready_at", 0)
+                return {"data": {"node": {"fileStatus": "READY" if ready else "UPLOADED", "image": {"url": f["src"]} if ready else None}}}
+        if "stagedUploadsCreate(" in query:
+            host = self.headers.get("Host")
+            targets = []
+            with s.lock:
+                for item in variables.get("input") or []:
+                    n = len(s.staged) + 1
+                    s.staged[n] = None
+                    targets.append({
+                        "url": f"http://{host}/staged/{n}",
+                        "resourceUrl": f"http://{host}/staged/{n}?resource",
+                        "parameters": [{"name": "content_type", "value": item.get("mimeType") or ""}, {"name": "acl", "value": "private"}],
+                    })
+            return {"data": {"stagedUploadsCreate": {"stagedTargets": targets, "userErrors": []}}}
+        if "files(" in query and "filename:" in str(variables.get("query")):
+            name = str(variables["query"]).split("filename:", 1)[1].strip("'\" ")
+            with s.lock:
+                nodes = [
+                    {"id": gid, "fileStatus": "READY", "image": {"url": f["src"]}}
+                    for gid, f in s.files.items()
+                    if f["src"].split("?")[0].rsplit("/", 1)[-1] == name
+                ]
+            return {"data": {"files": {"edges": [{"node": n} for n in nodes]}}}
+        if "fileDelete(" in query:
+            deleted, errors = [], []
+            with s.lock:
+                for i, gid in enumerate(variables.get("fileIds") or []):
+                    if s.files.pop(gid, None) is None:
+                        errors.append({"field": ["fileIds", str(i)], "message": f"File id {gid} does not exist."})
+                    else:
+                        deleted.append(gid)
+            return {"data": {"fileDelete": {"deletedFileIds": deleted, "userErrors": errors}}}
+        if "fileCreate(" in query:
+            created, errors = [], []
+            with s.lock:
+                for i, item in enumerate(variables.get("files") or []):
+                    source = str(item.get("originalSource") or "")
+                    m = re.search(r"/staged/(\d+)\?resource$", source)
+                    if not source or (m and s.staged.get(int(m.group(1))) is None):
+                        errors.append({"field": ["files", str(i), "originalSource"], "message": "File could not be fetched from originalSource"})
+                        continue
+                    name = item.get("filename") or source.split("?")[0].rsplit("/", 1)[-1]
+                    s.created_files += 1
+                    kind = "MediaImage" if item.get("contentType", "IMAGE") == "IMAGE" else "GenericFile"
+                    gid = f"gid://shopify/{kind}/{9500 + s.created_files}"
+                    # Shopify fetches and processes the source asynchronously; a GenericFile has no url until then
+                    s.files[gid] = {"src": f"{CDN}/files/{name}?v=1", "alt": item.get("alt") or "", "ready_at": time.time() + 0.5}
+                    created.append({"__typename": kind, "id": gid, "fileStatus": "UPLOADED", **({"url": None} if kind == "GenericFile" else {})})
+            return {"data": {"fileCreate": {"files": created, "userErrors": errors}}}
+        if "productUpdateMedia(" in query:
+            product_gid = str(variables.get("productId", ""))
+            pid = int(product_gid.rsplit("/", 1)[-1] or 0)
+            with s.lock:
+                if pid not in s.products:
+                    return {"data": {"productUpdateMedia": {"media": None, "mediaUserErrors": [{"field": ["productId"], "message": "Product does not exist", "code": "PRODUCT_DOES_NOT_EXIST"}]}}}
+                media, errors = self._set_alts(variables.get("media") or [], "media", lambda gid: s.media.get(gid) if gid in s.media and s.media[gid]["product_id"] == pid else None)
+            return {"data": {"productUpdateMedia": {"media": media, "mediaUserErrors": errors}}}
+        if "fileUpdate(" in query:
+            with s.lock:
+                files, errors = self._set_alts(variables.get("files") or [], "files", lambda gid: s.files.get(gid) or s.media.get(gid))
+            return {"data": {"fileUpdate": {"files": files, "userErrors": errors}}}
+        return {"errors": [{"message": "Operation not supported by the stand-in server"}]}
+
+    @staticmethod
+    def _set_alts(inputs: List[dict], key: str, lookup) -> Tuple[List[dict], List[dict]]:
+        """Apply [{id, alt}] inputs; errors name the failing input by index, like Shopify's userErrors."""
+        done, errors = [], []
+        for i, item in enumerate(inputs):
+            target = lookup(str(item.get("id", "")))
+            if target is None:
+                errors.append({"field": [key, str(i), "id"], "message": "Media id does not exist", "code": "INVALID"})
+            elif len(item.get("alt") or "") > 512:
+                errors.append({"field": [key, str(i), "alt"], "message": "Alt is too long (maximum is 512 characters)", "code": "INVALID"})
+            else:
+                target["alt"] = item.get("alt") or ""
+                done.append({"id": item["id"], "alt": target["alt"]})
+        return done, errors
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Local stand-in for the Shopify Admin API (REST + GraphQL bulk operations and media mutations).")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8899)
+    ap.add_argument("--products", type=int, default=300)
+    ap.add_argument("--images-per-product", type=int, default=4)
+    ap.add_argument("--pages", type=int, default=40)
+    ap.add_argument("--blogs", type=int, default=2)
+    ap.add_argument("--articles-per-blog", type=int, default=60)
+    ap.add_argument("--files", type=int, default=30, help="Files-library images that are not product media")
+    ap.add_argument("--theme-assets", type=int, default=120, help="Liquid files in the stand-in theme (any theme id serves it)")
+    ap.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request (simulates a round trip)")
+    ap.add_argument("--bulk-sec", type=float, default=1.0, help="How long a bulk operation stays RUNNING")
+    ap.add_argument("--rest-bucket", type=float, default=40, help="REST leaky bucket size (leaks size/20 per second)")
+    ap.add_argument("--graphql-points", type=float, default=1000, help="GraphQL cost bucket size")
+    ap.add_argument("--graphql-restore", type=float, default=50, help="GraphQL points restored per second")
+    args = ap.parse_args()
+
+    Handler.store = Store(args.products, args.images_per_product, args.pages, args.blogs, args.articles_per_blog, args.files, args.theme_assets)
+    Handler.store.rest_size = args.rest_bucket
+    Handler.store.gql_max = Handler.store.gql_available = args.graphql_points
+    Handler.store.gql_restore = args.graphql_restore
+    Handler.latency = args.latency
+    Handler.bulk_sec = args.bulk_sec
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"Stand-in Admin API on http://{args.host}:{args.port} (export SHOPIFY_ADMIN_URL=http://{args.host}:{args.port})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()